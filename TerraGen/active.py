@@ -0,0 +1,189 @@
+import numpy as np
+
+from step import DailyStep
+from terrain import TERRAIN_CODES
+
+
+OCEAN = TERRAIN_CODES["ocean"]
+DESERT = TERRAIN_CODES["desert"]
+
+
+class ActiveSet:
+    """
+    Index sets of the cells each daily rule can still change.
+
+    - ``land``: cells that are not ocean. Erosion and desertification never fire on ocean cells, and
+      no rule turns a cell into ocean, so this set only changes when an outside edit does.
+    - ``vegetation``: cells whose vegetation the rules can still change. A desert without
+      vegetation is dormant: seasonal growth multiplies zero, the desert decrease and
+      desertification are clamped at zero, and vegetation does not spread into deserts. Cells join
+      the dormant set when desertification (or the seasonal desert decrease) brings them to zero,
+      and leave it when something else gives them vegetation again (see wake).
+
+    Both sets are sorted index arrays, so a rule restricted to them visits cells in grid order and
+    computes exactly what the full-grid rule computes on those cells. ``version`` changes whenever
+    a set does, so users can cache data gathered over the sets.
+    """
+
+    def __init__(self, grid):
+        """
+        :param grid: The HexGrid to track.
+        """
+        self.grid = grid
+        self.version = 0
+        self.refresh()
+
+    def __len__(self):
+        return len(self.vegetation)
+
+    def _is_dormant(self, cells=slice(None)):
+        return (self.grid.terrain_code[cells] == DESERT) & (self.grid.vegetation[cells] == 0.0)
+
+    def refresh(self):
+        """
+        Rebuild both sets from the whole grid (e.g. after the grid was edited outside the rules).
+        """
+        self.dormant = self._is_dormant()
+        self.is_land = self.grid.terrain_code != OCEAN
+        self.vegetation = np.flatnonzero(~self.dormant)
+        self.land = np.flatnonzero(self.is_land)
+        self.version += 1
+
+    def active_fraction(self):
+        """
+        Get the fraction of the grid the vegetation rules still visit.
+        """
+        return len(self.vegetation) / max(len(self.grid), 1)
+
+    def retire(self, cells):
+        """
+        Move the given active cells that have become dormant out of the vegetation set.
+        :param cells: Indices of active cells whose vegetation or terrain changed.
+        """
+        cells = cells[self._is_dormant(cells)]
+        if len(cells):
+            self.dormant[cells] = True
+            self.vegetation = self.vegetation[~self.dormant[self.vegetation]]
+            self.version += 1
+
+    def wake(self, cells=None):
+        """
+        Re-check cells changed outside the daily rules (e.g. by events) and bring the dormant ones
+        that can change again back into the active sets.
+        :param cells: Indices of the changed cells (default: every cell).
+        """
+        cells = np.arange(len(self.grid)) if cells is None else np.asarray(cells, dtype=np.int64)
+        land = self.grid.terrain_code[cells] != OCEAN
+        moved = cells[land != self.is_land[cells]]
+        if len(moved):
+            self.is_land[moved] = ~self.is_land[moved]
+            self.land = np.flatnonzero(self.is_land)
+            self.version += 1
+
+        cells = cells[self.dormant[cells]]
+        woken = cells[~self._is_dormant(cells)]
+        if len(woken):
+            self.dormant[woken] = False
+            self.vegetation = np.union1d(self.vegetation, woken)
+            self.version += 1
+
+
+class ActiveDailyStep(DailyStep):
+    """
+    DailyStep that applies the vegetation rules only to the active cells of an ActiveSet and erosion
+    only to land cells, with the same floating-point operations in the same order, so the result is
+    bit-identical to DailyStep. The weather changes the water level of every cell every day, so the
+    weather and seasonal snow still cover the whole grid; the savings grow with the share of ocean
+    and barren desert on a mature world.
+    """
+
+    def __init__(self, grid, active):
+        """
+        :param grid: The HexGrid to update (its topology must not change).
+        :param active: The ActiveSet of the grid.
+        """
+        super().__init__(grid)
+        self.active = active
+        self._version = None
+
+    def _gather(self):
+        """
+        Gather the neighbor table of the active cells, once per version of the active sets.
+        """
+        if self._version != self.active.version:
+            self.active_neighbors = np.ascontiguousarray(self.neighbor_columns[:, self.active.vegetation])
+            self._version = self.active.version
+
+    def run(self, grid, weather, season, config):
+        """
+        Apply the weather, seasonal and interaction rules of one day.
+        :param grid: The HexGrid to update.
+        :param weather: Weather dictionary produced by WeatherSystem.generate_weather.
+        :param season: Name of the current season.
+        :param config: A dictionary-like object containing the simulation parameters.
+        """
+        height = grid.height
+        water = grid.water_level
+        high = self.high
+        interaction_factors = config["interaction_factors"]
+        snow_accumulation = config["weather_impact"]["snow_accumulation"]
+        seasonal_effects = config["seasonal_effects"].get(season, {})
+        self._gather()
+        cells = self.active.vegetation
+        land = self.active.land
+
+        # Weather
+        self._apply_weather(grid, weather, config)
+
+        # Seasons, on the active cells for vegetation and on every cell for water
+        vegetation = grid.vegetation[cells]
+        fertile = grid.terrain_code[cells] != DESERT
+        if "vegetation_growth_multiplier" in seasonal_effects:
+            vegetation *= seasonal_effects["vegetation_growth_multiplier"]
+        if "desertification_rate_multiplier" in seasonal_effects:
+            decrease = interaction_factors["desertification_rate"] * seasonal_effects["desertification_rate_multiplier"]
+            np.subtract(vegetation, decrease, out=vegetation, where=~fertile)
+        np.clip(vegetation, 0.0, 1.0, out=vegetation)
+        if "snow_accumulation_multiplier" in seasonal_effects:
+            np.add(water, snow_accumulation * seasonal_effects["snow_accumulation_multiplier"], out=water, where=high)
+            np.clip(water, 0.0, 1.0, out=water)
+
+        # Erosion, on land cells
+        erosion_rate = interaction_factors["erosion_rate"]
+        land_height = height[land]
+        land_water = water[land]
+        mask = land_water > 0
+        np.subtract(land_height, erosion_rate, out=land_height, where=mask)
+        np.maximum(land_height, 0.0, out=land_height, where=mask)
+        np.subtract(land_water, erosion_rate, out=land_water, where=mask)
+        np.maximum(land_water, 0.0, out=land_water, where=mask)
+        height[land] = land_height
+        water[land] = land_water
+
+        # Vegetation sources: only fertile cells spread, and they are all active
+        sources = self.sources
+        sources[:-1] = False
+        sources[cells] = fertile & (water[cells] > 0.3)
+
+        # Vegetation spread
+        growth_rate = interaction_factors["vegetation_growth"]
+        counts = np.zeros(len(cells), dtype=np.int8)
+        for column in self.active_neighbors:
+            counts += sources[column]
+        for step in range(1, len(self.active_neighbors) + 1):
+            mask = (counts >= step) & fertile & (vegetation < 1.0)
+            if not mask.any():
+                break
+            np.add(vegetation, growth_rate, out=vegetation, where=mask)
+            np.minimum(vegetation, 1.0, out=vegetation, where=mask)
+
+        # Desertification
+        mask = (water[cells] < 0.1) & (grid.terrain_code[cells] != OCEAN)
+        np.subtract(vegetation, interaction_factors["desertification_rate"], out=vegetation, where=mask)
+        np.maximum(vegetation, 0.0, out=vegetation, where=mask)
+        mask &= vegetation == 0.0
+        grid.vegetation[cells] = vegetation
+        grid.terrain_code[cells[mask]] = DESERT
+
+        # Deserts that lost their last vegetation leave the active set
+        self.active.retire(cells[~fertile | mask])
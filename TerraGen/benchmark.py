@@ -0,0 +1,397 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+from history import BinaryHistoryWriter, JsonLinesHistoryWriter, KeyframeHistoryWriter, MemoryHistoryWriter, NullHistoryWriter
+
+
+BENCHMARK_FORMAT = "terragen-benchmark"
+
+# Version 2 restores the simulation before every timed run; version 1 results are not comparable.
+BENCHMARK_VERSION = 2
+
+# Default matrix of grid radii.
+DEFAULT_RADII = (50, 100, 250, 500, 1000)
+
+# Relative slowdown of a case's best time, compared with a baseline, that counts as a regression.
+DEFAULT_THRESHOLD = 0.10
+
+# History writers the state-saving cases can be run with.
+HISTORY_WRITERS = ("memory", "binary", "keyframe", "jsonl", "null")
+
+
+def _history_writer(name, directory):
+    if name == "memory":
+        return MemoryHistoryWriter()
+    if name == "binary":
+        return BinaryHistoryWriter(os.path.join(directory, "history"))
+    if name == "keyframe":
+        return KeyframeHistoryWriter(os.path.join(directory, "history"))
+    if name == "jsonl":
+        return JsonLinesHistoryWriter(os.path.join(directory, "history.jsonl"))
+    if name == "null":
+        return NullHistoryWriter()
+    raise ValueError(f"Unknown history writer '{name}'. Expected one of {HISTORY_WRITERS}.")
+
+
+@contextlib.contextmanager
+def _working_directory(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def build_simulation(preset, radius, backend=None, history="binary", directory=None, seed=0):
+    """
+    Build an initialized simulation of the given size for benchmarking.
+    :param preset: Configuration preset.
+    :param radius: Hexagonal radius of the grid.
+    :param backend: Kernel backend (default: the preset's backend).
+    :param history: Name of the history writer (see HISTORY_WRITERS).
+    :param directory: Directory for history files (default: a new temporary directory).
+    :param seed: Simulation seed.
+    :return: The Simulation, with the weather of its first day already generated.
+    """
+    from simulation import Simulation
+
+    directory = directory or tempfile.mkdtemp(prefix="terragen-benchmark-")
+    simulation = Simulation(config_preset=preset, backend=backend, history=_history_writer(history, directory), seed=seed)
+    simulation.config.grid_width = 2 * radius
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        simulation.initialize_simulation()
+    simulation.weather_system.generate_weather()
+    return simulation
+
+
+def snapshot_state(simulation):
+    """
+    Copy the mutable state of a benchmark simulation: grid fields, weather, season, day counter
+    and random streams.
+    :return: A dictionary for restore_state.
+    """
+    grid = simulation.terrain.grid
+    return {
+        "fields": {name: getattr(grid, name).copy() for name in grid.FIELDS + ("terrain_code",)},
+        "weather": dict(simulation.weather_system.current_weather),
+        "season": (simulation.season_manager.current_day, simulation.season_manager.current_season_index),
+        "day": simulation.current_day,
+        "rngs": {name: rng.bit_generator.state for name, rng in simulation.rngs.items()},
+    }
+
+
+def restore_state(simulation, state):
+    """
+    Put a simulation back into the state returned by snapshot_state. The grid arrays are
+    overwritten in place, so objects holding them (step engines, active sets) stay valid.
+    """
+    grid = simulation.terrain.grid
+    for name, values in state["fields"].items():
+        getattr(grid, name)[:] = values
+    simulation.weather_system.current_weather = dict(state["weather"])
+    simulation.season_manager.current_day, simulation.season_manager.current_season_index = state["season"]
+    simulation.current_day = state["day"]
+    for name, rng_state in state["rngs"].items():
+        simulation.rngs[name].bit_generator.state = rng_state
+    if simulation.active_set is not None:
+        simulation.active_set.refresh()
+
+
+def _reset_history(simulation, history, directory):
+    """
+    Replace the history of a simulation with a fresh writer holding one recorded day.
+    """
+    simulation.history.close()
+    simulation.history = _history_writer(history, directory)
+    simulation.simulation_history = getattr(simulation.history, "frames", [])
+    simulation.history.open(simulation.terrain.grid)
+    simulation.save_simulation_state(simulation.weather_system.current_weather, None)
+
+
+# Benchmark cases. Each one takes a simulation and its scratch directory and returns the function
+# to time (or None if the case does not apply to the simulation's backend or history writer). The
+# simulation is restored to its initial state before every timed run (see run_benchmarks), so no
+# case depends on which cases ran before it or on how often it was repeated.
+
+def _case_generate(simulation, directory):
+    return lambda: simulation.terrain.generate([])
+
+
+def _case_normalize(simulation, directory):
+    return simulation.terrain.normalize
+
+
+def _case_weather(simulation, directory):
+    return lambda: simulation.weather_system.apply_weather_effects(simulation.terrain.grid)
+
+
+def _case_seasons(simulation, directory):
+    return lambda: simulation.season_manager.apply_seasonal_effects(simulation.terrain.grid, simulation.config.__dict__)
+
+
+def _case_erosion(simulation, directory):
+    return lambda: simulation.interactions_manager.simulate_erosion(simulation.terrain.grid)
+
+
+def _case_spread(simulation, directory):
+    return lambda: simulation.interactions_manager.spread_vegetation(simulation.terrain.grid)
+
+
+def _case_desertification(simulation, directory):
+    return lambda: simulation.interactions_manager.simulate_desertification(simulation.terrain.grid)
+
+
+def _event_case(event_type):
+    def case(simulation, directory):
+        return lambda: simulation.event_manager.apply_event(event_type, simulation.terrain.grid)
+    return case
+
+
+def _case_daily_step(simulation, directory):
+    if simulation.daily_step is None:
+        return None
+    weather = simulation.weather_system.current_weather
+    return lambda: simulation.daily_step.run(
+        simulation.terrain.grid, weather, simulation.season_manager.get_current_season(), simulation.config.__dict__
+    )
+
+
+def _case_update_day(simulation, directory):
+    def update_day():
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            simulation.update_day(visualize=False)
+    return update_day
+
+
+def _case_save_state(simulation, directory):
+    weather = simulation.weather_system.current_weather
+    return lambda: simulation.save_simulation_state(weather, None)
+
+
+def _case_heightmap(simulation, directory):
+    return simulation.visualization.get_heightmap
+
+
+def _case_export(simulation, directory):
+    if not isinstance(simulation.history, MemoryHistoryWriter):
+        return None  # Streaming writers export while saving each day; exporting would only close the files
+    def export():
+        with _working_directory(directory):
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                simulation.export_simulation_history("benchmark_history.json")
+    return export
+
+
+CASES = {
+    "terrain.generate": _case_generate,
+    "terrain.normalize": _case_normalize,
+    "weather.apply_weather_effects": _case_weather,
+    "season.apply_seasonal_effects": _case_seasons,
+    "interactions.simulate_erosion": _case_erosion,
+    "interactions.spread_vegetation": _case_spread,
+    "interactions.simulate_desertification": _case_desertification,
+    "events.earthquake": _event_case("earthquake"),
+    "events.flood": _event_case("flood"),
+    "events.wildfire": _event_case("wildfire"),
+    "events.rapid_growth": _event_case("rapid_growth"),
+    "step.daily_step": _case_daily_step,
+    "simulation.update_day": _case_update_day,
+    "simulation.save_simulation_state": _case_save_state,
+    "visualization.get_heightmap": _case_heightmap,
+    "simulation.export_simulation_history": _case_export,
+}
+
+# Cases that simulate a whole day, reported in days per second as well.
+DAY_CASES = ("step.daily_step", "simulation.update_day")
+
+# Cases that write or close the history; they start from a fresh history holding one recorded day.
+HISTORY_CASES = ("simulation.update_day", "simulation.save_simulation_state", "simulation.export_simulation_history")
+
+
+def measure(function, repeat=5, setup=None):
+    """
+    Time a function and measure its memory use.
+    The function is timed ``repeat`` times, then run once more under tracemalloc, which slows it
+    down and is therefore kept out of the timings. tracemalloc sees the memory in use, not every
+    allocation, so temporaries show up in the peak and only blocks that survive the call are counted.
+    :param function: Callable without arguments.
+    :param repeat: Number of timed runs.
+    :param setup: Optional callable run, untimed, before every run of the function.
+    :return: Dictionary of best and mean seconds, the peak of the memory traced during the call
+             (peak_bytes), and the number and total size of the blocks allocated during the call
+             that were still alive after it (live_blocks, live_bytes).
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+        statistics = tracemalloc.take_snapshot().statistics("filename")
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "best": min(times),
+        "mean": sum(times) / len(times),
+        "peak_bytes": peak,
+        "live_blocks": sum(stat.count for stat in statistics),
+        "live_bytes": sum(stat.size for stat in statistics),
+    }
+
+
+def run_benchmarks(radii=DEFAULT_RADII, presets=("default",), cases=None, repeat=5, backend=None, history="binary", progress=None):
+    """
+    Run every benchmark case over the matrix of grid radii and presets.
+    :param radii: Grid radii to benchmark.
+    :param presets: Configuration presets to benchmark.
+    :param cases: Names of the cases to run (default: all of CASES).
+    :param repeat: Number of timed runs per case.
+    :param backend: Kernel backend (default: the preset's backend).
+    :param history: History writer used by the state-saving cases (see HISTORY_WRITERS).
+    :param progress: Optional callback called with each result as it is measured.
+    :return: A JSON-serializable dictionary with the run metadata and the list of results.
+    """
+    cases = list(CASES) if cases is None else cases
+    unknown = [name for name in cases if name not in CASES]
+    if unknown:
+        raise ValueError(f"Unknown benchmark cases {unknown}. Expected names from {list(CASES)}.")
+
+    results = []
+    for preset in presets:
+        for radius in radii:
+            with tempfile.TemporaryDirectory(prefix="terragen-benchmark-") as directory:
+                simulation = build_simulation(preset, radius, backend=backend, history=history, directory=directory)
+                cells = len(simulation.terrain.grid)
+                initial = snapshot_state(simulation)
+                for name in (name for name in CASES if name in cases):
+                    def setup(name=name):
+                        restore_state(simulation, initial)
+                        if name in HISTORY_CASES:
+                            _reset_history(simulation, history, directory)
+
+                    setup()
+                    function = CASES[name](simulation, directory)
+                    if function is None:
+                        continue
+                    result = {"case": name, "preset": preset, "radius": radius, "cells": cells, "repeat": repeat}
+                    result.update(measure(function, repeat, setup))
+                    result["cells_per_second"] = cells / result["mean"] if result["mean"] > 0 else None
+                    if name in DAY_CASES:
+                        result["days_per_second"] = 1.0 / result["mean"] if result["mean"] > 0 else None
+                    results.append(result)
+                    if progress is not None:
+                        progress(result)
+                simulation.history.close()
+
+    return {
+        "format": BENCHMARK_FORMAT,
+        "version": BENCHMARK_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "backend": backend,
+        "history": history,
+        "results": results,
+    }
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare two benchmark runs case by case.
+    :param baseline: Results dictionary of the reference run (e.g., the last release).
+    :param current: Results dictionary of the run under test.
+    :param threshold: Relative slowdown of the best time that counts as a regression.
+    :return: List of comparison dictionaries (case, preset, radius, baseline and current best time,
+             ratio and whether it is a regression), for the cases present in both runs.
+    :raises ValueError: If the runs were made with different benchmark versions, backends or history writers.
+    """
+    for key in ("version", "backend", "history"):
+        if baseline.get(key) != current.get(key):
+            raise ValueError(f"Cannot compare benchmark results with {key} {baseline.get(key)!r} to results with {key} {current.get(key)!r}.")
+    reference = {(result["case"], result["preset"], result["radius"]): result for result in baseline["results"]}
+    comparisons = []
+    for result in current["results"]:
+        key = (result["case"], result["preset"], result["radius"])
+        if key not in reference:
+            continue
+        before = reference[key]["best"]
+        ratio = result["best"] / before if before > 0 else float("inf")
+        comparisons.append({
+            "case": result["case"],
+            "preset": result["preset"],
+            "radius": result["radius"],
+            "baseline": before,
+            "current": result["best"],
+            "ratio": ratio,
+            "regression": ratio > 1.0 + threshold,
+        })
+    return comparisons
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the TerraGen hot paths.")
+    parser.add_argument("--radii", type=int, nargs="+", default=list(DEFAULT_RADII), help="Grid radii to benchmark.")
+    parser.add_argument("--presets", nargs="+", default=["default"], help="Configuration presets to benchmark.")
+    parser.add_argument("--cases", nargs="+", default=None, help=f"Cases to run (default: all). Choices: {', '.join(CASES)}.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case.")
+    parser.add_argument("--backend", default=None, help="Kernel backend for the daily updates.")
+    parser.add_argument("--history", default="binary", choices=HISTORY_WRITERS, help="History writer for the state-saving cases (the export case only runs with 'memory').")
+    parser.add_argument("--output", default=None, help="Write the results to this JSON file.")
+    parser.add_argument("--compare", default=None, help="Baseline results JSON file to check for regressions.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Relative slowdown counted as a regression.")
+    args = parser.parse_args()
+
+    def report(result):
+        line = f"{result['case']:<40} {result['preset']:<10} r={result['radius']:<5} best {result['best'] * 1000:9.3f} ms"
+        line += f"  {result['cells_per_second']:12.4g} cells/s  peak {result['peak_bytes'] / 2 ** 20:8.2f} MiB"
+        if "days_per_second" in result:
+            line += f"  {result['days_per_second']:8.2f} days/s"
+        print(line)
+
+    current = run_benchmarks(
+        radii=args.radii, presets=args.presets, cases=args.cases, repeat=args.repeat,
+        backend=args.backend, history=args.history, progress=report,
+    )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=4)
+        print(f"Benchmark results saved to {args.output}.")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        comparisons = compare_results(baseline, current, args.threshold)
+        regressions = [comparison for comparison in comparisons if comparison["regression"]]
+        for comparison in regressions:
+            print(f"REGRESSION {comparison['case']} {comparison['preset']} r={comparison['radius']}: "
+                  f"{comparison['baseline'] * 1000:.3f} ms -> {comparison['current'] * 1000:.3f} ms ({comparison['ratio']:.2f}x)")
+        print(f"{len(regressions)} of {len(comparisons)} compared cases regressed by more than {args.threshold:.0%}.")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
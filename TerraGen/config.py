@@ -1,4 +1,17 @@
+import copy
 import json
+import os
+from types import MappingProxyType
+
+# Preset keys that must hold numbers, and the nested sections of a preset.
+NUMERIC_KEYS = (
+    "grid_width", "grid_height", "scale", "water_level", "octaves", "persistence", "lacunarity",
+    "initial_temperature", "initial_vegetation", "update_frequency",
+)
+SECTION_KEYS = ("interaction_factors", "weather_impact")
+
+_registries = {}
+
 
 class Config:
     def __init__(self, preset="default", config_file="config_presets.json"):
@@ -12,17 +25,184 @@ class Config:
         self.persistence = 0.5
         self.lacunarity = 2.0
         self.terrain_type = "default"  # Default terrain type
+        self.backend = "numpy"  # Daily update kernels: "numpy", "numba" (JIT, falls back to numpy) or "python" (per-cell reference loops)
+        self.fused_step = True  # Apply weather, seasons and interactions in one fused pass (numpy and numba backends)
+        self.active_set = False  # Skip ocean and barren desert cells in the fused step's rules (numpy backend)
+        self.event_mode = "global"  # "global" (one event hits the whole grid) or "local" (events with footprints)
+        self.event_radius = [2, 8]  # Min and max radius of local events, in hexes
+        self.max_events_per_day = 3  # Number of event slots per day in local mode
         self.load_preset(preset)
 
     def load_preset(self, preset):
+        values = self._preset_values(preset, copy_values=True)
+        if values is not None:
+            for key, value in values.items():
+                setattr(self, key, value)
+
+    def _preset_values(self, preset, copy_values):
+        """
+        Look up a preset in the shared registry of the configuration file.
+        :return: The preset's values (deep-copied if copy_values is set), or None if there are none.
+        """
         try:
-            with open(self.config_file, "r") as file:
-                presets = json.load(file)
-                if preset in presets:
-                    for key, value in presets[preset].items():
-                        setattr(self, key, value)
-                else:
-                    print(f"Preset '{preset}' not found. Loading default configuration.")
-                    self.load_preset("default")
+            registry = preset_registry(self.config_file)
         except FileNotFoundError:
             print(f"Configuration file '{self.config_file}' not found. Using default values.")
+            return None
+        if preset not in registry:
+            print(f"Preset '{preset}' not found. Loading default configuration.")
+            if "default" not in registry:
+                return None
+            preset = "default"
+        return registry.values(preset) if copy_values else registry.frozen_values(preset)
+
+
+class FrozenConfig(Config):
+    """
+    Read-only Config. Nested sections are read-only views of the registry's parsed presets, so
+    creating one copies nothing; PresetRegistry.get hands out one shared instance per preset.
+    """
+    __slots__ = ("_frozen",)
+
+    def __init__(self, preset="default", config_file="config_presets.json"):
+        super().__init__(preset, config_file)
+        object.__setattr__(self, "_frozen", True)
+
+    def load_preset(self, preset):
+        values = self._preset_values(preset, copy_values=False)
+        if values is not None:
+            for key, value in values.items():
+                setattr(self, key, value)
+
+    def __setattr__(self, name, value):
+        if getattr(self, "_frozen", False):
+            raise AttributeError(f"Preset '{self.preset}' is read-only. Create a Config to change it.")
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Preset '{self.preset}' is read-only. Create a Config to change it.")
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_preset(name, values):
+    """
+    Check the types of a parsed preset.
+    :param name: Name of the preset (for error messages).
+    :param values: The preset's dictionary.
+    :raises ValueError: If a value has the wrong type.
+    """
+    if not isinstance(values, dict):
+        raise ValueError(f"Preset '{name}' must be an object.")
+    for key in NUMERIC_KEYS:
+        if key in values and not _is_number(values[key]):
+            raise ValueError(f"Preset '{name}': '{key}' must be a number.")
+    if "terrain_type" in values and not isinstance(values["terrain_type"], str):
+        raise ValueError(f"Preset '{name}': 'terrain_type' must be a string.")
+    for section in SECTION_KEYS:
+        factors = values.get(section, {})
+        if not isinstance(factors, dict) or not all(_is_number(value) for value in factors.values()):
+            raise ValueError(f"Preset '{name}': '{section}' must map names to numbers.")
+    seasonal_effects = values.get("seasonal_effects", {})
+    if not isinstance(seasonal_effects, dict):
+        raise ValueError(f"Preset '{name}': 'seasonal_effects' must map seasons to effects.")
+    for season, effects in seasonal_effects.items():
+        if not isinstance(effects, dict) or not all(_is_number(value) for value in effects.values()):
+            raise ValueError(f"Preset '{name}': seasonal effects of '{season}' must map names to numbers.")
+
+
+class PresetRegistry:
+    """
+    The parsed and validated contents of a preset file.
+
+    The file is read once; Config objects copy their values from the registry and FrozenConfig
+    objects share them, so creating configs never touches the disk again.
+    """
+
+    def __init__(self, config_file="config_presets.json"):
+        """
+        :param config_file: Path of the preset file.
+        :raises FileNotFoundError: If the file does not exist.
+        :raises ValueError: If a preset is malformed.
+        """
+        self.config_file = config_file
+        with open(config_file, "r") as file:
+            presets = json.load(file)
+        if not isinstance(presets, dict):
+            raise ValueError(f"Configuration file '{config_file}' must hold an object of presets.")
+        for name, values in presets.items():
+            validate_preset(name, values)
+        self._presets = presets
+        self._frozen_values = {name: _freeze(values) for name, values in presets.items()}
+        self._configs = {}
+
+    def __contains__(self, preset):
+        return preset in self._presets
+
+    def names(self):
+        """
+        Get the names of every preset, in file order.
+        """
+        return list(self._presets)
+
+    def values(self, preset):
+        """
+        Get a private, mutable copy of a preset's values.
+        """
+        return copy.deepcopy(self._presets[preset])
+
+    def frozen_values(self, preset):
+        """
+        Get the shared, read-only values of a preset.
+        """
+        return self._frozen_values[preset]
+
+    def get(self, preset):
+        """
+        Get the shared read-only config of a preset.
+        :param preset: Name of the preset.
+        :return: A FrozenConfig (the same object on every call).
+        """
+        if preset not in self._configs:
+            self._configs[preset] = FrozenConfig(preset, self.config_file)
+        return self._configs[preset]
+
+
+def preset_registry(config_file="config_presets.json"):
+    """
+    Get the registry of a preset file, parsing it only the first time or after it changed on disk.
+    :param config_file: Path of the preset file.
+    :return: A PresetRegistry.
+    :raises FileNotFoundError: If the file does not exist.
+    """
+    path = os.path.abspath(config_file)
+    modified = os.stat(path).st_mtime_ns
+    cached = _registries.get(path)
+    if cached is None or cached[0] != modified:
+        cached = (modified, PresetRegistry(config_file))
+        _registries[path] = cached
+    return cached[1]
+
+
+def frozen_config(preset="default", config_file="config_presets.json"):
+    """
+    Get the shared read-only config of a preset. Falls back to the defaults like Config does when
+    the preset file is missing.
+    :param preset: Name of the preset.
+    :param config_file: Path of the preset file.
+    :return: A FrozenConfig.
+    """
+    try:
+        return preset_registry(config_file).get(preset)
+    except FileNotFoundError:
+        return FrozenConfig(preset, config_file)
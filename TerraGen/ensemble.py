@@ -0,0 +1,256 @@
+import argparse
+import contextlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from config import Config, preset_registry
+from history import BinaryHistoryWriter, HistoryWriter, NullHistoryWriter
+from reducers import default_reducers, merge_states, write_tables
+from terrain import TERRAIN_TYPES
+
+
+# Scalar statistics reported for every ensemble member and aggregated per preset.
+SUMMARY_STATISTICS = ("mean_height", "mean_water_level", "mean_vegetation", "mean_temperature", "event_days")
+
+
+class EventCountingWriter(HistoryWriter):
+    """
+    Counts the events of a run and forwards every frame to another history writer.
+    """
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.event_counts = {}
+        self.event_days = 0
+
+    def open(self, grid):
+        self.inner.open(grid)
+
+    def write_frame(self, day, weather, event_type, grid):
+        if event_type:
+            self.event_days += 1
+        if isinstance(event_type, list):
+            for event in event_type:
+                self.event_counts[event["type"]] = self.event_counts.get(event["type"], 0) + 1
+        elif event_type:
+            self.event_counts[event_type] = self.event_counts.get(event_type, 0) + 1
+        self.inner.write_frame(day, weather, event_type, grid)
+
+    def close(self):
+        self.inner.close()
+
+
+def load_preset_names(config_file="config_presets.json"):
+    """
+    Get the names of every preset in the configuration file.
+    :param config_file: Path of the preset file.
+    :return: List of preset names.
+    """
+    return preset_registry(config_file).names()
+
+
+def summarize_grid(grid):
+    """
+    Reduce a grid to a small dictionary of summary statistics.
+    :param grid: The HexGrid to summarize.
+    :return: A JSON-serializable dictionary.
+    """
+    counts = np.bincount(grid.terrain_code, minlength=len(TERRAIN_TYPES))
+    return {
+        "cells": len(grid),
+        "terrain_counts": {name: int(count) for name, count in zip(TERRAIN_TYPES, counts)},
+        "mean_height": float(grid.height.mean()),
+        "mean_water_level": float(grid.water_level.mean()),
+        "mean_vegetation": float(grid.vegetation.mean()),
+        "mean_temperature": float(grid.temperature.mean()),
+    }
+
+
+def member_seeds(base_seed, count):
+    """
+    Derive independent, reproducible seeds for ensemble members from one base seed.
+    The spawned SeedSequences are passed to the members as they are, so the streams of different
+    members are independent and cannot collide however large the sweep.
+    :param base_seed: Seed of the whole ensemble.
+    :param count: Number of members.
+    :return: List of np.random.SeedSequence.
+    """
+    return np.random.SeedSequence(base_seed).spawn(count)
+
+
+def seed_record(seed):
+    """
+    Describe a member seed in the results, in the form checkpoints use.
+    :param seed: An int or np.random.SeedSequence.
+    :return: The int, or a dictionary with the entropy and spawn key of the SeedSequence
+             (rebuild it with np.random.SeedSequence(entropy, spawn_key=tuple(spawn_key))).
+    """
+    if isinstance(seed, np.random.SeedSequence):
+        return {"entropy": seed.entropy, "spawn_key": list(seed.spawn_key)}
+    return seed
+
+
+def run_member(preset, seed, days, backend=None, history_dir=None, member=0, statistics_every=None):
+    """
+    Run one ensemble member in the current process and summarize it.
+    Only the summary is returned, so no grid arrays travel back to the parent process.
+    :param preset: Configuration preset of the run.
+    :param seed: Seed of the run (int or np.random.SeedSequence, see member_seeds).
+    :param days: Number of days to simulate.
+    :param backend: Kernel backend (see kernels.BACKENDS).
+    :param history_dir: Optional directory under which the run streams its binary history.
+    :param member: Index of the member in the ensemble.
+    :param statistics_every: If given, record the default streaming statistics (see reducers.py)
+                             every N days and return their mergeable states under "statistics".
+    :return: A dictionary with the run parameters and its summary statistics.
+    """
+    from simulation import Simulation
+
+    if history_dir is not None:
+        history_path = os.path.join(history_dir, f"{preset}_{member:05d}")
+        inner = BinaryHistoryWriter(history_path, dtype=np.float32)
+    else:
+        history_path = None
+        inner = NullHistoryWriter()
+    history = EventCountingWriter(inner)
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        simulation = Simulation(config_preset=preset, backend=backend, history=history, seed=seed)
+        if statistics_every is not None:
+            for reducer in default_reducers(statistics_every):
+                simulation.add_reducer(reducer)
+        simulation.initialize_simulation()
+        simulation.run_simulation(days=days, visualize=False)
+        history.close()
+
+    result = {"member": member, "preset": preset, "seed": seed_record(seed), "days": days, "history": history_path}
+    result.update(summarize_grid(simulation.terrain.grid))
+    result["event_counts"] = history.event_counts
+    result["event_days"] = history.event_days
+    if statistics_every is not None:
+        result["statistics"] = simulation.reducer_states()
+    return result
+
+
+def aggregate(results):
+    """
+    Combine member summaries into per-preset statistics.
+    :param results: List of dictionaries returned by run_member.
+    :return: Dictionary of preset name to mean/std/min/max of every summary statistic.
+    """
+    by_preset = {}
+    for result in results:
+        by_preset.setdefault(result["preset"], []).append(result)
+
+    summary = {}
+    for preset, members in by_preset.items():
+        stats = {"members": len(members)}
+        for name in SUMMARY_STATISTICS:
+            values = np.array([member[name] for member in members], dtype=float)
+            stats[name] = {
+                "mean": float(values.mean()),
+                "std": float(values.std()),
+                "min": float(values.min()),
+                "max": float(values.max()),
+            }
+        stats["terrain_fractions"] = {
+            name: float(np.mean([member["terrain_counts"][name] / member["cells"] for member in members]))
+            for name in TERRAIN_TYPES
+        }
+        summary[preset] = stats
+    return summary
+
+
+def aggregate_statistics(results):
+    """
+    Merge the streaming statistics of the members of every preset.
+    :param results: List of dictionaries returned by run_member with statistics_every set.
+    :return: Dictionary of preset name to its list of merged reducers.
+    """
+    by_preset = {}
+    for result in results:
+        if "statistics" in result:
+            by_preset.setdefault(result["preset"], []).append(result["statistics"])
+    return {preset: merge_states(states) for preset, states in by_preset.items()}
+
+
+def run_ensemble(presets, runs=1, days=100, workers=None, base_seed=0, backend=None, history_dir=None, progress=None, statistics_every=None):
+    """
+    Run every preset ``runs`` times with independent seeds, fanned out across a process pool.
+    :param presets: List of preset names.
+    :param runs: Number of members (seeds) per preset.
+    :param days: Number of days each member simulates.
+    :param workers: Number of worker processes (default: one per CPU core).
+    :param base_seed: Seed from which every member seed is derived.
+    :param backend: Kernel backend (see kernels.BACKENDS).
+    :param history_dir: Optional directory under which each member streams its binary history.
+    :param progress: Optional callback called with each member result as it completes.
+    :param statistics_every: If given, every member records the default streaming statistics every N days.
+    :return: List of member results, ordered by member index.
+    """
+    seeds = member_seeds(base_seed, len(presets) * runs)
+    members = [(preset, seeds[index], index) for index, preset in enumerate(preset for preset in presets for _ in range(runs))]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(run_member, preset, seed, days, backend, history_dir, index, statistics_every)
+            for preset, seed, index in members
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if progress is not None:
+                progress(result)
+
+    return sorted(results, key=lambda result: result["member"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an ensemble of TerraGen simulations in parallel.")
+    parser.add_argument("--presets", nargs="+", default=["default"], help="Preset names, or 'all' for every preset.")
+    parser.add_argument("--runs", type=int, default=8, help="Number of seeds per preset.")
+    parser.add_argument("--days", type=int, default=100, help="Days simulated by each run.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument("--seed", type=int, default=0, help="Base seed of the ensemble.")
+    parser.add_argument("--backend", default=None, help="Kernel backend for the daily updates.")
+    parser.add_argument("--history-dir", default=None, help="Stream each run's history into this directory.")
+    parser.add_argument("--output", default=None, help="Write member results and the aggregate to this JSON file.")
+    parser.add_argument("--statistics-dir", default=None, help="Record streaming statistics and write the merged tables of each preset here.")
+    parser.add_argument("--statistics-every", type=int, default=1, help="Days between recorded statistics.")
+    args = parser.parse_args()
+
+    presets = load_preset_names(Config().config_file) if args.presets == ["all"] else args.presets
+    results = run_ensemble(
+        presets,
+        runs=args.runs,
+        days=args.days,
+        workers=args.workers,
+        base_seed=args.seed,
+        backend=args.backend,
+        history_dir=args.history_dir,
+        statistics_every=args.statistics_every if args.statistics_dir else None,
+        progress=lambda result: print(f"Finished {result['preset']} run {result['member']}."),
+    )
+    summary = aggregate(results)
+
+    for preset, stats in summary.items():
+        print(f"{preset}: {stats['members']} runs, mean vegetation {stats['mean_vegetation']['mean']:.3f} "
+              f"+/- {stats['mean_vegetation']['std']:.3f}, mean water {stats['mean_water_level']['mean']:.3f}")
+
+    if args.statistics_dir:
+        for preset, reducers in aggregate_statistics(results).items():
+            write_tables(reducers, os.path.join(args.statistics_dir, preset))
+        print(f"Merged statistics saved to {args.statistics_dir}.")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"members": results, "aggregate": summary}, f, indent=4)
+        print(f"Ensemble results saved to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
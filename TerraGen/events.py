@@ -1,13 +1,58 @@
-from terrain import Cell
+from terrain import Cell, CellView, HexGrid
 import numpy as np
 
+
+# Event types that affect a disk around their epicenter; wildfires spread through vegetation instead.
+DISK_EVENTS = ("earthquake", "flood", "rapid_growth")
+
+
+class Event:
+    """
+    A localized event: an epicenter, a radius and the cells it affects.
+    """
+
+    def __init__(self, event_type, q, r, radius, cells=None):
+        """
+        :param event_type: The type of event.
+        :param q: Axial q coordinate of the epicenter.
+        :param r: Axial r coordinate of the epicenter.
+        :param radius: Reach of the event in hexes.
+        :param cells: Sorted array of the affected cell indices (set by EventManager.footprint).
+        """
+        self.event_type = event_type
+        self.q = q
+        self.r = r
+        self.radius = radius
+        self.cells = cells
+
+    def to_record(self):
+        """
+        Convert the event to a JSON-serializable dictionary for the simulation history.
+        """
+        return {
+            "type": self.event_type,
+            "q": self.q,
+            "r": self.r,
+            "radius": self.radius,
+            "cells": 0 if self.cells is None else int(len(self.cells)),
+        }
+
+
 class EventManager:
-    def __init__(self, config):
+    def __init__(self, config, kernels=None, rng=None):
         """
         Initialize the EventManager.
         :param config: A dictionary containing event-related parameters.
+        :param kernels: Optional whole-grid kernels (see kernels.get_kernels) used for HexGrid grids.
+        :param rng: numpy.random.Generator used for every random draw (default: a freshly seeded one).
         """
         self.config = config
+        self.kernels = kernels
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.mode = config.get("event_mode", "global")
+        self.radius_range = config.get("event_radius", [2, 8])
+        self.max_events_per_day = config.get("max_events_per_day", 3)
+        self._visited = None
 
     def trigger_event(self):
             """
@@ -20,55 +65,146 @@ class EventManager:
             # Ensure probabilities sum to 1
             probabilities = np.array(probabilities) / np.sum(probabilities)
     
-            return np.random.choice(event_types, p=probabilities)
+            return self.rng.choice(event_types, p=probabilities)
 
-    def apply_event(self, event_type, grid):
+    def trigger_events(self, grid):
+        """
+        Trigger the localized events of a day. Each of the max_events_per_day slots triggers an event
+        with the probabilities of trigger_event, at a random epicenter with a random radius.
+        :param grid: The HexGrid the events happen on.
+        :return: List of Event objects with their footprints computed.
+        """
+        events = self.draw_events(len(grid), lambda index: (int(grid.q[index]), int(grid.r[index])))
+        for event in events:
+            event.cells = self.footprint(event, grid)
+        return events
+
+    def draw_events(self, size, coordinates):
+        """
+        Draw the type, epicenter and radius of the day's localized events, without their footprints.
+        :param size: Number of cells in the world.
+        :param coordinates: Function mapping a dense cell index to its (q, r) coordinates.
+        :return: List of Event objects.
+        """
+        events = []
+        for _ in range(self.max_events_per_day):
+            event_type = self.trigger_event()
+            if not event_type:
+                continue
+            center = int(self.rng.integers(size))
+            radius = int(self.rng.integers(self.radius_range[0], self.radius_range[1] + 1))
+            events.append(Event(str(event_type), *coordinates(center), radius))
+        return events
+
+    def footprint(self, event, grid):
+        """
+        Find the cells affected by a localized event.
+        Earthquakes, floods and rapid growth affect the disk around the epicenter. A wildfire spreads
+        from the epicenter as a frontier through neighboring cells with vegetation above 0.2, for at
+        most ``radius`` steps; it does not ignite at all if the epicenter has nothing to burn.
+        :param event: The Event.
+        :param grid: The HexGrid.
+        :return: Sorted array of cell indices.
+        """
+        if event.event_type in DISK_EVENTS:
+            return grid.disk(event.q, event.r, event.radius)
+
+        center = grid.index(event.q, event.r)
+        if center < 0 or grid.vegetation[center] <= 0.2:
+            return np.empty(0, dtype=np.intp)
+
+        # The visited buffer is reused between fires and only reset where a fire has been
+        if self._visited is None or len(self._visited) != len(grid) + 1:
+            self._visited = np.zeros(len(grid) + 1, dtype=bool)
+            self._visited[len(grid)] = True  # Off-grid sentinel of the neighbor table
+        visited = self._visited
+        neighbor_index = grid.neighbor_index
+
+        frontier = np.array([center], dtype=np.intp)
+        burned = [frontier]
+        visited[center] = True
+        for _ in range(event.radius):
+            candidates = np.unique(neighbor_index[frontier].ravel())
+            candidates = candidates[~visited[candidates]]
+            frontier = candidates[grid.vegetation[candidates] > 0.2]
+            if len(frontier) == 0:
+                break
+            visited[frontier] = True
+            burned.append(frontier)
+
+        cells = np.sort(np.concatenate(burned))
+        visited[cells] = False
+        return cells
+
+    def apply_event(self, event_type, grid, cells=None):
         """
         Apply the effects of an event to the terrain grid.
         :param event_type: The type of event to apply.
         :param grid: The terrain grid (dictionary of Cell objects).
+        :param cells: Optional sorted array of cell indices (HexGrid only) to limit the event to its footprint.
         """
         if event_type == "earthquake":
-            self.simulate_earthquake(grid)
+            self.simulate_earthquake(grid, cells)
         elif event_type == "flood":
-            self.simulate_flood(grid)
+            self.simulate_flood(grid, cells)
         elif event_type == "wildfire":
-            self.simulate_wildfire(grid)
+            self.simulate_wildfire(grid, cells)
         elif event_type == "rapid_growth":
-            self.simulate_rapid_growth(grid)
+            self.simulate_rapid_growth(grid, cells)
 
-    def simulate_earthquake(self, grid):
+    def _affected_cells(self, grid, cells):
+        if cells is None:
+            return grid.values()
+        return (CellView(grid, index) for index in cells)
+
+    def simulate_earthquake(self, grid, cells=None):
         """
         Simulate an earthquake by randomizing elevation changes.
         """
-        for cell in grid.values():
+        if self.kernels is not None and isinstance(grid, HexGrid):
+            self.kernels.simulate_earthquake(grid, self.rng, cells)
+            return
+
+        for cell in self._affected_cells(grid, cells):
             if isinstance(cell, Cell):
-                cell.height -= np.random.uniform(0, 0.05)  # Decrease height slightly
+                cell.height -= self.rng.uniform(0, 0.05)  # Decrease height slightly
                 cell.height = max(0.0, cell.height)
 
-    def simulate_flood(self, grid):
+    def simulate_flood(self, grid, cells=None):
         """
         Simulate a flood by increasing water levels.
         """
-        for cell in grid.values():
+        if self.kernels is not None and isinstance(grid, HexGrid):
+            self.kernels.simulate_flood(grid, self.rng, cells)
+            return
+
+        for cell in self._affected_cells(grid, cells):
             if isinstance(cell, Cell):
-                cell.water_level += np.random.uniform(0.1, 0.3)
+                cell.water_level += self.rng.uniform(0.1, 0.3)
                 cell.water_level = min(1.0, cell.water_level)  # Cap at max water level
 
-    def simulate_wildfire(self, grid):
+    def simulate_wildfire(self, grid, cells=None):
         """
         Simulate a wildfire by reducing vegetation in affected areas.
         """
-        for cell in grid.values():
+        if self.kernels is not None and isinstance(grid, HexGrid):
+            self.kernels.simulate_wildfire(grid, self.rng, cells)
+            return
+
+        for cell in self._affected_cells(grid, cells):
             if isinstance(cell, Cell) and cell.vegetation > 0.2:
-                cell.vegetation -= np.random.uniform(0.1, 0.3)
+                cell.vegetation -= self.rng.uniform(0.1, 0.3)
                 cell.vegetation = max(0.0, cell.vegetation)
 
-    def simulate_rapid_growth(self, grid):
+    def simulate_rapid_growth(self, grid, cells=None):
         """
         Simulate rapid vegetation growth.
         """
-        for cell in grid.values():
+        if self.kernels is not None and isinstance(grid, HexGrid):
+            self.kernels.simulate_rapid_growth(grid, self.rng, cells)
+            return
+
+        for cell in self._affected_cells(grid, cells):
             if isinstance(cell, Cell) and cell.water_level > 0.3 and cell.terrain_type != "desert":
-                cell.vegetation += np.random.uniform(0.2, 0.5)
+                cell.vegetation += self.rng.uniform(0.2, 0.5)
                 cell.vegetation = min(1.0, cell.vegetation)
@@ -0,0 +1,239 @@
+import argparse
+import os
+
+import numpy as np
+
+from history import open_history
+
+
+SQRT3 = np.sqrt(3)
+
+# Colormaps of the scalar fields; terrain codes are colored through the terrain lookup table.
+FIELD_COLORMAPS = {"height": "gray", "water_level": "Blues", "vegetation": "Greens", "temperature": "coolwarm"}
+
+
+def hex_vertices(q, r, size=1.0):
+    """
+    Compute the corners of flat-topped hexes at axial coordinates, in the cartesian layout of
+    Visualization.hex_to_cartesian. With size=1.0 neighboring hexes share their edges.
+    :param q: Array of axial q coordinates.
+    :param r: Array of axial r coordinates.
+    :param size: Distance from a hex center to its corners.
+    :return: Array of shape (N, 6, 2).
+    """
+    x = 3 / 2 * np.asarray(q, dtype=np.float64)
+    y = SQRT3 * (np.asarray(r, dtype=np.float64) + np.asarray(q, dtype=np.float64) / 2)
+    angles = np.radians(np.arange(6) * 60.0)
+    corners = size * np.column_stack((np.cos(angles), np.sin(angles)))
+    return np.stack((x, y), axis=-1)[:, None, :] + corners[None, :, :]
+
+
+def terrain_rgba_table():
+    """
+    Build the lookup table from terrain codes to RGBA colors.
+    :return: Array of shape (len(TERRAIN_TYPES), 4).
+    """
+    from visualization import terrain_rgb_table
+
+    rgb = terrain_rgb_table()
+    return np.column_stack((rgb, np.ones(len(rgb))))
+
+
+class HexRenderer:
+    """
+    Draws a whole hexagonal grid as one matplotlib PolyCollection.
+
+    The hex corners are computed once for the grid topology. Showing another day, or another
+    field, only replaces the collection's face colors: terrain codes go through a lookup table and
+    scalar fields through a colormap, so no artist is created or destroyed between frames.
+    """
+
+    def __init__(self, q, r, size=1.0, edgecolor=None):
+        """
+        :param q: Array of axial q coordinates of the cells, in grid order.
+        :param r: Array of axial r coordinates of the cells, in grid order.
+        :param size: Distance from a hex center to its corners.
+        :param edgecolor: Optional outline color (None draws no outlines, which is much faster).
+        """
+        self.vertices = hex_vertices(q, r, size)
+        self.edgecolor = edgecolor
+        self.lut = terrain_rgba_table()
+        self.collection = None
+
+    @classmethod
+    def for_grid(cls, grid, **options):
+        """
+        Create a renderer for the topology of a HexGrid.
+        """
+        return cls(grid.q, grid.r, **options)
+
+    def draw(self, ax, values=None, field="terrain_code"):
+        """
+        Add the collection to an axes and fit the view to the grid.
+        :param ax: Matplotlib axes.
+        :param values: Optional per-cell values (terrain codes or a scalar field) to show first.
+        :param field: Field the values belong to (see FIELD_COLORMAPS).
+        :return: The PolyCollection.
+        """
+        from matplotlib.collections import PolyCollection
+
+        self.collection = PolyCollection(
+            self.vertices,
+            edgecolors=self.edgecolor if self.edgecolor is not None else "face",
+            linewidths=0.2 if self.edgecolor is not None else 0.0,
+            antialiaseds=self.edgecolor is not None,
+        )
+        ax.add_collection(self.collection)
+        low = self.vertices.reshape(-1, 2).min(axis=0)
+        high = self.vertices.reshape(-1, 2).max(axis=0)
+        ax.set_xlim(low[0], high[0])
+        ax.set_ylim(low[1], high[1])
+        ax.set_aspect("equal")
+        if values is not None:
+            self.update(values, field)
+        return self.collection
+
+    def colors(self, values, field="terrain_code"):
+        """
+        Map per-cell values to RGBA colors.
+        :param values: Terrain codes, or scalar values in [0, 1] (temperature in [-30, 50]).
+        :param field: Field the values belong to.
+        :return: Array of shape (N, 4).
+        """
+        if field == "terrain_code":
+            return self.lut[np.asarray(values, dtype=np.intp)]
+        from matplotlib import colormaps
+
+        values = np.asarray(values, dtype=np.float64)
+        if field == "temperature":
+            values = (values + 30.0) / 80.0
+        return colormaps[FIELD_COLORMAPS.get(field, "viridis")](values)
+
+    def update(self, values, field="terrain_code"):
+        """
+        Show new per-cell values by replacing the face colors of the collection.
+        :param values: Terrain codes or scalar values, in grid order.
+        :param field: Field the values belong to.
+        """
+        self.collection.set_facecolor(self.colors(values, field))
+
+
+def export_animation(history, path, field="terrain_code", fps=10, start=0, stop=None, every=1, dpi=100, size=8.0):
+    """
+    Render a saved history into an animated GIF or MP4, or a directory of PNG frames.
+    The figure and the hex collection are built once; each frame only updates the face colors.
+    :param history: History directory (see history.open_history) or an open reader.
+    :param path: Output path: ``*.gif`` (Pillow), ``*.mp4`` (needs ffmpeg), or a directory for PNG frames.
+    :param field: Field to show ("terrain_code", "height", "water_level", "vegetation" or "temperature").
+    :param fps: Frames per second of the animation.
+    :param start: First day (position in the history).
+    :param stop: Day after the last one (default: the end of the history).
+    :param every: Render every N-th day only.
+    :param dpi: Resolution of the frames.
+    :param size: Figure width and height in inches.
+    :return: Number of rendered frames.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    reader = open_history(history) if isinstance(history, (str, os.PathLike)) else history
+    positions = range(start, len(reader) if stop is None else min(stop, len(reader)), every)
+
+    figure = Figure(figsize=(size, size), dpi=dpi)
+    FigureCanvasAgg(figure)
+    ax = figure.add_axes((0.0, 0.0, 1.0, 0.94))
+    ax.axis("off")
+    renderer = HexRenderer(reader.q, reader.r)
+    renderer.draw(ax)
+    title = figure.suptitle("")
+
+    extension = os.path.splitext(str(path))[1].lower()
+    if extension == ".gif":
+        palette = _gif_palette(renderer, field)
+        frames = (_gif_frame(figure, palette) for _ in _show_days(renderer, title, reader, positions, field))
+        first = next(frames, None)
+        if first is not None:
+            first.save(path, save_all=True, append_images=frames, duration=max(1, round(1000 / fps)), loop=0)
+    elif extension == ".mp4":
+        from matplotlib import animation
+
+        writer = animation.FFMpegWriter(fps=fps)
+        with writer.saving(figure, path, dpi):
+            for position in positions:
+                _show_day(renderer, title, reader, position, field)
+                writer.grab_frame()
+    else:
+        os.makedirs(path, exist_ok=True)
+        for position in positions:
+            _show_day(renderer, title, reader, position, field)
+            figure.savefig(os.path.join(path, f"day_{position + 1:05d}.png"))
+    return len(positions)
+
+
+def _show_days(renderer, title, reader, positions, field):
+    for position in positions:
+        _show_day(renderer, title, reader, position, field)
+        yield position
+
+
+def _gif_palette(renderer, field):
+    """
+    Build a fixed GIF palette holding the colors a frame can contain: the terrain lookup table or
+    samples of the field's colormap, plus a gray ramp for the background and the title.
+    """
+    from PIL import Image
+
+    if field == "terrain_code":
+        colors = renderer.lut[:, :3]
+    else:
+        colors = renderer.colors(np.linspace(0.0, 1.0, 192) if field != "temperature" else np.linspace(-30.0, 50.0, 192), field)[:, :3]
+    grays = np.repeat(np.linspace(0.0, 1.0, 256 - len(colors))[:, None], 3, axis=1)
+    table = np.rint(np.concatenate((colors, grays)) * 255).astype(np.uint8)
+    palette = Image.new("P", (1, 1))
+    palette.putpalette(table.ravel().tolist())
+    return palette
+
+
+def _gif_frame(figure, palette):
+    """
+    Draw the figure and map its pixels to the nearest colors of the fixed palette. Quantizing to a
+    known palette is much faster than computing an adaptive palette for every frame.
+    """
+    from PIL import Image
+
+    figure.canvas.draw()
+    image = Image.fromarray(np.asarray(figure.canvas.buffer_rgba())[:, :, :3])
+    return image.quantize(palette=palette, dither=Image.Dither.NONE)
+
+
+def _show_day(renderer, title, reader, position, field):
+    if hasattr(reader, "field"):
+        values = reader.field(field)[position]
+    else:
+        values = reader.frame(position)[field]
+    renderer.update(values, field)
+    record = reader.days[position] if position < len(reader.days) else {}
+    event_type = record.get("event")
+    if isinstance(event_type, list):
+        event_type = ", ".join(event["type"] for event in event_type)
+    title.set_text(f"Day {record.get('day', position) + 1}" + (f" - Event: {event_type}" if event_type else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a saved TerraGen history into an animation.")
+    parser.add_argument("history", help="History directory written by the binary or keyframe history writer.")
+    parser.add_argument("output", help="Output .gif or .mp4 file, or a directory for PNG frames.")
+    parser.add_argument("--field", default="terrain_code", choices=("terrain_code",) + tuple(FIELD_COLORMAPS), help="Field to show.")
+    parser.add_argument("--fps", type=int, default=10, help="Frames per second.")
+    parser.add_argument("--start", type=int, default=0, help="First day.")
+    parser.add_argument("--stop", type=int, default=None, help="Day after the last one.")
+    parser.add_argument("--every", type=int, default=1, help="Render every N-th day.")
+    parser.add_argument("--dpi", type=int, default=100, help="Resolution of the frames.")
+    args = parser.parse_args()
+
+    frames = export_animation(args.history, args.output, args.field, args.fps, args.start, args.stop, args.every, args.dpi)
+    print(f"Rendered {frames} frames to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,712 @@
+import json
+import os
+
+import numpy as np
+
+from terrain import HexGrid, TERRAIN_TYPES
+
+
+# Per-cell arrays recorded for every day, in file order.
+FRAME_FIELDS = HexGrid.FIELDS + ("terrain_code",)
+
+
+def weather_record(weather):
+    """
+    Convert a weather dictionary into plain JSON-serializable Python values.
+    :param weather: Weather dictionary produced by WeatherSystem.generate_weather.
+    :return: A dictionary of floats and bools.
+    """
+    record = {}
+    for key, value in weather.items():
+        if isinstance(value, (bool, np.bool_)):
+            record[key] = bool(value)
+        elif isinstance(value, (np.floating, np.integer)):
+            record[key] = float(value)
+        else:
+            record[key] = value
+    return record
+
+
+def grid_header(grid, format_name):
+    """
+    Build the header describing the grid layout of a history file.
+    :param grid: The HexGrid being recorded.
+    :param format_name: Name of the history format.
+    :return: A JSON-serializable dictionary.
+    """
+    return {
+        "format": format_name,
+        "version": 1,
+        "radius": grid.radius,
+        "cells": len(grid),
+        "terrain_types": list(TERRAIN_TYPES),
+    }
+
+
+def reopen_truncated(path, offset, binary=False):
+    """
+    Reopen a history file for appending after discarding everything past an offset.
+    :param path: Path of the file.
+    :param offset: Byte offset to truncate the file at, as previously reported by tell().
+    :param binary: Whether to open the file in binary mode.
+    :return: The open file, positioned at the offset.
+    """
+    file = open(path, "r+b" if binary else "r+")
+    file.truncate(offset)
+    file.seek(offset)
+    return file
+
+
+class HistoryWriter:
+    """
+    Base class for simulation history sinks. Simulation calls open() once the terrain exists,
+    write_frame() once per simulated day and close() when the history is exported.
+    """
+
+    def open(self, grid):
+        """
+        Prepare the sink for recording the given grid.
+        :param grid: The HexGrid that will be recorded.
+        """
+
+    def write_frame(self, day, weather, event_type, grid):
+        """
+        Record the state of one simulated day.
+        :param day: The simulation day.
+        :param weather: Weather conditions of the day.
+        :param event_type: The event type triggered on this day (if any).
+        :param grid: The HexGrid after the day's updates.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Flush and release any resources held by the sink.
+        """
+
+    def state(self):
+        """
+        Get the position of the sink, stored in checkpoints so a resumed run continues the same history.
+        :return: A JSON-serializable dictionary.
+        """
+        return {}
+
+    def resume(self, grid, state):
+        """
+        Reopen the sink for a run resumed from a checkpoint, discarding any frames written after it.
+        :param grid: The restored HexGrid.
+        :param state: Dictionary previously returned by state().
+        """
+        self.open(grid)
+
+
+class NullHistoryWriter(HistoryWriter):
+    """
+    Discards every frame. Useful for runs where only the final state or summaries matter.
+    """
+
+    def write_frame(self, day, weather, event_type, grid):
+        pass
+
+
+class MemoryHistoryWriter(HistoryWriter):
+    """
+    Keeps every day as a dictionary in memory, in the format Simulation.simulation_history has
+    always used. Memory grows with days x cells, so this is only suitable for short runs.
+    """
+
+    def __init__(self):
+        self.frames = []
+        self._keys = None
+
+    def open(self, grid):
+        self._keys = [f"({q},{r})" for q, r in grid]
+
+    def state(self):
+        return {"frames": len(self.frames)}
+
+    def resume(self, grid, state):
+        del self.frames[state.get("frames", 0):]
+        self.open(grid)
+
+    def write_frame(self, day, weather, event_type, grid):
+        if self._keys is None:
+            self.open(grid)
+        terrain_types = [TERRAIN_TYPES[code] for code in grid.terrain_code.tolist()]
+        cells = zip(
+            self._keys,
+            grid.height.tolist(),
+            grid.water_level.tolist(),
+            terrain_types,
+            grid.vegetation.tolist(),
+            grid.temperature.tolist(),
+        )
+        self.frames.append({
+            "day": day,
+            "weather": weather_record(weather),
+            "event": event_type,
+            "terrain": {
+                key: {
+                    "height": height,
+                    "water_level": water_level,
+                    "terrain_type": terrain_type,
+                    "vegetation": vegetation,
+                    "temperature": temperature,
+                }
+                for key, height, water_level, terrain_type, vegetation, temperature in cells
+            },
+        })
+
+
+class JsonLinesHistoryWriter(HistoryWriter):
+    """
+    Streams the history to a newline-delimited JSON file. The first line is a header holding the
+    grid coordinates; every following line is one day with a list of values per field, in the
+    same cell order as the header coordinates.
+    """
+    FORMAT = "terragen-history-jsonl"
+
+    def __init__(self, path):
+        """
+        :param path: Path of the .jsonl file to write.
+        """
+        self.path = path
+        self._file = None
+
+    def open(self, grid):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "w")
+        header = grid_header(grid, self.FORMAT)
+        header["q"] = grid.q.tolist()
+        header["r"] = grid.r.tolist()
+        self._file.write(json.dumps(header) + "\n")
+        self._file.flush()
+
+    def write_frame(self, day, weather, event_type, grid):
+        if self._file is None:
+            self.open(grid)
+        frame = {"day": day, "weather": weather_record(weather), "event": event_type}
+        for name in FRAME_FIELDS:
+            frame[name] = getattr(grid, name).tolist()
+        self._file.write(json.dumps(frame) + "\n")
+        self._file.flush()
+
+    def state(self):
+        return {"offset": self._file.tell() if self._file is not None else 0}
+
+    def resume(self, grid, state):
+        if not state.get("offset") or not os.path.exists(self.path):
+            self.open(grid)
+            return
+        self._file = reopen_truncated(self.path, state["offset"])
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class BinaryHistoryWriter(HistoryWriter):
+    """
+    Streams the history to a directory of append-only columnar binary files:
+
+    - header.json: grid layout, field dtypes and terrain type names.
+    - coords.npy: the (2, N) array of axial q and r coordinates, written once.
+    - <field>.bin: one raw little-endian array of N values per day, appended in day order, so
+      each file can be memory-mapped as a (days, N) array.
+    - days.jsonl: one line of weather and event metadata per day.
+    """
+    FORMAT = "terragen-history"
+
+    def __init__(self, path, dtype=None):
+        """
+        :param path: Directory to write the history into.
+        :param dtype: Optional storage dtype for the float fields (e.g. np.float32 to halve the size).
+        """
+        self.path = path
+        self.dtype = dtype
+        self.frames_written = 0
+        self._files = None
+        self._dtypes = None
+        self._days_file = None
+
+    def open(self, grid):
+        os.makedirs(self.path, exist_ok=True)
+        self._dtypes = {
+            name: np.dtype(self.dtype or getattr(grid, name).dtype).newbyteorder("<")
+            for name in HexGrid.FIELDS
+        }
+        self._dtypes["terrain_code"] = np.dtype(np.int8)
+
+        header = grid_header(grid, self.FORMAT)
+        header["fields"] = {name: dtype.str for name, dtype in self._dtypes.items()}
+        with open(os.path.join(self.path, "header.json"), "w") as f:
+            json.dump(header, f, indent=4)
+        np.save(os.path.join(self.path, "coords.npy"), np.stack([grid.q, grid.r]))
+
+        self._files = {name: open(os.path.join(self.path, f"{name}.bin"), "wb") for name in FRAME_FIELDS}
+        self._days_file = open(os.path.join(self.path, "days.jsonl"), "w")
+        self.frames_written = 0
+
+    def write_frame(self, day, weather, event_type, grid):
+        if self._files is None:
+            self.open(grid)
+        for name, file in self._files.items():
+            getattr(grid, name).astype(self._dtypes[name], copy=False).tofile(file)
+            file.flush()
+        self._days_file.write(json.dumps({"day": day, "weather": weather_record(weather), "event": event_type}) + "\n")
+        self._days_file.flush()
+        self.frames_written += 1
+
+    def state(self):
+        return {
+            "frames_written": self.frames_written,
+            "days_offset": self._days_file.tell() if self._days_file is not None else 0,
+        }
+
+    def resume(self, grid, state):
+        if not state.get("frames_written") or not os.path.exists(os.path.join(self.path, "header.json")):
+            self.open(grid)
+            return
+        with open(os.path.join(self.path, "header.json")) as f:
+            header = json.load(f)
+        self._dtypes = {name: np.dtype(dtype) for name, dtype in header["fields"].items()}
+        self.frames_written = state["frames_written"]
+        self._files = {
+            name: reopen_truncated(
+                os.path.join(self.path, f"{name}.bin"), self.frames_written * len(grid) * self._dtypes[name].itemsize, binary=True
+            )
+            for name in FRAME_FIELDS
+        }
+        self._days_file = reopen_truncated(os.path.join(self.path, "days.jsonl"), state["days_offset"])
+
+    def close(self):
+        if self._files is not None:
+            for file in self._files.values():
+                file.close()
+            self._days_file.close()
+            self._files = None
+            self._days_file = None
+
+
+class KeyframeHistoryWriter(HistoryWriter):
+    """
+    Streams a compressed history: a full keyframe every ``keyframe_interval`` days and per-field
+    deltas against the previous day in between. The directory holds header.json, coords.npy,
+    days.jsonl (weather and events), frames.bin (the encoded records, appended in day order) and
+    index.jsonl (one line per day with the record offset and the encoding of each field).
+
+    Each field of a delta day is stored in whichever encoding is smallest:
+
+    - "sparse": the uint32 indices of the changed cells followed by their values.
+    - "dense": one value per cell.
+
+    Without quantization, delta values are the new cell values and reconstruction is exact
+    (up to the storage dtype). With ``quantization_step`` set, float fields store int16 multiples
+    of the step relative to the previously reconstructed value, so every reconstructed day is
+    within half a step of the true value and errors never accumulate. A field with a change too
+    large for int16 steps is stored with exact values for that day instead ("sparse_exact" or
+    "dense_exact"). Terrain codes are always stored exactly.
+    """
+    FORMAT = "terragen-history-keyframes"
+
+    def __init__(self, path, keyframe_interval=30, quantization_step=None, dtype=None):
+        """
+        :param path: Directory to write the history into.
+        :param keyframe_interval: Number of days between full keyframes.
+        :param quantization_step: Optional step for lossy float deltas (e.g. 1e-4).
+        :param dtype: Optional storage dtype for the float fields (e.g. np.float32).
+        """
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self.quantization_step = quantization_step
+        self.dtype = dtype
+        self.frames_written = 0
+        self._state = None
+        self._dtypes = None
+        self._frames_file = None
+        self._index_file = None
+        self._days_file = None
+
+    def open(self, grid):
+        os.makedirs(self.path, exist_ok=True)
+        self._dtypes = {
+            name: np.dtype(self.dtype or getattr(grid, name).dtype).newbyteorder("<")
+            for name in HexGrid.FIELDS
+        }
+        self._dtypes["terrain_code"] = np.dtype(np.int8)
+
+        header = grid_header(grid, self.FORMAT)
+        header["fields"] = {name: dtype.str for name, dtype in self._dtypes.items()}
+        header["keyframe_interval"] = self.keyframe_interval
+        header["quantization_step"] = self.quantization_step
+        with open(os.path.join(self.path, "header.json"), "w") as f:
+            json.dump(header, f, indent=4)
+        np.save(os.path.join(self.path, "coords.npy"), np.stack([grid.q, grid.r]))
+
+        self._frames_file = open(os.path.join(self.path, "frames.bin"), "wb")
+        self._index_file = open(os.path.join(self.path, "index.jsonl"), "w")
+        self._days_file = open(os.path.join(self.path, "days.jsonl"), "w")
+        self.frames_written = 0
+        self._state = None
+
+    def state(self):
+        if self._frames_file is None:
+            return {"frames_written": 0}
+        return {
+            "frames_written": self.frames_written,
+            "frames_offset": self._frames_file.tell(),
+            "index_offset": self._index_file.tell(),
+            "days_offset": self._days_file.tell(),
+        }
+
+    def resume(self, grid, state):
+        if not state.get("frames_written") or not os.path.exists(os.path.join(self.path, "header.json")):
+            self.open(grid)
+            return
+        with open(os.path.join(self.path, "header.json")) as f:
+            header = json.load(f)
+        self._dtypes = {name: np.dtype(dtype) for name, dtype in header["fields"].items()}
+        self.frames_written = state["frames_written"]
+        self._frames_file = reopen_truncated(os.path.join(self.path, "frames.bin"), state["frames_offset"], binary=True)
+        self._index_file = reopen_truncated(os.path.join(self.path, "index.jsonl"), state["index_offset"])
+        self._days_file = reopen_truncated(os.path.join(self.path, "days.jsonl"), state["days_offset"])
+
+        # Rebuild the delta baseline from the records that were kept
+        self._frames_file.flush()
+        self._index_file.flush()
+        self._days_file.flush()
+        self._state = KeyframeHistoryReader(self.path).frame(self.frames_written - 1)
+
+    def write_frame(self, day, weather, event_type, grid):
+        if self._frames_file is None:
+            self.open(grid)
+        keyframe = self._state is None or self.frames_written % self.keyframe_interval == 0
+        entry = {"day": day, "offset": self._frames_file.tell(), "keyframe": keyframe, "fields": {}}
+
+        if keyframe:
+            self._state = {}
+            for name in FRAME_FIELDS:
+                values = getattr(grid, name).astype(self._dtypes[name])
+                values.tofile(self._frames_file)
+                self._state[name] = values
+                entry["fields"][name] = ["dense", len(values)]
+        else:
+            for name in FRAME_FIELDS:
+                entry["fields"][name] = self._write_delta(name, getattr(grid, name))
+
+        self._frames_file.flush()
+        self._index_file.write(json.dumps(entry) + "\n")
+        self._index_file.flush()
+        self._days_file.write(json.dumps({"day": day, "weather": weather_record(weather), "event": event_type}) + "\n")
+        self._days_file.flush()
+        self.frames_written += 1
+
+    def _write_delta(self, name, values):
+        """
+        Encode one field against the reconstructed previous day and update the reconstruction.
+        :return: The [encoding, count] pair recorded in the index.
+        """
+        state = self._state[name]
+        quantized = self.quantization_step is not None and name != "terrain_code"
+
+        exact = False
+
+        if quantized:
+            steps = np.rint((values - state) / self.quantization_step)
+            limits = np.iinfo(np.int16)
+            if steps.min(initial=0) < limits.min or steps.max(initial=0) > limits.max:
+                # Clipping would break the half-step guarantee, so store this day's values exactly
+                quantized = False
+                exact = True
+            else:
+                steps = steps.astype("<i2")
+                changed = np.flatnonzero(steps)
+                value_size = steps.itemsize
+        if not quantized:
+            values = values.astype(state.dtype, copy=False)
+            changed = np.flatnonzero(values != state)
+            value_size = state.itemsize
+
+        if len(changed) * (4 + value_size) < len(state) * value_size:
+            encoding = "sparse"
+            changed.astype("<u4").tofile(self._frames_file)
+            (steps if quantized else values)[changed].tofile(self._frames_file)
+        else:
+            encoding = "dense"
+            (steps if quantized else values).tofile(self._frames_file)
+
+        if quantized:
+            state[changed] += steps[changed] * self.quantization_step
+        else:
+            state[changed] = values[changed]
+        count = len(changed) if encoding == "sparse" else len(state)
+        return [encoding + "_exact" if exact else encoding, count]
+
+    def close(self):
+        if self._frames_file is not None:
+            self._frames_file.close()
+            self._index_file.close()
+            self._days_file.close()
+            self._frames_file = None
+            self._index_file = None
+            self._days_file = None
+
+
+class KeyframeHistoryReader:
+    """
+    Random-access reader for histories written by KeyframeHistoryWriter. Any day is rebuilt by
+    seeking to the nearest keyframe at or before it and applying the deltas that follow. The last
+    rebuilt day is cached, so reading days in increasing order only decodes each record once.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: Directory written by KeyframeHistoryWriter.
+        """
+        self.path = path
+        with open(os.path.join(path, "header.json")) as f:
+            self.header = json.load(f)
+        self.dtypes = {name: np.dtype(dtype) for name, dtype in self.header["fields"].items()}
+        self.quantization_step = self.header["quantization_step"]
+        self.q, self.r = np.load(os.path.join(path, "coords.npy"))
+        with open(os.path.join(path, "index.jsonl")) as f:
+            self.index = [json.loads(line) for line in f if line.strip()]
+        with open(os.path.join(path, "days.jsonl")) as f:
+            self.days = [json.loads(line) for line in f if line.strip()]
+        self._cached_position = None
+        self._cached_state = None
+
+    def __len__(self):
+        return len(self.index)
+
+    def frame(self, position):
+        """
+        Rebuild the grid fields of one recorded day.
+        :param position: Position of the day in the history (0 for the first recorded day).
+        :return: A dictionary of field name to a freshly allocated array.
+        """
+        if not 0 <= position < len(self.index):
+            raise IndexError(f"Day {position} is outside the recorded history of {len(self.index)} days.")
+
+        start = position
+        while not self.index[start]["keyframe"]:
+            start -= 1
+
+        if self._cached_position is not None and start <= self._cached_position <= position:
+            state = self._cached_state
+            start = self._cached_position + 1
+        else:
+            state = None
+
+        with open(os.path.join(self.path, "frames.bin"), "rb") as f:
+            for current in range(start, position + 1):
+                state = self._apply_record(f, self.index[current], state)
+
+        self._cached_position = position
+        self._cached_state = state
+        return {name: values.copy() for name, values in state.items()}
+
+    def _apply_record(self, file, entry, state):
+        """
+        Decode one day's record on top of the previous day's state.
+        """
+        file.seek(entry["offset"])
+        if entry["keyframe"]:
+            state = {}
+
+        for name, (encoding, count) in entry["fields"].items():
+            dtype = self.dtypes[name]
+            exact = encoding.endswith("_exact")
+            quantized = not entry["keyframe"] and not exact and self.quantization_step is not None and name != "terrain_code"
+            value_dtype = np.dtype("<i2") if quantized else dtype
+
+            if encoding.startswith("sparse"):
+                changed = np.fromfile(file, dtype="<u4", count=count)
+                values = np.fromfile(file, dtype=value_dtype, count=count)
+            else:
+                changed = slice(None)
+                values = np.fromfile(file, dtype=value_dtype, count=count)
+
+            if entry["keyframe"]:
+                state[name] = values
+            elif quantized:
+                state[name][changed] += values * self.quantization_step
+            else:
+                state[name][changed] = values
+        return state
+
+
+class HistoryReader:
+    """
+    Random-access reader for histories written by BinaryHistoryWriter.
+
+    The field files are memory-mapped, so opening a run costs nothing beyond reading the header,
+    and a query only touches the pages holding the requested values. Per-day arrays, per-cell
+    time series and windowed slices are all views or small copies of the mapped files. A run that
+    is still being written can be read too; only complete days are exposed.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: Directory written by BinaryHistoryWriter.
+        """
+        self.path = path
+        with open(os.path.join(path, "header.json")) as f:
+            self.header = json.load(f)
+        self.dtypes = {name: np.dtype(dtype) for name, dtype in self.header["fields"].items()}
+        self.terrain_types = self.header["terrain_types"]
+        self.q, self.r = np.load(os.path.join(path, "coords.npy"))
+        self.cells = len(self.q)
+        with open(os.path.join(path, "days.jsonl")) as f:
+            self.days = [json.loads(line) for line in f if line.strip()]
+
+        day_counts = [len(self.days)]
+        for name, dtype in self.dtypes.items():
+            day_counts.append(os.path.getsize(self._field_path(name)) // (self.cells * dtype.itemsize))
+        self.day_count = min(day_counts)
+        self._maps = {}
+
+    def _field_path(self, name):
+        return os.path.join(self.path, f"{name}.bin")
+
+    def __len__(self):
+        return self.day_count
+
+    def field(self, name):
+        """
+        Get the read-only memory map of one field.
+        :param name: Field name (height, water_level, vegetation, temperature or terrain_code).
+        :return: A (days, cells) np.memmap.
+        """
+        if name not in self.dtypes:
+            raise KeyError(f"Unknown field '{name}'. Expected one of {list(self.dtypes)}.")
+        if name not in self._maps:
+            if self.day_count == 0:
+                return np.empty((0, self.cells), dtype=self.dtypes[name])
+            self._maps[name] = np.memmap(
+                self._field_path(name), dtype=self.dtypes[name], mode="r", shape=(self.day_count, self.cells)
+            )
+        return self._maps[name]
+
+    def index_of(self, q, r):
+        """
+        Get the cell index of axial coordinates in this history.
+        :param q: Axial q coordinate (or array of them).
+        :param r: Axial r coordinate (or array of them).
+        :return: Cell index (or array of them), -1 where the coordinates are not in the grid.
+        """
+        q = np.asarray(q)
+        r = np.asarray(r)
+        row_start = np.searchsorted(self.q, q, side="left")
+        row_end = np.searchsorted(self.q, q, side="right")
+        clipped = np.minimum(row_start, self.cells - 1)
+        index = row_start + r - self.r[clipped]
+        valid = (row_end > row_start) & (index >= row_start) & (index < row_end)
+        index = np.where(valid, index, -1)
+        return int(index) if index.ndim == 0 else index
+
+    def day(self, name, day):
+        """
+        Get one field on one day.
+        :param name: Field name.
+        :param day: Position of the day in the history.
+        :return: A read-only array of one value per cell.
+        """
+        return self.field(name)[day]
+
+    def frame(self, day):
+        """
+        Get every field on one day.
+        :param day: Position of the day in the history.
+        :return: A dictionary of field name to read-only array.
+        """
+        return {name: self.field(name)[day] for name in self.dtypes}
+
+    def series(self, name, q, r, start=0, stop=None):
+        """
+        Get the time series of one field at one cell, e.g. vegetation at (q, r) across all days.
+        :param name: Field name.
+        :param q: Axial q coordinate of the cell.
+        :param r: Axial r coordinate of the cell.
+        :param start: First day of the series.
+        :param stop: Day after the last one in the series (default: the end of the history).
+        :return: An array of one value per day.
+        """
+        index = self.index_of(q, r)
+        if index < 0:
+            raise KeyError((q, r))
+        return np.array(self.field(name)[start:stop, index])
+
+    def window(self, name, start=0, stop=None, cells=None):
+        """
+        Get a slice of one field over a range of days and optionally a subset of cells.
+        :param name: Field name.
+        :param start: First day of the window.
+        :param stop: Day after the last one in the window.
+        :param cells: Optional array of cell indices (see index_of).
+        :return: A (days, cells) array.
+        """
+        values = self.field(name)[start:stop]
+        if cells is not None:
+            return values[:, cells]
+        return values
+
+    def terrain_types_on(self, day):
+        """
+        Get the terrain type names of every cell on one day.
+        :param day: Position of the day in the history.
+        :return: An array of terrain type names.
+        """
+        return np.array(self.terrain_types)[self.field("terrain_code")[day]]
+
+
+def open_history(path):
+    """
+    Open a history directory with the reader of its format.
+    :param path: Directory written by BinaryHistoryWriter or KeyframeHistoryWriter.
+    :return: A HistoryReader or KeyframeHistoryReader.
+    :raises ValueError: If the directory holds another format.
+    """
+    with open(os.path.join(path, "header.json")) as f:
+        format_name = json.load(f).get("format")
+    if format_name == BinaryHistoryWriter.FORMAT:
+        return HistoryReader(path)
+    if format_name == KeyframeHistoryWriter.FORMAT:
+        return KeyframeHistoryReader(path)
+    raise ValueError(f"'{path}' holds a '{format_name}' history, which has no random-access reader.")
+
+
+def convert_json_history(json_path, output_path, dtype=None):
+    """
+    Convert a history exported by Simulation.export_simulation_history into the binary format
+    read by HistoryReader. The JSON file is parsed once; afterwards every query is memory-mapped.
+    :param json_path: Path of the exported JSON history.
+    :param output_path: Directory to write the binary history into.
+    :param dtype: Optional storage dtype for the float fields.
+    :return: A HistoryReader for the converted history.
+    """
+    from terrain import TERRAIN_CODES
+
+    with open(json_path) as f:
+        history = json.load(f)
+
+    coords = [tuple(int(value) for value in key.strip("()").split(",")) for key in history[0]["terrain"]] if history else []
+    radius = max((max(abs(q), abs(r), abs(q + r)) for q, r in coords), default=0)
+    grid = HexGrid(radius)
+    indices = grid.index_of(*np.array(coords).reshape(-1, 2).T)
+    if len(indices) != len(grid) or np.any(np.sort(indices) != np.arange(len(grid))):
+        raise ValueError(f"'{json_path}' does not hold a complete hexagonal grid.")
+
+    writer = BinaryHistoryWriter(output_path, dtype=dtype)
+    writer.open(grid)
+    for state in history:
+        cells = state["terrain"].values()
+        for name in HexGrid.FIELDS:
+            getattr(grid, name)[indices] = [cell[name] for cell in cells]
+        grid.terrain_code[indices] = [TERRAIN_CODES[cell["terrain_type"]] for cell in cells]
+        writer.write_frame(state["day"], state["weather"], state["event"], grid)
+    writer.close()
+    return HistoryReader(output_path)
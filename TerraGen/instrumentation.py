@@ -0,0 +1,273 @@
+import json
+import os
+import time
+import tracemalloc
+from collections import deque
+
+import numpy as np
+
+
+class _NullPhase:
+    """
+    Phase of a disabled instrumentation: entering and leaving it does nothing.
+    """
+    __slots__ = ("cells",)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_PHASE = _NullPhase()
+
+
+class NullInstrumentation:
+    """
+    Instrumentation that records nothing. Simulation uses it when instrumentation is disabled, so
+    every hook in the daily cycle costs one method call returning a shared no-op context.
+    """
+    enabled = False
+
+    def start_day(self, day):
+        pass
+
+    def phase(self, name, cells=0):
+        return NULL_PHASE
+
+    def close(self):
+        pass
+
+
+NULL_INSTRUMENTATION = NullInstrumentation()
+
+
+class _Phase:
+    """
+    Measures one phase of one day and hands the record to the instrumentation when it ends.
+    Set ``cells`` inside the block when the number of touched cells is only known afterwards.
+    """
+    __slots__ = ("instrumentation", "name", "cells", "start", "memory_start")
+
+    def __init__(self, instrumentation, name, cells):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.cells = cells
+
+    def __enter__(self):
+        if self.instrumentation.track_memory:
+            tracemalloc.reset_peak()
+            self.memory_start = tracemalloc.get_traced_memory()[0]
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = time.perf_counter()
+        allocated = None
+        if self.instrumentation.track_memory:
+            allocated = tracemalloc.get_traced_memory()[1] - self.memory_start
+        self.instrumentation.record(self.name, self.start, end - self.start, self.cells, allocated)
+        return False
+
+
+class Instrumentation:
+    """
+    Per-phase metrics of the simulation's daily cycle.
+
+    Every phase of Simulation.update_day (weather, seasons, interactions or the fused step,
+    events, state saving, rendering and checkpoints) produces one record per day:
+
+        {"day": 12, "phase": "events", "start": 1.234, "duration": 0.0021, "cells": 7651,
+         "allocated_bytes": 65536}
+
+    ``start`` is in seconds since the instrumentation was created and ``allocated_bytes`` is the
+    peak growth of traced Python and NumPy memory during the phase (None unless track_memory is
+    set, since tracemalloc slows everything down). Records are passed to every observer, which are
+    plain callables, and to the rolling summary.
+    """
+    enabled = True
+
+    def __init__(self, track_memory=False, window=100, observers=None, chrome_trace=None, jsonl=None):
+        """
+        :param track_memory: Record allocated bytes per phase with tracemalloc.
+        :param window: Number of most recent days kept by the rolling summary.
+        :param observers: Callables called with every record.
+        :param chrome_trace: Optional path of a Chrome trace (chrome://tracing, Perfetto) to write.
+        :param jsonl: Optional path of a JSON lines file receiving every record.
+        """
+        self.track_memory = track_memory
+        self.summary = RollingSummary(window)
+        self.observers = [self.summary] + list(observers or [])
+        if chrome_trace is not None:
+            self.observers.append(ChromeTraceWriter(chrome_trace))
+        if jsonl is not None:
+            self.observers.append(JsonLinesTraceWriter(jsonl))
+        self.day = 0
+        self.origin = time.perf_counter()
+        self._started_tracing = False
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def add_observer(self, observer):
+        """
+        Register a callable that receives every phase record.
+        """
+        self.observers.append(observer)
+
+    def start_day(self, day):
+        """
+        Set the day attached to the following records.
+        """
+        self.day = day
+
+    def phase(self, name, cells=0):
+        """
+        Measure a phase: ``with instrumentation.phase("weather", len(grid)): ...``
+        :param name: Phase name.
+        :param cells: Number of cells the phase touches.
+        :return: A context manager.
+        """
+        return _Phase(self, name, cells)
+
+    def record(self, name, start, duration, cells, allocated_bytes=None):
+        """
+        Pass a phase record to every observer.
+        :param name: Phase name.
+        :param start: perf_counter() value at the start of the phase.
+        :param duration: Wall time of the phase in seconds.
+        :param cells: Number of cells the phase touched.
+        :param allocated_bytes: Peak memory growth during the phase, if tracked.
+        """
+        record = {
+            "day": self.day,
+            "phase": name,
+            "start": start - self.origin,
+            "duration": duration,
+            "cells": int(cells or 0),
+            "allocated_bytes": allocated_bytes,
+        }
+        for observer in self.observers:
+            observer(record)
+
+    def close(self):
+        """
+        Close the trace files and stop memory tracing if this instrumentation started it.
+        """
+        for observer in self.observers:
+            close = getattr(observer, "close", None)
+            if close is not None:
+                close()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+
+class RollingSummary:
+    """
+    Keeps the records of the most recent days and summarizes them per phase.
+    """
+
+    def __init__(self, window=100):
+        """
+        :param window: Number of records kept per phase.
+        """
+        self.window = window
+        self.records = {}
+
+    def __call__(self, record):
+        if record["phase"] not in self.records:
+            self.records[record["phase"]] = deque(maxlen=self.window)
+        self.records[record["phase"]].append(record)
+
+    def summary(self):
+        """
+        Summarize the recorded window per phase.
+        :return: Dictionary of phase name to count, mean/p95/max duration in seconds, cells per
+                 second and mean allocated bytes (None when memory is not tracked).
+        """
+        result = {}
+        for phase, records in self.records.items():
+            durations = np.array([record["duration"] for record in records])
+            cells = sum(record["cells"] for record in records)
+            allocated = [record["allocated_bytes"] for record in records if record["allocated_bytes"] is not None]
+            total = float(durations.sum())
+            result[phase] = {
+                "count": len(records),
+                "mean": float(durations.mean()),
+                "p95": float(np.percentile(durations, 95)),
+                "max": float(durations.max()),
+                "total": total,
+                "cells_per_second": cells / total if total > 0 else None,
+                "mean_allocated_bytes": float(np.mean(allocated)) if allocated else None,
+            }
+        return result
+
+    def table(self):
+        """
+        Format the summary as a text table, slowest phase first.
+        """
+        summary = sorted(self.summary().items(), key=lambda item: item[1]["total"], reverse=True)
+        grand_total = sum(stats["total"] for _, stats in summary) or 1.0
+        lines = [f"{'phase':<14} {'days':>5} {'mean ms':>9} {'p95 ms':>9} {'max ms':>9} {'share':>6} {'cells/s':>10} {'alloc KiB':>10}"]
+        for phase, stats in summary:
+            cells_per_second = f"{stats['cells_per_second']:10.3g}" if stats["cells_per_second"] else f"{'-':>10}"
+            allocated = f"{stats['mean_allocated_bytes'] / 1024:10.1f}" if stats["mean_allocated_bytes"] is not None else f"{'-':>10}"
+            lines.append(
+                f"{phase:<14} {stats['count']:>5} {stats['mean'] * 1000:9.3f} {stats['p95'] * 1000:9.3f} "
+                f"{stats['max'] * 1000:9.3f} {stats['total'] / grand_total:6.1%} {cells_per_second} {allocated}"
+            )
+        return "\n".join(lines)
+
+
+class JsonLinesTraceWriter:
+    """
+    Observer that appends every phase record to a JSON lines file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "w")
+
+    def __call__(self, record):
+        self._file.write(json.dumps(record) + "\n")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ChromeTraceWriter:
+    """
+    Observer that streams the phases as complete ("X") events of the Chrome trace event format,
+    which chrome://tracing and Perfetto can open.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.pid = os.getpid()
+        self._file = open(path, "w")
+        self._file.write("[\n")
+        self._first = True
+
+    def __call__(self, record):
+        event = {
+            "name": record["phase"],
+            "cat": "simulation",
+            "ph": "X",
+            "ts": record["start"] * 1e6,
+            "dur": record["duration"] * 1e6,
+            "pid": self.pid,
+            "tid": 0,
+            "args": {"day": record["day"], "cells": record["cells"], "allocated_bytes": record["allocated_bytes"]},
+        }
+        self._file.write(("" if self._first else ",\n") + json.dumps(event))
+        self._first = False
+
+    def close(self):
+        if self._file is not None:
+            self._file.write("\n]\n")
+            self._file.close()
+            self._file = None
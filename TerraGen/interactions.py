@@ -1,18 +1,24 @@
-from terrain import Cell
+from terrain import Cell, CellView, HexGrid, HEX_DIRECTIONS
 
 class InteractionsManager:
-    def __init__(self, config):
+    def __init__(self, config, kernels=None):
         """
         Initialize the InteractionsManager.
         :param config: A dictionary containing interaction parameters.
+        :param kernels: Optional whole-grid kernels (see kernels.get_kernels) used for HexGrid grids.
         """
         self.config = config
+        self.kernels = kernels
 
     def simulate_erosion(self, grid):
         """
         Simulate erosion by reducing height in cells near water and transferring material downhill.
         :param grid: The hexagonal grid (dictionary of Cell objects).
         """
+        if self.kernels is not None and isinstance(grid, HexGrid):
+            self.kernels.simulate_erosion(grid, self.config)
+            return
+
         erosion_rate = self.config["interaction_factors"]["erosion_rate"]
         for cell in grid.values():
             if isinstance(cell, Cell) and cell.water_level > 0 and cell.terrain_type != "ocean":  # Ocean doesn't erode
@@ -25,6 +31,10 @@ class InteractionsManager:
         Spread vegetation to neighboring cells with sufficient water and suitable terrain.
         :param grid: The hexagonal grid (dictionary of Cell objects).
         """
+        if self.kernels is not None and isinstance(grid, HexGrid):
+            self.kernels.spread_vegetation(grid, self.config)
+            return
+
         growth_rate = self.config["interaction_factors"]["vegetation_growth"]
         for cell_coords, cell in grid.items():
             if isinstance(cell, Cell) and cell.water_level > 0.3 and cell.terrain_type != "desert":
@@ -40,6 +50,10 @@ class InteractionsManager:
         Simulate desertification by converting cells to desert if water levels are too low.
         :param grid: The hexagonal grid (dictionary of Cell objects).
         """
+        if self.kernels is not None and isinstance(grid, HexGrid):
+            self.kernels.simulate_desertification(grid, self.config)
+            return
+
         desertification_rate = self.config["interaction_factors"]["desertification_rate"]
         for cell in grid.values():
             if isinstance(cell, Cell) and cell.water_level < 0.1 and cell.terrain_type != "ocean":
@@ -66,11 +80,12 @@ class InteractionsManager:
         :param r: Axial coordinate r of the current cell.
         :return: List of neighboring Cell objects.
         """
-        directions = [
-            (+1, 0), (-1, 0), (0, +1), (0, -1), (+1, -1), (-1, +1)
-        ]
+        if isinstance(grid, HexGrid):
+            index = grid.index(q, r)
+            return [CellView(grid, neighbor) for neighbor in grid.neighbor_index[index].tolist() if neighbor < len(grid)]
+
         neighbors = []
-        for dq, dr in directions:
+        for dq, dr in HEX_DIRECTIONS:
             neighbor_coords = (q + dq, r + dr)
             if neighbor_coords in grid:
                 neighbors.append(grid[neighbor_coords])
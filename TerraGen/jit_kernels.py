@@ -0,0 +1,286 @@
+import numpy as np
+
+from kernels import NumpyKernels
+from terrain import TERRAIN_CODES
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:  # Numba is optional; get_kernels falls back to the NumPy backend without it
+    njit = None
+    prange = range
+    NUMBA_AVAILABLE = False
+
+
+OCEAN = TERRAIN_CODES["ocean"]
+DESERT = TERRAIN_CODES["desert"]
+
+
+# The rules below are written as plain per-cell loops, exactly like the reference implementations
+# in WeatherSystem, SeasonManager and InteractionsManager, and compiled by Numba into one parallel
+# pass per rule. Each cell only writes its own entries, so iterations are independent.
+
+def weather_rule(water, height, rain, snow, wind, drought):
+    for i in prange(len(water)):
+        level = water[i]
+        if rain != 0.0:
+            level += rain
+        if snow != 0.0 and height[i] > 0.6:
+            level += snow
+        level -= wind
+        level = min(level, 1.0)
+        level = max(0.0, level)
+        if drought:
+            level *= 0.9
+        water[i] = level
+
+
+def seasonal_rule(vegetation, water, height, terrain_code, growth, use_growth, decrease, use_decrease, snow, use_snow):
+    for i in prange(len(vegetation)):
+        plant = vegetation[i]
+        level = water[i]
+        if use_growth:
+            plant *= growth
+        if use_decrease and terrain_code[i] == DESERT:
+            plant -= decrease
+            plant = max(0.0, plant)
+        if use_snow and height[i] > 0.6:
+            level += snow
+        vegetation[i] = max(0.0, min(1.0, plant))
+        water[i] = max(0.0, min(1.0, level))
+
+
+def erosion_rule(height, water, terrain_code, erosion_rate):
+    for i in prange(len(height)):
+        if water[i] > 0 and terrain_code[i] != OCEAN:
+            height[i] = max(0.0, height[i] - erosion_rate)
+            water[i] = max(water[i] - erosion_rate, 0.0)
+
+
+def source_rule(sources, water, terrain_code):
+    for i in prange(len(water)):
+        sources[i] = water[i] > 0.3 and terrain_code[i] != DESERT
+    sources[len(water)] = False
+
+
+def spread_rule(vegetation, terrain_code, sources, neighbor_index, growth_rate):
+    for i in prange(len(vegetation)):
+        if terrain_code[i] == DESERT:
+            continue
+        plant = vegetation[i]
+        for k in range(neighbor_index.shape[1]):
+            if sources[neighbor_index[i, k]] and plant < 1.0:
+                plant = min(1.0, plant + growth_rate)
+        vegetation[i] = plant
+
+
+def desertification_rule(vegetation, water, terrain_code, desertification_rate):
+    for i in prange(len(vegetation)):
+        if water[i] < 0.1 and terrain_code[i] != OCEAN:
+            plant = max(vegetation[i] - desertification_rate, 0.0)
+            vegetation[i] = plant
+            if plant == 0.0:
+                terrain_code[i] = DESERT
+
+
+def pointwise_step_rule(height, water, vegetation, terrain_code, sources,
+                        rain, snow, wind, drought,
+                        growth, use_growth, decrease, use_decrease, seasonal_snow, use_snow, erosion_rate):
+    """
+    Weather, seasonal effects and erosion of one cell, followed by its vegetation source flag.
+    """
+    for i in prange(len(water)):
+        high = height[i] > 0.6
+        code = terrain_code[i]
+
+        level = water[i]
+        if rain != 0.0:
+            level += rain
+        if snow != 0.0 and high:
+            level += snow
+        level -= wind
+        level = min(level, 1.0)
+        level = max(0.0, level)
+        if drought:
+            level *= 0.9
+
+        plant = vegetation[i]
+        if use_growth:
+            plant *= growth
+        if use_decrease and code == DESERT:
+            plant -= decrease
+            plant = max(0.0, plant)
+        if use_snow and high:
+            level += seasonal_snow
+        plant = max(0.0, min(1.0, plant))
+        level = max(0.0, min(1.0, level))
+
+        if level > 0 and code != OCEAN:
+            height[i] = max(0.0, height[i] - erosion_rate)
+            level = max(level - erosion_rate, 0.0)
+
+        vegetation[i] = plant
+        water[i] = level
+        sources[i] = level > 0.3 and code != DESERT
+    sources[len(water)] = False
+
+
+def neighbor_step_rule(vegetation, water, terrain_code, sources, neighbor_index, growth_rate, desertification_rate):
+    """
+    Vegetation spread into one cell, followed by its desertification.
+    """
+    for i in prange(len(vegetation)):
+        code = terrain_code[i]
+        plant = vegetation[i]
+        if code != DESERT:
+            for k in range(neighbor_index.shape[1]):
+                if sources[neighbor_index[i, k]] and plant < 1.0:
+                    plant = min(1.0, plant + growth_rate)
+        if water[i] < 0.1 and code != OCEAN:
+            plant = max(plant - desertification_rate, 0.0)
+            if plant == 0.0:
+                terrain_code[i] = DESERT
+        vegetation[i] = plant
+
+
+RULES = (
+    "weather_rule", "seasonal_rule", "erosion_rule", "source_rule", "spread_rule",
+    "desertification_rule", "pointwise_step_rule", "neighbor_step_rule",
+)
+
+_compiled = {}
+
+
+def compiled_rules():
+    """
+    Compile the rules with Numba on first use.
+    :return: Dictionary of rule name to compiled function.
+    """
+    if not _compiled:
+        for name in RULES:
+            _compiled[name] = njit(parallel=True, cache=True)(globals()[name])
+    return _compiled
+
+
+def weather_arguments(weather, config):
+    """
+    Reduce a weather dictionary to the per-cell increments of weather_rule.
+    A rule that does not apply today contributes 0.0.
+    """
+    rain = 0.0
+    if not weather["drought"] and weather["rain_intensity"] > 0.2:
+        rain = weather["rain_intensity"] * config["weather_impact"]["rain_absorption"]
+    snow = 0.0
+    if weather["snow_intensity"] > 0.2:
+        snow = weather["snow_intensity"] * config["weather_impact"]["snow_accumulation"]
+    return rain, snow, weather["wind_speed"] * 0.01, bool(weather["drought"])
+
+
+def seasonal_arguments(season, config):
+    """
+    Reduce the seasonal effects of a season to the scalars and flags of seasonal_rule.
+    """
+    seasonal_effects = config["seasonal_effects"].get(season, {})
+    growth = seasonal_effects.get("vegetation_growth_multiplier", 1.0)
+    decrease = 0.0
+    if "desertification_rate_multiplier" in seasonal_effects:
+        decrease = config["interaction_factors"]["desertification_rate"] * seasonal_effects["desertification_rate_multiplier"]
+    snow = 0.0
+    if "snow_accumulation_multiplier" in seasonal_effects:
+        snow = config["weather_impact"]["snow_accumulation"] * seasonal_effects["snow_accumulation_multiplier"]
+    return (
+        growth, "vegetation_growth_multiplier" in seasonal_effects,
+        decrease, "desertification_rate_multiplier" in seasonal_effects,
+        snow, "snow_accumulation_multiplier" in seasonal_effects,
+    )
+
+
+class NumbaKernels(NumpyKernels):
+    """
+    Daily update rules compiled with Numba and parallelized across cores.
+
+    Every rule is a single parallel loop over the cells that keeps its intermediates in registers,
+    so no temporary arrays are allocated. The rules mirror the per-cell reference loops operation
+    for operation. Event kernels draw from numpy Generators and only touch a subset of cells, so
+    they are inherited from NumpyKernels.
+    """
+    name = "numba"
+
+    def __init__(self):
+        self.rules = compiled_rules()
+
+    def apply_weather_effects(self, grid, weather, config):
+        self.rules["weather_rule"](grid.water_level, grid.height, *weather_arguments(weather, config))
+
+    def apply_seasonal_effects(self, grid, season, config):
+        self.rules["seasonal_rule"](grid.vegetation, grid.water_level, grid.height, grid.terrain_code, *seasonal_arguments(season, config))
+
+    def simulate_erosion(self, grid, config):
+        self.rules["erosion_rule"](grid.height, grid.water_level, grid.terrain_code, config["interaction_factors"]["erosion_rate"])
+
+    def spread_vegetation(self, grid, config):
+        sources = np.empty(len(grid) + 1, dtype=np.bool_)
+        self.rules["source_rule"](sources, grid.water_level, grid.terrain_code)
+        self.rules["spread_rule"](grid.vegetation, grid.terrain_code, sources, grid.neighbor_index, config["interaction_factors"]["vegetation_growth"])
+
+    def simulate_desertification(self, grid, config):
+        self.rules["desertification_rule"](grid.vegetation, grid.water_level, grid.terrain_code, config["interaction_factors"]["desertification_rate"])
+
+    def create_step(self, grid, active=None):
+        """
+        Create the fused daily step engine for a grid.
+        :param grid: The HexGrid to update.
+        :param active: Ignored; the compiled passes visit every cell.
+        :return: A JitDailyStep.
+        """
+        return JitDailyStep(grid, self.rules)
+
+
+class JitDailyStep:
+    """
+    Fused daily update compiled with Numba: one parallel pass for the per-cell rules (weather,
+    seasonal effects, erosion) and one for the neighbor stencil (vegetation spread, desertification).
+    Drop-in replacement for step.DailyStep.
+    """
+
+    def __init__(self, grid, rules):
+        """
+        :param grid: The HexGrid to update (its topology must not change).
+        :param rules: Compiled rules from compiled_rules().
+        """
+        self.rules = rules
+        self.capacity = 0
+        self.bind(grid)
+
+    def bind(self, grid):
+        """
+        Point the step at a grid, possibly with another topology (see step.DailyStep.bind).
+        :param grid: The HexGrid to update from now on.
+        """
+        self.size = len(grid)
+        if self.size > self.capacity:
+            self._sources = np.zeros(self.size + 1, dtype=np.bool_)
+            self.capacity = self.size
+        self.sources = self._sources[:self.size + 1]
+        self.neighbor_index = grid.neighbor_index
+
+    def matches(self, grid):
+        return self.size == len(grid)
+
+    def run(self, grid, weather, season, config):
+        """
+        Apply the weather, seasonal and interaction rules of one day.
+        :param grid: The HexGrid to update.
+        :param weather: Weather dictionary produced by WeatherSystem.generate_weather.
+        :param season: Name of the current season.
+        :param config: A dictionary-like object containing the simulation parameters.
+        """
+        interaction_factors = config["interaction_factors"]
+        self.rules["pointwise_step_rule"](
+            grid.height, grid.water_level, grid.vegetation, grid.terrain_code, self.sources,
+            *weather_arguments(weather, config), *seasonal_arguments(season, config), interaction_factors["erosion_rate"],
+        )
+        self.rules["neighbor_step_rule"](
+            grid.vegetation, grid.water_level, grid.terrain_code, self.sources, self.neighbor_index,
+            interaction_factors["vegetation_growth"], interaction_factors["desertification_rate"],
+        )
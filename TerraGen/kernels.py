@@ -0,0 +1,259 @@
+import logging
+
+import numpy as np
+
+from step import DailyStep
+from terrain import TERRAIN_CODES
+
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("python", "numpy", "numba")
+
+# Maximum absolute difference between a kernel and the per-cell reference loop it replaces.
+# The kernels evaluate each rule with the same operations in the same order as the loops, so on
+# float64 grids the results are normally bit-identical; the tolerance covers float32 grids and
+# platforms whose vector math rounds differently from scalar math.
+TOLERANCE = 1e-12
+
+# Range of the per-cell random change of each event type.
+EVENT_RANGES = {
+    "earthquake": (0, 0.05),
+    "flood": (0.1, 0.3),
+    "wildfire": (0.1, 0.3),
+    "rapid_growth": (0.2, 0.5),
+}
+
+
+class NumpyKernels:
+    """
+    Whole-grid NumPy implementations of the daily update rules.
+
+    Each method applies the same rule as its per-cell counterpart in WeatherSystem, SeasonManager,
+    InteractionsManager or EventManager, but as masked array expressions over a HexGrid.
+    Event kernels draw all of their per-cell random numbers in one batched call, in grid order,
+    which consumes the random stream exactly like the per-cell loops did.
+    """
+    name = "numpy"
+
+    def create_step(self, grid, active=None):
+        """
+        Create the fused daily step engine for a grid (see step.DailyStep).
+        :param grid: The HexGrid to update.
+        :param active: Optional ActiveSet of the grid; the step then skips its dormant cells (see active.py).
+        :return: A DailyStep with scratch buffers sized for the grid.
+        """
+        if active is not None:
+            from active import ActiveDailyStep
+            return ActiveDailyStep(grid, active)
+        return DailyStep(grid)
+
+    def apply_weather_effects(self, grid, weather, config):
+        """
+        Apply the effects of the day's weather to the grid.
+        :param grid: The HexGrid to update.
+        :param weather: Weather dictionary produced by WeatherSystem.generate_weather.
+        :param config: A dictionary-like object containing weather parameters.
+        """
+        rain_intensity = weather["rain_intensity"]
+        snow_intensity = weather["snow_intensity"]
+        wind_speed = weather["wind_speed"]
+        drought = weather["drought"]
+        water = grid.water_level
+
+        if not drought and rain_intensity > 0.2:
+            water += rain_intensity * config["weather_impact"]["rain_absorption"]
+
+        if snow_intensity > 0.2:
+            high = grid.height > 0.6
+            water[high] += snow_intensity * config["weather_impact"]["snow_accumulation"]
+
+        water -= wind_speed * 0.01
+        np.clip(water, 0.0, 1.0, out=water)
+
+        if drought:
+            water *= 0.9
+
+    def apply_seasonal_effects(self, grid, season, config):
+        """
+        Apply the effects of the given season to the grid.
+        :param grid: The HexGrid to update.
+        :param season: Name of the current season.
+        :param config: A dictionary-like object containing seasonal effect parameters.
+        """
+        seasonal_effects = config["seasonal_effects"].get(season, {})
+        vegetation = grid.vegetation
+        water = grid.water_level
+
+        if "vegetation_growth_multiplier" in seasonal_effects:
+            vegetation *= seasonal_effects["vegetation_growth_multiplier"]
+
+        if "desertification_rate_multiplier" in seasonal_effects:
+            desert = grid.terrain_mask("desert")
+            decrease = config["interaction_factors"]["desertification_rate"] * seasonal_effects["desertification_rate_multiplier"]
+            vegetation[desert] = np.maximum(vegetation[desert] - decrease, 0.0)
+
+        if "snow_accumulation_multiplier" in seasonal_effects:
+            high = grid.height > 0.6
+            water[high] += config["weather_impact"]["snow_accumulation"] * seasonal_effects["snow_accumulation_multiplier"]
+
+        np.clip(vegetation, 0.0, 1.0, out=vegetation)
+        np.clip(water, 0.0, 1.0, out=water)
+
+    def simulate_erosion(self, grid, config):
+        """
+        Lower the height and water level of every wet land cell.
+        :param grid: The HexGrid to update.
+        :param config: A dictionary containing interaction parameters.
+        """
+        erosion_rate = config["interaction_factors"]["erosion_rate"]
+        eroding = (grid.water_level > 0) & ~grid.terrain_mask("ocean")
+        grid.height[eroding] = np.maximum(grid.height[eroding] - erosion_rate, 0.0)
+        grid.water_level[eroding] = np.maximum(grid.water_level[eroding] - erosion_rate, 0.0)
+
+    def spread_vegetation(self, grid, config):
+        """
+        Spread vegetation from wet, non-desert cells to their non-desert neighbors.
+
+        Sources are gathered from the neighbor table before any vegetation is written, so the
+        result does not depend on cell order. Each cell receives one capped growth step per
+        spreading neighbor, exactly as in the per-cell loop.
+        :param grid: The HexGrid to update.
+        :param config: A dictionary containing interaction parameters.
+        """
+        growth_rate = config["interaction_factors"]["vegetation_growth"]
+        fertile = ~grid.terrain_mask("desert")
+        sources = np.append((grid.water_level > 0.3) & fertile, False)
+        counts = sources[grid.neighbor_index].sum(axis=1)
+
+        receiving = np.flatnonzero((counts > 0) & fertile)
+        vegetation = grid.vegetation[receiving]
+        remaining = counts[receiving]
+        while True:
+            growing = (remaining > 0) & (vegetation < 1.0)
+            if not growing.any():
+                break
+            vegetation[growing] = np.minimum(vegetation[growing] + growth_rate, 1.0)
+            remaining -= 1
+        grid.vegetation[receiving] = vegetation
+
+    def simulate_desertification(self, grid, config):
+        """
+        Dry out land cells with low water and turn them into desert once their vegetation is gone.
+        :param grid: The HexGrid to update.
+        :param config: A dictionary containing interaction parameters.
+        """
+        desertification_rate = config["interaction_factors"]["desertification_rate"]
+        drying = np.flatnonzero((grid.water_level < 0.1) & ~grid.terrain_mask("ocean"))
+        vegetation = np.maximum(grid.vegetation[drying] - desertification_rate, 0.0)
+        grid.vegetation[drying] = vegetation
+        grid.terrain_code[drying[vegetation == 0.0]] = TERRAIN_CODES["desert"]
+
+    def simulate_earthquake(self, grid, rng, cells=None):
+        """
+        Lower every cell (or every cell of a footprint) by a random amount.
+        :param grid: The HexGrid to update.
+        :param rng: numpy.random.Generator to draw from.
+        :param cells: Optional sorted array of the cell indices affected by a localized event.
+        """
+        if cells is None:
+            grid.height -= rng.uniform(*EVENT_RANGES["earthquake"], size=len(grid))
+            np.maximum(grid.height, 0.0, out=grid.height)
+        else:
+            grid.height[cells] = np.maximum(grid.height[cells] - rng.uniform(*EVENT_RANGES["earthquake"], size=len(cells)), 0.0)
+
+    def simulate_flood(self, grid, rng, cells=None):
+        """
+        Raise the water level of every cell (or every cell of a footprint) by a random amount.
+        :param grid: The HexGrid to update.
+        :param rng: numpy.random.Generator to draw from.
+        :param cells: Optional sorted array of the cell indices affected by a localized event.
+        """
+        if cells is None:
+            grid.water_level += rng.uniform(*EVENT_RANGES["flood"], size=len(grid))
+            np.minimum(grid.water_level, 1.0, out=grid.water_level)
+        else:
+            grid.water_level[cells] = np.minimum(grid.water_level[cells] + rng.uniform(*EVENT_RANGES["flood"], size=len(cells)), 1.0)
+
+    def simulate_wildfire(self, grid, rng, cells=None):
+        """
+        Burn a random amount of vegetation from every well-vegetated cell (of a footprint).
+        :param grid: The HexGrid to update.
+        :param rng: numpy.random.Generator to draw from.
+        :param cells: Optional sorted array of the cell indices affected by a localized event.
+        """
+        if cells is None:
+            burning = np.flatnonzero(grid.vegetation > 0.2)
+        else:
+            burning = cells[grid.vegetation[cells] > 0.2]
+        burned = grid.vegetation[burning] - rng.uniform(*EVENT_RANGES["wildfire"], size=len(burning))
+        grid.vegetation[burning] = np.maximum(burned, 0.0)
+
+    def simulate_rapid_growth(self, grid, rng, cells=None):
+        """
+        Grow a random amount of vegetation on every wet, non-desert cell (of a footprint).
+        :param grid: The HexGrid to update.
+        :param rng: numpy.random.Generator to draw from.
+        :param cells: Optional sorted array of the cell indices affected by a localized event.
+        """
+        if cells is None:
+            growing = np.flatnonzero((grid.water_level > 0.3) & ~grid.terrain_mask("desert"))
+        else:
+            growing = cells[(grid.water_level[cells] > 0.3) & (grid.terrain_code[cells] != TERRAIN_CODES["desert"])]
+        grown = grid.vegetation[growing] + rng.uniform(*EVENT_RANGES["rapid_growth"], size=len(growing))
+        grid.vegetation[growing] = np.minimum(grown, 1.0)
+
+
+def get_kernels(backend):
+    """
+    Get the kernel implementation for a backend name.
+    :param backend: One of BACKENDS. "python" selects the per-cell reference loops; "numba" falls
+                    back to "numpy" when Numba is not installed.
+    :return: A kernels object, or None for the reference loops.
+    """
+    if backend == "python":
+        return None
+    if backend == "numpy":
+        return NumpyKernels()
+    if backend == "numba":
+        import jit_kernels
+        if jit_kernels.NUMBA_AVAILABLE:
+            return jit_kernels.NumbaKernels()
+        logger.warning("Numba is not installed. Falling back to the numpy backend.")
+        return NumpyKernels()
+    raise ValueError(f"Unknown kernel backend '{backend}'. Expected one of {BACKENDS}.")
+
+
+def compare_backends(backend, reference="python", days=30, seed=0, preset="default"):
+    """
+    Run the same seeded simulation on two backends and measure how far the grids drift apart.
+    This is the equivalence check for new backends: every difference should stay within TOLERANCE.
+    :param backend: Backend under test.
+    :param reference: Backend to compare against (the per-cell reference loops by default).
+    :param days: Number of days to simulate.
+    :param seed: Simulation seed shared by both runs.
+    :param preset: Configuration preset shared by both runs.
+    :return: Dictionary of grid field name to maximum absolute difference.
+    :raises RuntimeError: If a backend is not available here (e.g. "numba" without Numba), since
+                          the run would silently use another backend and compare nothing.
+    """
+    import contextlib
+    import os
+    from simulation import Simulation
+
+    grids = []
+    for name in (reference, backend):
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            simulation = Simulation(config_preset=preset, backend=name, seed=seed)
+            used = "python" if simulation.kernels is None else simulation.kernels.name
+            if used != name:
+                raise RuntimeError(f"Backend '{name}' is not available (the run would use '{used}'), so it cannot be compared.")
+            simulation.initialize_simulation()
+            simulation.run_simulation(days=days, visualize=False)
+        grids.append(simulation.terrain.grid)
+
+    expected, actual = grids
+    return {
+        name: float(np.max(np.abs(getattr(expected, name).astype(np.float64) - getattr(actual, name))))
+        for name in expected.FIELDS + ("terrain_code",)
+    }
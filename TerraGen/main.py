@@ -1,3 +1,5 @@
+import logging
+
 from config import Config
 from terrain import Terrain
 from weather import WeatherSystem, SeasonManager
@@ -8,6 +10,9 @@ from simulation import Simulation
 
 
 def main():
+    # Show the per-day progress messages of the simulation
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
     # Step 1: Initialize the simulation
     simulation = Simulation(config_preset="default")
 
@@ -0,0 +1,97 @@
+import numpy as np
+
+
+# Lattice period of the noise; the permutation table has this many entries.
+PERIOD = 1024
+
+# Unit-length gradient directions picked by the lattice hash, split into x and y components.
+GRADIENT_X = np.array([1.0, -1.0, 1.0, -1.0, 1.0, -1.0, 0.0, 0.0])
+GRADIENT_Y = np.array([1.0, 1.0, -1.0, -1.0, 0.0, 0.0, 1.0, -1.0])
+GRADIENT_X[:4] /= np.sqrt(2.0)
+GRADIENT_Y[:4] /= np.sqrt(2.0)
+
+
+def permutation_table(seed):
+    """
+    Build the lattice hash table for a seed.
+    :param seed: Integer seed. The same seed always yields the same noise field.
+    :return: A doubled permutation of range(PERIOD), so hashes can index it without wrapping.
+    """
+    permutation = np.random.RandomState(seed).permutation(PERIOD).astype(np.int32)
+    return np.concatenate([permutation, permutation])
+
+
+def _fade(t):
+    return t * t * t * (t * (t * 6.0 - 15.0) + 10.0)
+
+
+def _gradient_dot(permutation, xi, yi, dx, dy):
+    gradient = permutation[permutation[xi] + yi] & 7
+    return GRADIENT_X[gradient] * dx + GRADIENT_Y[gradient] * dy
+
+
+def gradient_noise(x, y, permutation):
+    """
+    Evaluate single-octave 2D gradient (Perlin) noise at many points at once.
+    :param x: Array of x coordinates.
+    :param y: Array of y coordinates.
+    :param permutation: Hash table from permutation_table.
+    :return: Array of noise values, roughly in [-1, 1].
+    """
+    x0 = np.floor(x)
+    y0 = np.floor(y)
+    dx = x - x0
+    dy = y - y0
+    xi = (x0 % PERIOD).astype(np.int32)
+    yi = (y0 % PERIOD).astype(np.int32)
+
+    n00 = _gradient_dot(permutation, xi, yi, dx, dy)
+    n10 = _gradient_dot(permutation, xi + 1, yi, dx - 1.0, dy)
+    n01 = _gradient_dot(permutation, xi, yi + 1, dx, dy - 1.0)
+    n11 = _gradient_dot(permutation, xi + 1, yi + 1, dx - 1.0, dy - 1.0)
+
+    u = _fade(dx)
+    v = _fade(dy)
+    bottom = n00 + u * (n10 - n00)
+    top = n01 + u * (n11 - n01)
+    return bottom + v * (top - bottom)
+
+
+def fractal_noise(x, y, octaves=6, persistence=0.5, lacunarity=2.0, seed=0, chunk_size=1 << 20):
+    """
+    Evaluate fractal (multi-octave) gradient noise over arrays of coordinates.
+
+    Octaves are combined the same way noise.pnoise2 does it: each octave multiplies the frequency
+    by ``lacunarity`` and the amplitude by ``persistence``, and the sum is divided by the total
+    amplitude. Points are processed in chunks to bound the size of the temporaries.
+    :param x: Array of x coordinates.
+    :param y: Array of y coordinates.
+    :param octaves: Number of octaves.
+    :param persistence: Amplitude multiplier between octaves.
+    :param lacunarity: Frequency multiplier between octaves.
+    :param seed: Seed for the lattice hash.
+    :param chunk_size: Maximum number of points evaluated at once.
+    :return: Array of noise values with the shape of x.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    permutation = permutation_table(seed)
+    flat_x = x.ravel()
+    flat_y = y.ravel()
+    result = np.zeros(flat_x.shape)
+
+    for start in range(0, len(flat_x), chunk_size):
+        chunk_x = flat_x[start:start + chunk_size]
+        chunk_y = flat_y[start:start + chunk_size]
+        total = result[start:start + chunk_size]
+        frequency = 1.0
+        amplitude = 1.0
+        max_amplitude = 0.0
+        for _ in range(octaves):
+            total += amplitude * gradient_noise(chunk_x * frequency, chunk_y * frequency, permutation)
+            max_amplitude += amplitude
+            frequency *= lacunarity
+            amplitude *= persistence
+        total /= max_amplitude
+
+    return result.reshape(x.shape)
@@ -0,0 +1,269 @@
+import multiprocessing
+import os
+import traceback
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from kernels import EVENT_RANGES
+from step import DailyStep
+from terrain import HexGrid, TERRAIN_CODES
+
+
+# Grid arrays moved into shared memory, plus the per-day exchange buffers.
+SHARED_FIELDS = HexGrid.FIELDS + ("terrain_code",)
+
+# Events whose per-cell random draws only cover the cells that pass a condition.
+MASKED_EVENTS = ("wildfire", "rapid_growth")
+
+
+def partition_rows(grid, parts):
+    """
+    Split the q rows of a grid into contiguous runs holding about the same number of cells.
+    :param grid: The HexGrid to split.
+    :param parts: Number of partitions.
+    :return: List of (first, last) q rows, inclusive, in ascending order.
+    """
+    cuts = grid.q[(np.arange(1, parts) * len(grid)) // parts]
+    firsts = [grid.q_min] + [int(q) for q in np.unique(cuts) if q > grid.q_min]
+    lasts = [first - 1 for first in firsts[1:]] + [grid.q_max]
+    return list(zip(firsts, lasts))
+
+
+def _band_view(arrays, radius, dtype, q_range, span):
+    """
+    Build a HexGrid band whose field arrays are views of the shared arrays.
+    """
+    band = HexGrid(radius, dtype=dtype, q_range=q_range)
+    for name in SHARED_FIELDS:
+        setattr(band, name, arrays[name][span])
+    return band
+
+
+def _masked_cells(grid, event_type):
+    """
+    Get the cells of a grid that draw a random number for a masked event, in grid order.
+    """
+    if event_type == "wildfire":
+        return np.flatnonzero(grid.vegetation > 0.2)
+    return np.flatnonzero((grid.water_level > 0.3) & (grid.terrain_code != TERRAIN_CODES["desert"]))
+
+
+def _worker_main(connection, names, size, dtype, radius, own_rows, own_span, band_rows, band_span):
+    """
+    Update loop of one partition. Waits for commands from the coordinator, applies them to the
+    partition's own rows and replies once done.
+    """
+    blocks = {name: shared_memory.SharedMemory(name=block_name) for name, block_name in names.items()}
+    try:
+        arrays = {
+            name: np.ndarray(size, dtype=np.int8 if name == "terrain_code" else dtype, buffer=blocks[name].buf)
+            for name in SHARED_FIELDS
+        }
+        sources = np.ndarray(size, dtype=np.bool_, buffer=blocks["sources"].buf)
+        draws = np.ndarray(size, dtype=np.float64, buffer=blocks["draws"].buf)
+
+        own = _band_view(arrays, radius, dtype, own_rows, own_span)
+        band = _band_view(arrays, radius, dtype, band_rows, band_span)
+        interior = band.row_span(*own_rows)
+        own_step = DailyStep(own)
+        band_step = DailyStep(band)
+        masked = None
+
+        while True:
+            command = connection.recv()
+            try:
+                if command[0] == "cells":
+                    _, weather, season, config = command
+                    own_step.apply_cell_rules(own, weather, season, config)
+                    sources[own_span] = own_step.sources[:-1]
+                    connection.send(("done", None))
+                elif command[0] == "neighbors":
+                    _, config, event_type = command
+                    band_step.apply_neighbor_rules(band, config, sources=sources[band_span], rows=interior)
+                    masked = _masked_cells(own, event_type) if event_type in MASKED_EVENTS else None
+                    connection.send(("done", 0 if masked is None else len(masked)))
+                elif command[0] == "event":
+                    _, event_type, offset = command
+                    _apply_event(own, event_type, draws, own_span, masked, offset)
+                    connection.send(("done", None))
+                elif command[0] == "close":
+                    break
+            except Exception:
+                connection.send(("error", traceback.format_exc()))
+    finally:
+        own = band = own_step = band_step = arrays = sources = draws = None
+        for block in blocks.values():
+            block.close()
+        connection.close()
+
+
+def _apply_event(grid, event_type, draws, span, masked, offset):
+    """
+    Apply a global event to a partition with random numbers drawn by the coordinator.
+    The operations are the ones of the NumpyKernels event kernels, in the same order.
+    """
+    if event_type == "earthquake":
+        grid.height -= draws[span]
+        np.maximum(grid.height, 0.0, out=grid.height)
+    elif event_type == "flood":
+        grid.water_level += draws[span]
+        np.minimum(grid.water_level, 1.0, out=grid.water_level)
+    elif event_type == "wildfire":
+        burned = grid.vegetation[masked] - draws[offset:offset + len(masked)]
+        grid.vegetation[masked] = np.maximum(burned, 0.0)
+    elif event_type == "rapid_growth":
+        grown = grid.vegetation[masked] + draws[offset:offset + len(masked)]
+        grid.vegetation[masked] = np.minimum(grown, 1.0)
+
+
+def _release(blocks, processes, connections):
+    """
+    Cleanup of a DomainDecomposition that was never closed (dropped, or failed while starting):
+    stop its workers and unlink its shared memory so no segment outlives the process.
+    """
+    for connection in connections:
+        connection.close()
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+    for block in blocks.values():
+        try:
+            block.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class DomainDecomposition:
+    """
+    Updates one HexGrid with several worker processes, each owning a contiguous run of q rows.
+
+    The grid's field arrays are moved into shared memory, so workers update their rows in place
+    and the coordinating process (the Simulation) keeps reading and writing the same grid. A day
+    runs in two phases separated by a barrier:
+
+    1. Every worker applies the per-cell rules (weather, seasons, erosion) to its rows and
+       publishes their vegetation source flags in a shared array.
+    2. Every worker applies vegetation spread and desertification to its rows. The only data read
+       from other partitions are the source flags of the two boundary rows next to its own.
+
+    Weather, the season and global events are decided by the coordinator and broadcast with the
+    phase commands, and the random numbers of a global event are drawn by the coordinator in grid
+    order. The result is therefore bit-identical to a serial run with the same seed.
+
+    Workers always run the numpy DailyStep. Call close() (or use the object as a context manager)
+    to release the shared memory; a decomposition that is garbage collected or still open at
+    interpreter exit is cleaned up by a finalizer.
+    """
+
+    def __init__(self, grid, workers=None, context=None):
+        """
+        :param grid: The HexGrid to update; its field arrays are replaced by shared-memory arrays.
+        :param workers: Number of worker processes (default: os.cpu_count()).
+        :param context: Optional multiprocessing context (or start method name) for the workers.
+        """
+        self.grid = grid
+        self.size = len(grid)
+        self.workers = workers or os.cpu_count() or 1
+        if context is None or isinstance(context, str):
+            context = multiprocessing.get_context(context)
+
+        dtype = grid.height.dtype
+        self._blocks = {}
+        self._arrays = {}
+        self._connections = []
+        self._processes = []
+        self._finalizer = weakref.finalize(self, _release, self._blocks, self._processes, self._connections)
+        buffers = [(name, np.int8 if name == "terrain_code" else dtype) for name in SHARED_FIELDS]
+        buffers += [("sources", np.bool_), ("draws", np.float64)]
+        for name, buffer_dtype in buffers:
+            block = shared_memory.SharedMemory(create=True, size=max(1, self.size * np.dtype(buffer_dtype).itemsize))
+            self._blocks[name] = block
+            self._arrays[name] = np.ndarray(self.size, dtype=buffer_dtype, buffer=block.buf)
+        for name in SHARED_FIELDS:
+            self._arrays[name][:] = getattr(grid, name)
+            setattr(grid, name, self._arrays[name])
+
+        names = {name: block.name for name, block in self._blocks.items()}
+        self.partitions = partition_rows(grid, self.workers)
+        for first, last in self.partitions:
+            band_rows = (max(first - 1, grid.q_min), min(last + 1, grid.q_max))
+            parent, child = context.Pipe()
+            process = context.Process(
+                target=_worker_main,
+                args=(child, names, self.size, dtype, grid.radius, (first, last), grid.row_span(first, last), band_rows, grid.row_span(*band_rows)),
+                daemon=True,
+            )
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+
+    def _broadcast(self, commands):
+        """
+        Send one command to every worker and wait for all of them (the barrier between phases).
+        :param commands: A command tuple for every worker, or one tuple sent to all.
+        :return: The reply values of the workers, in partition order.
+        """
+        if isinstance(commands, tuple):
+            commands = [commands] * len(self._connections)
+        for connection, command in zip(self._connections, commands):
+            connection.send(command)
+        replies = [connection.recv() for connection in self._connections]
+        for status, value in replies:
+            if status == "error":
+                raise RuntimeError(f"A simulation worker failed:\n{value}")
+        return [value for _, value in replies]
+
+    def step(self, weather, season, config, event_type=None, rng=None):
+        """
+        Apply the rules of one day to the whole grid.
+        :param weather: Weather dictionary produced by WeatherSystem.generate_weather.
+        :param season: Name of the current season.
+        :param config: A dictionary-like object containing the simulation parameters.
+        :param event_type: Global event of the day (if any), applied to every cell after the rules.
+        :param rng: numpy.random.Generator that draws the event's per-cell random numbers.
+        """
+        self._broadcast(("cells", weather, season, config))
+        counts = self._broadcast(("neighbors", config, event_type))
+        if not event_type:
+            return
+
+        draws = self._arrays["draws"]
+        if event_type in MASKED_EVENTS:
+            offsets = np.concatenate(([0], np.cumsum(counts)))
+            draws[:offsets[-1]] = rng.uniform(*EVENT_RANGES[event_type], size=int(offsets[-1]))
+        else:
+            offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+            draws[:] = rng.uniform(*EVENT_RANGES[event_type], size=self.size)
+        self._broadcast([("event", event_type, int(offset)) for offset in offsets[:-1]])
+
+    def close(self):
+        """
+        Stop the workers, copy the grid arrays back to private memory and release the shared memory.
+        """
+        if not self._processes:
+            return
+        for name in SHARED_FIELDS:
+            setattr(self.grid, name, self._arrays[name].copy())
+        for connection in self._connections:
+            connection.send(("close",))
+            connection.close()
+        for process in self._processes:
+            process.join()
+        self._arrays = {}
+        for block in self._blocks.values():
+            block.close()
+            block.unlink()
+        self._finalizer.detach()
+        self._blocks = {}
+        self._connections = []
+        self._processes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback_):
+        self.close()
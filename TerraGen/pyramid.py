@@ -0,0 +1,215 @@
+import json
+import os
+
+import numpy as np
+
+
+PYRAMID_FORMAT = "terragen-pyramid"
+
+# Rasterized fields kept at every level.
+PYRAMID_FIELDS = ("height", "terrain_code")
+
+
+def reduce_mean(raster):
+    """
+    Halve a raster by averaging 2x2 blocks. Odd edges are padded by repeating the last row or column.
+    :param raster: 2D float array.
+    :return: 2D array of shape (ceil(h / 2), ceil(w / 2)).
+    """
+    raster = _pad_even(raster)
+    return 0.25 * (raster[0::2, 0::2] + raster[1::2, 0::2] + raster[0::2, 1::2] + raster[1::2, 1::2])
+
+
+def reduce_mode(raster):
+    """
+    Halve a categorical raster (e.g. terrain codes) by keeping the most frequent value of each
+    2x2 block; ties go to the first value in row-major order.
+    :param raster: 2D integer array.
+    :return: 2D array of shape (ceil(h / 2), ceil(w / 2)).
+    """
+    raster = _pad_even(raster)
+    blocks = np.stack((raster[0::2, 0::2], raster[0::2, 1::2], raster[1::2, 0::2], raster[1::2, 1::2]))
+    counts = np.stack([(blocks == block).sum(axis=0) for block in blocks])
+    choice = np.argmax(counts, axis=0)
+    return np.take_along_axis(blocks, choice[None], axis=0)[0]
+
+
+def _pad_even(raster):
+    padding = ((0, raster.shape[0] % 2), (0, raster.shape[1] % 2))
+    return np.pad(raster, padding, mode="edge") if any(pad for _, pad in padding) else raster
+
+
+class TiledRaster:
+    """
+    A 2D raster stored as square tiles, shape (tile_rows, tile_cols, tile_size, tile_size), in
+    memory or in a memory-mapped .npy file. Reading a window only touches the tiles it overlaps,
+    so on disk a zoomed view reads a few tiles instead of the whole level.
+    """
+
+    def __init__(self, tiles, shape):
+        """
+        :param tiles: 4D tile array (or memmap).
+        :param shape: (height, width) of the raster without the tile padding.
+        """
+        self.tiles = tiles
+        self.shape = tuple(shape)
+        self.tile_size = tiles.shape[2]
+        self.tiles_read = 0
+
+    @classmethod
+    def from_array(cls, raster, tile_size, path=None):
+        """
+        Split a 2D raster into tiles.
+        :param raster: 2D array.
+        :param tile_size: Width and height of a tile in pixels.
+        :param path: Optional .npy path to store the tiles in (memory-mapped afterwards).
+        """
+        height, width = raster.shape
+        rows = -(-height // tile_size)
+        cols = -(-width // tile_size)
+        padded = np.zeros((rows * tile_size, cols * tile_size), dtype=raster.dtype)
+        padded[:height, :width] = raster
+        tiles = padded.reshape(rows, tile_size, cols, tile_size).swapaxes(1, 2)
+        if path is not None:
+            stored = np.lib.format.open_memmap(path, mode="w+", dtype=raster.dtype, shape=tiles.shape)
+            stored[:] = tiles
+            stored.flush()
+            del stored
+            tiles = np.load(path, mmap_mode="r")
+        else:
+            tiles = np.ascontiguousarray(tiles)
+        return cls(tiles, raster.shape)
+
+    def read(self, top=0, bottom=None, left=0, right=None):
+        """
+        Read a window of the raster.
+        :param top: First row.
+        :param bottom: Row after the last one (default: the height).
+        :param left: First column.
+        :param right: Column after the last one (default: the width).
+        :return: A 2D array of shape (bottom - top, right - left).
+        """
+        bottom = self.shape[0] if bottom is None else min(bottom, self.shape[0])
+        right = self.shape[1] if right is None else min(right, self.shape[1])
+        top, left = max(top, 0), max(left, 0)
+        size = self.tile_size
+        window = np.empty((max(bottom - top, 0), max(right - left, 0)), dtype=self.tiles.dtype)
+        for row in range(top // size, -(-bottom // size)):
+            for col in range(left // size, -(-right // size)):
+                y0, y1 = max(top, row * size), min(bottom, (row + 1) * size)
+                x0, x1 = max(left, col * size), min(right, (col + 1) * size)
+                window[y0 - top:y1 - top, x0 - left:x1 - left] = self.tiles[row, col, y0 - row * size:y1 - row * size, x0 - col * size:x1 - col * size]
+                self.tiles_read += 1
+        return window
+
+    def to_array(self):
+        """
+        Read the whole raster.
+        """
+        return self.read()
+
+
+class RasterPyramid:
+    """
+    Multi-resolution pyramid of the rasterized height and terrain fields.
+
+    Level 0 is the full-resolution raster and every following level halves both dimensions by
+    block reduction (mean for heights, majority for terrain codes), down to a few pixels. A view
+    of a given output size reads the finest level that has at most as many pixels as the view, so
+    the cost of a render depends on the output size rather than the world size. Levels
+    are stored as tiles, optionally on disk, so zooming into a sub-region reads only the tiles of
+    the finer level that cover it.
+    """
+
+    def __init__(self, levels, path=None):
+        """
+        :param levels: List (finest first) of dictionaries of field name to TiledRaster.
+        :param path: Directory the levels are stored in, if any.
+        """
+        self.levels = levels
+        self.path = path
+
+    @classmethod
+    def build(cls, height, terrain_code, tile_size=256, min_size=8, path=None):
+        """
+        Build the pyramid of full-resolution rasters.
+        :param height: 2D float raster of heights (e.g. Visualization.get_heightmap()).
+        :param terrain_code: 2D integer raster of terrain codes of the same shape.
+        :param tile_size: Tile width and height in pixels.
+        :param min_size: Stop once a level is at most this many pixels on its longest side.
+        :param path: Optional directory to store the tiles in, memory-mapped.
+        :return: The RasterPyramid.
+        """
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+        rasters = {"height": np.asarray(height), "terrain_code": np.asarray(terrain_code)}
+        levels = []
+        while True:
+            level = len(levels)
+            levels.append({
+                name: TiledRaster.from_array(raster, tile_size, None if path is None else os.path.join(path, f"{name}_{level}.npy"))
+                for name, raster in rasters.items()
+            })
+            if max(rasters["height"].shape) <= min_size:
+                break
+            rasters = {"height": reduce_mean(rasters["height"]), "terrain_code": reduce_mode(rasters["terrain_code"])}
+
+        if path is not None:
+            header = {"format": PYRAMID_FORMAT, "version": 1, "levels": [list(level["height"].shape) for level in levels]}
+            with open(os.path.join(path, "header.json"), "w") as f:
+                json.dump(header, f)
+        return cls(levels, path)
+
+    @classmethod
+    def open(cls, path):
+        """
+        Open a pyramid stored by build(path=...). The tiles are memory-mapped, not read.
+        """
+        with open(os.path.join(path, "header.json")) as f:
+            header = json.load(f)
+        if header.get("format") != PYRAMID_FORMAT:
+            raise ValueError(f"'{path}' is not a TerraGen pyramid.")
+        levels = [
+            {name: TiledRaster(np.load(os.path.join(path, f"{name}_{level}.npy"), mmap_mode="r"), shape) for name in PYRAMID_FIELDS}
+            for level, shape in enumerate(header["levels"])
+        ]
+        return cls(levels, path)
+
+    @property
+    def shape(self):
+        """
+        Shape of the full-resolution raster.
+        """
+        return self.levels[0]["height"].shape
+
+    def level_for(self, size, window=None):
+        """
+        Pick the finest level whose read of the window has at most ``size`` pixels along its longer
+        side (the coarsest level if none is that small).
+        :param size: Maximum output size in pixels (samples along the longer side).
+        :param window: Optional (top, bottom, left, right) window in full-resolution pixels.
+        :return: The level number.
+        """
+        top, bottom, left, right = window or (0, self.shape[0], 0, self.shape[1])
+        for level, rasters in enumerate(self.levels):
+            scale = 2 ** level
+            height, width = rasters["height"].shape
+            rows = min(-(-bottom // scale), height) - top // scale
+            cols = min(-(-right // scale), width) - left // scale
+            if max(rows, cols) <= size:
+                return level
+        return len(self.levels) - 1
+
+    def read(self, field, size, window=None):
+        """
+        Read a field at the resolution matching an output size.
+        :param field: "height" or "terrain_code".
+        :param size: Maximum output size in pixels along the longer side of the window.
+        :param window: Optional (top, bottom, left, right) window in full-resolution pixels.
+        :return: Tuple of the raster and its level.
+        """
+        level = self.level_for(size, window)
+        top, bottom, left, right = window or (0, self.shape[0], 0, self.shape[1])
+        scale = 2 ** level
+        raster = self.levels[level][field].read(top // scale, -(-bottom // scale), left // scale, -(-right // scale))
+        return raster, level
@@ -0,0 +1,357 @@
+import csv
+import os
+
+import numpy as np
+
+from terrain import TERRAIN_CODES, TERRAIN_TYPES
+
+
+class Reducer:
+    """
+    Base class for streaming statistics. Simulation calls update() once per day, after the day's
+    rules and events, and a reducer keeps only the aggregates it reports, so a run needs no per-cell
+    snapshots at all.
+
+    States are mergeable: merge() combines the statistics of another run with the same settings
+    (e.g. another ensemble member), and state()/from_state() turn a reducer into a JSON-serializable
+    dictionary and back so states can travel between processes or be stored.
+    """
+    name = "reducer"
+
+    def __init__(self, every=1):
+        """
+        :param every: Record every N-th day only.
+        """
+        self.every = every
+
+    def open(self, grid):
+        """
+        Look at the grid before the first day (Simulation calls it once the world is generated).
+        :param grid: The initial HexGrid.
+        """
+
+    def records(self, day):
+        """
+        Check whether the given day is sampled.
+        """
+        return day % self.every == 0
+
+    def update(self, day, grid, weather, event_type):
+        """
+        Add the state of the grid at the end of a day.
+        :param day: Day number.
+        :param grid: The HexGrid after the day's update.
+        :param weather: Weather dictionary of the day.
+        :param event_type: The event type triggered on this day (if any), or the list of event records in local mode.
+        """
+        raise NotImplementedError
+
+    def merge(self, other):
+        """
+        Add the statistics of another reducer of the same type and settings to this one.
+        :return: This reducer.
+        """
+        raise NotImplementedError
+
+    def state(self):
+        """
+        Get the JSON-serializable state of the reducer.
+        """
+        raise NotImplementedError
+
+    def rows(self):
+        """
+        Get the summary table of the reducer as a list of dictionaries, one per row.
+        """
+        raise NotImplementedError
+
+
+class _DailyCounts(Reducer):
+    """
+    Reducer holding one array of counts or sums per sampled day, merged by adding the arrays.
+
+    The summary tables have one row per sampled day, so memory grows linearly with the number of
+    sampled days. Sample less often with ``every``, or set ``window`` to keep only the most recent
+    sampled days (older days are dropped from the tables).
+    """
+
+    def __init__(self, every=1, window=None):
+        """
+        :param every: Record every N-th day only.
+        :param window: Optional number of most recent sampled days to keep.
+        """
+        super().__init__(every)
+        self.window = window
+        self.days = {}
+        self.members = {}
+
+    def _add(self, day, values, members=1):
+        if day in self.days:
+            self.days[day] = self.days[day] + values
+            self.members[day] += members
+        else:
+            self.days[day] = np.array(values, dtype=np.float64)
+            self.members[day] = members
+            if self.window is not None and len(self.days) > self.window:
+                oldest = min(self.days)
+                del self.days[oldest]
+                del self.members[oldest]
+
+    def merge(self, other):
+        if type(other) is not type(self) or other.settings() != self.settings():
+            raise ValueError(f"Cannot merge {type(other).__name__} {other.settings()} into {type(self).__name__} {self.settings()}.")
+        for day in sorted(other.days):
+            self._add(day, other.days[day], other.members[day])
+        return self
+
+    def settings(self):
+        return {"every": self.every, "window": self.window}
+
+    def state(self):
+        days = sorted(self.days)
+        return {
+            "type": type(self).__name__,
+            "settings": self.settings(),
+            "days": days,
+            "members": [self.members[day] for day in days],
+            "values": [self.days[day].tolist() for day in days],
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        reducer = cls(**state["settings"])
+        for day, members, values in zip(state["days"], state["members"], state["values"]):
+            reducer._add(day, np.asarray(values, dtype=np.float64), members)
+        return reducer
+
+
+class TerrainHistogram(_DailyCounts):
+    """
+    Number of cells of every terrain type per day (averaged over merged members).
+    """
+    name = "terrain_histogram"
+
+    def update(self, day, grid, weather, event_type):
+        if self.records(day):
+            self._add(day, np.bincount(grid.terrain_code, minlength=len(TERRAIN_TYPES)))
+
+    def rows(self):
+        rows = []
+        for day in sorted(self.days):
+            counts = self.days[day] / self.members[day]
+            total = counts.sum() or 1.0
+            row = {"day": day, "members": self.members[day]}
+            row.update({name: float(count) for name, count in zip(TERRAIN_TYPES, counts)})
+            row.update({f"{name}_fraction": float(count / total) for name, count in zip(TERRAIN_TYPES, counts)})
+            rows.append(row)
+        return rows
+
+
+class FieldDistribution(_DailyCounts):
+    """
+    Distribution of a grid field per terrain type per day: mean and percentiles, estimated from a
+    fixed-bin histogram so that distributions of different runs can be added. Values outside
+    value_range fall into the first or last bin. Memory per sampled day is O(terrain types x bins),
+    so a long run should set ``every`` or ``window``.
+    """
+
+    def __init__(self, field="vegetation", bins=50, value_range=(0.0, 1.0), percentiles=(10, 50, 90), every=1, window=None):
+        """
+        :param field: Name of the HexGrid field (e.g. "vegetation", "water_level", "height").
+        :param bins: Number of histogram bins.
+        :param value_range: (low, high) range of the bins.
+        :param percentiles: Percentiles reported in the summary table.
+        :param every: Record every N-th day only.
+        :param window: Optional number of most recent sampled days to keep.
+        """
+        super().__init__(every, window)
+        self.field = field
+        self.bins = bins
+        self.value_range = tuple(value_range)
+        self.percentiles = tuple(percentiles)
+        self.name = f"{field}_distribution"
+
+    def settings(self):
+        return {"field": self.field, "bins": self.bins, "value_range": list(self.value_range), "percentiles": list(self.percentiles), "every": self.every, "window": self.window}
+
+    def update(self, day, grid, weather, event_type):
+        if not self.records(day):
+            return
+        values = getattr(grid, self.field)
+        codes = grid.terrain_code.astype(np.intp)
+        low, high = self.value_range
+        indices = ((values - low) * (self.bins / (high - low))).astype(np.intp)
+        np.clip(indices, 0, self.bins - 1, out=indices)
+        indices += codes * self.bins
+        types = len(TERRAIN_TYPES)
+        histogram = np.bincount(indices, minlength=types * self.bins)
+        sums = np.bincount(codes, weights=values, minlength=types)
+        # One row per terrain type: the histogram bins followed by the sum of the values
+        self._add(day, np.column_stack((histogram.reshape(types, self.bins), sums)))
+
+    def _percentile(self, histogram, percentile):
+        cumulative = np.cumsum(histogram)
+        target = cumulative[-1] * percentile / 100.0
+        index = int(np.searchsorted(cumulative, target))
+        index = min(index, self.bins - 1)
+        below = cumulative[index - 1] if index > 0 else 0.0
+        inside = (target - below) / histogram[index] if histogram[index] else 0.0
+        low, high = self.value_range
+        return low + (index + inside) * (high - low) / self.bins
+
+    def rows(self):
+        rows = []
+        for day in sorted(self.days):
+            table = self.days[day]
+            for name, row in (("all", table.sum(axis=0)),) + tuple(zip(TERRAIN_TYPES, table)):
+                count = row[:-1].sum()
+                if not count:
+                    continue
+                entry = {"day": day, "members": self.members[day], "terrain": name, "cells": float(count / self.members[day]), "mean": float(row[-1] / count)}
+                for percentile in self.percentiles:
+                    entry[f"p{percentile:g}"] = float(self._percentile(row[:-1], percentile))
+                rows.append(entry)
+        return rows
+
+
+class DesertConversions(Reducer):
+    """
+    Number of cells converted to desert per day and in total. The daily rules only ever turn cells
+    into desert, so conversions are the daily increase of the desert count and no per-cell state
+    is kept. The count before the first day is taken by open(); without it, counting starts at the
+    first update.
+    """
+    name = "desert_conversions"
+
+    def __init__(self, every=1):
+        """
+        :param every: Report every N-th day only (conversions of the skipped days are included).
+        """
+        super().__init__(every)
+        self.previous = None
+        self.pending = 0
+        self.days = {}
+        self.members = {}
+
+    def open(self, grid):
+        self.previous = int(np.count_nonzero(grid.terrain_code == TERRAIN_CODES["desert"]))
+
+    def update(self, day, grid, weather, event_type):
+        deserts = int(np.count_nonzero(grid.terrain_code == TERRAIN_CODES["desert"]))
+        if self.previous is not None:
+            self.pending += max(deserts - self.previous, 0)
+        self.previous = deserts
+        if self.records(day):
+            self.days[day] = self.days.get(day, 0) + self.pending
+            self.members[day] = self.members.get(day, 0) + 1
+            self.pending = 0
+
+    def settings(self):
+        return {"every": self.every}
+
+    def merge(self, other):
+        if type(other) is not type(self) or other.settings() != self.settings():
+            raise ValueError(f"Cannot merge {type(other).__name__} {other.settings()} into {type(self).__name__} {self.settings()}.")
+        for day, count in other.days.items():
+            self.days[day] = self.days.get(day, 0) + count
+            self.members[day] = self.members.get(day, 0) + other.members[day]
+        # A merged reducer is read-only: the desert counts of different runs do not describe one grid
+        self.previous = None
+        self.pending = 0
+        return self
+
+    def state(self):
+        days = sorted(self.days)
+        return {
+            "type": type(self).__name__,
+            "settings": self.settings(),
+            "days": days,
+            "members": [self.members[day] for day in days],
+            "values": [self.days[day] for day in days],
+            "previous": self.previous,
+            "pending": self.pending,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        reducer = cls(**state["settings"])
+        for day, members, count in zip(state["days"], state["members"], state["values"]):
+            reducer.days[day] = count
+            reducer.members[day] = members
+        reducer.previous = state.get("previous")
+        reducer.pending = state.get("pending", 0)
+        return reducer
+
+    def rows(self):
+        rows = []
+        total = 0.0
+        for day in sorted(self.days):
+            conversions = self.days[day] / self.members[day]
+            total += conversions
+            rows.append({"day": day, "members": self.members[day], "conversions": conversions, "total": total})
+        return rows
+
+
+REDUCERS = {cls.__name__: cls for cls in (TerrainHistogram, FieldDistribution, DesertConversions)}
+
+
+def default_reducers(every=1, window=None):
+    """
+    Create the standard set of reducers: terrain histogram, vegetation and water distributions
+    per terrain type, and desert conversions.
+    :param every: Record every N-th day only.
+    :param window: Optional number of most recent sampled days kept by the histograms and distributions.
+    """
+    return [
+        TerrainHistogram(every=every, window=window),
+        FieldDistribution("vegetation", every=every, window=window),
+        FieldDistribution("water_level", every=every, window=window),
+        DesertConversions(every=every),
+    ]
+
+
+def reducer_from_state(state):
+    """
+    Rebuild a reducer from the dictionary returned by its state() method.
+    """
+    if state["type"] not in REDUCERS:
+        raise ValueError(f"Unknown reducer type '{state['type']}'. Expected one of {list(REDUCERS)}.")
+    return REDUCERS[state["type"]].from_state(state)
+
+
+def merge_states(states):
+    """
+    Merge the reducer states of several runs.
+    :param states: One list of reducer states (as returned by Simulation.reducer_states) per run,
+                   all created from the same reducer settings in the same order.
+    :return: List of merged reducers.
+    """
+    merged = None
+    for run in states:
+        reducers = [reducer_from_state(state) for state in run]
+        if merged is None:
+            merged = reducers
+        else:
+            for reducer, other in zip(merged, reducers):
+                reducer.merge(other)
+    return merged or []
+
+
+def write_tables(reducers, directory):
+    """
+    Write the summary table of every reducer to a CSV file named after the reducer.
+    :param reducers: Reducers to export.
+    :param directory: Output directory (created if needed).
+    :return: List of the written paths.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for reducer in reducers:
+        rows = reducer.rows()
+        path = os.path.join(directory, f"{reducer.name}.csv")
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ["day"])
+            writer.writeheader()
+            writer.writerows(rows)
+        paths.append(path)
+    return paths
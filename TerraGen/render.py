@@ -0,0 +1,129 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from history import weather_record
+from projection import HexProjection
+
+
+# Grid arrays copied into every frame snapshot.
+SNAPSHOT_FIELDS = ("height", "water_level", "vegetation", "terrain_code")
+
+
+def render_frame(path, day, snapshot, projection, weather, event_type, dpi=100):
+    """
+    Draw one day of the simulation to a PNG file without any GUI backend.
+    The figure is created through the object-oriented Agg API rather than pyplot, so frames can
+    be rendered from worker threads and processes.
+    :param path: Output PNG path.
+    :param day: The simulation day.
+    :param snapshot: Dictionary of copied grid arrays (see SNAPSHOT_FIELDS).
+    :param projection: HexProjection of the grid.
+    :param weather: Weather conditions of the day.
+    :param event_type: The event type triggered on this day (if any), or a list of event records.
+    :param dpi: Resolution of the output image.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from visualization import terrain_rgb_table
+
+    heightmap = projection.rasterize(snapshot["height"])
+    colored = projection.rasterize(terrain_rgb_table()[snapshot["terrain_code"]])
+    vegetation = projection.rasterize(snapshot["vegetation"])
+    water = projection.rasterize(snapshot["water_level"])
+
+    figure = Figure(figsize=(16, 4.5), dpi=dpi)
+    FigureCanvasAgg(figure)
+    panels = [
+        ("Height", heightmap, "gray"),
+        ("Terrain", colored, None),
+        ("Vegetation", vegetation, "Greens"),
+        ("Water Level", water, "Blues"),
+    ]
+    for position, (title, image, cmap) in enumerate(panels, start=1):
+        ax = figure.add_subplot(1, len(panels), position)
+        if cmap is None:
+            ax.imshow(image, interpolation="nearest", aspect="equal")
+        else:
+            ax.imshow(image, cmap=cmap, interpolation="nearest", aspect="equal", vmin=0.0, vmax=1.0)
+        ax.set_title(title)
+        ax.axis("off")
+
+    if isinstance(event_type, list):
+        event_type = ", ".join(event["type"] for event in event_type)
+    subtitle = ", ".join(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}" for key, value in weather.items())
+    figure.suptitle(f"Day {day + 1}" + (f" - Event: {event_type}" if event_type else "") + f"\n{subtitle}")
+    figure.savefig(path)
+
+
+class FrameRenderer:
+    """
+    Renders daily frames to PNG files on background workers while the simulation keeps running.
+
+    Each submitted day is a snapshot (copies of the grid arrays), so the simulation can keep
+    mutating its grid immediately. At most ``max_pending`` snapshots are queued or being rendered
+    at once; when the queue is full, submit() either waits for a worker (the default) or drops the
+    frame if ``drop_frames`` is set, so rendering can never exhaust memory.
+    """
+
+    def __init__(self, output_dir, grid, grid_width, max_pending=4, workers=1, use_processes=False, drop_frames=False, dpi=100, resolution=None):
+        """
+        :param output_dir: Directory the PNG frames are written to.
+        :param grid: The HexGrid being rendered (its topology must not change).
+        :param grid_width: Width and height of the legacy raster in pixels.
+        :param max_pending: Maximum number of snapshots held in memory at once.
+        :param workers: Number of rendering workers.
+        :param use_processes: Render in worker processes instead of threads.
+        :param drop_frames: Skip frames instead of waiting when max_pending is reached.
+        :param dpi: Resolution of the output images.
+        :param resolution: Raster width in pixels for hex-aware resampling (None for the legacy raster).
+        """
+        self.output_dir = output_dir
+        self.projection = HexProjection(grid, grid_width, resolution)
+        self.drop_frames = drop_frames
+        self.dpi = dpi
+        self.frames_submitted = 0
+        self.frames_dropped = 0
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._error = None
+        executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        self._executor = executor_class(max_workers=workers)
+        os.makedirs(output_dir, exist_ok=True)
+
+    def submit(self, day, grid, weather, event_type):
+        """
+        Snapshot the grid and queue the day for rendering.
+        :param day: The simulation day.
+        :param grid: The HexGrid after the day's updates.
+        :param weather: Weather conditions of the day.
+        :param event_type: The event type triggered on this day (if any).
+        :return: True if the frame was queued, False if it was dropped.
+        """
+        if self._error is not None:
+            raise RuntimeError("Rendering a frame failed.") from self._error
+
+        if not self._slots.acquire(blocking=not self.drop_frames):
+            self.frames_dropped += 1
+            return False
+
+        snapshot = {name: getattr(grid, name).copy() for name in SNAPSHOT_FIELDS}
+        path = os.path.join(self.output_dir, f"day_{day + 1:05d}.png")
+        future = self._executor.submit(
+            render_frame, path, day, snapshot, self.projection, weather_record(weather), event_type, self.dpi,
+        )
+        future.add_done_callback(self._frame_done)
+        self.frames_submitted += 1
+        return True
+
+    def _frame_done(self, future):
+        self._slots.release()
+        if future.exception() is not None and self._error is None:
+            self._error = future.exception()
+
+    def close(self):
+        """
+        Wait for every queued frame to be written and stop the workers.
+        """
+        self._executor.shutdown(wait=True)
+        if self._error is not None:
+            raise RuntimeError("Rendering a frame failed.") from self._error
@@ -1,14 +1,20 @@
-from config import Config
-from terrain import Terrain
+from config import Config, frozen_config
+from terrain import HexGrid, Terrain
 from weather import WeatherSystem, SeasonManager
 from interactions import InteractionsManager
 from events import EventManager
-from visualization import Visualization
+from kernels import get_kernels
+from history import MemoryHistoryWriter
+from instrumentation import NULL_INSTRUMENTATION
+import checkpoint
+import logging
 import numpy as np
 import json
 import os
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 
 class CustomEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -24,20 +30,46 @@ class CustomEncoder(json.JSONEncoder):
 
 
 class Simulation:
-    def __init__(self, config_preset="default"):
+    # Independent random streams spawned from the simulation seed, one per subsystem.
+    RNG_STREAMS = ("terrain", "weather", "events", "visualization")
+
+    def __init__(self, config_preset="default", backend=None, history=None, seed=None):
         """
         Initialize the simulation.
         :param config_preset: The name of the preset to use for the configuration.
+        :param backend: Kernel backend for the daily updates ("numpy", "numba" or "python"). Defaults to config.backend.
+        :param history: HistoryWriter that records each day (see history.py). Defaults to an in-memory
+                        MemoryHistoryWriter; use a streaming writer to keep memory flat on long runs.
+        :param seed: Seed (int or np.random.SeedSequence) that makes the whole run bit-reproducible.
+                     None seeds the run from fresh entropy; the chosen entropy is kept in seed_sequence.
         """
         self.config = Config(preset=config_preset)
+        self.backend = backend or self.config.backend
+        self.kernels = get_kernels(self.backend)
+        self.seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.rng = np.random.Generator(np.random.PCG64(self.seed_sequence))
+        self.rngs = {
+            name: np.random.Generator(np.random.PCG64(child))
+            for name, child in zip(self.RNG_STREAMS, self.seed_sequence.spawn(len(self.RNG_STREAMS)))
+        }
         self.terrain = None
         self.weather_system = None
         self.season_manager = None
         self.interactions_manager = None
         self.event_manager = None
-        self.visualization = None
+        self.daily_step = None
+        self.active_set = None
+        self.domain = None
+        self._visualization = None
+        self.renderer = None
+        self.reducers = []  # Streaming statistics updated every day (see reducers.py)
+        self.instrumentation = NULL_INSTRUMENTATION  # Phase metrics, off unless enable_instrumentation() is called
         self.current_day = 0
-        self.simulation_history = []
+        self.history = history if history is not None else MemoryHistoryWriter()
+        self.simulation_history = getattr(self.history, "frames", [])
+        self.checkpoint_dir = None
+        self.checkpoint_every = None
+        self.checkpoints_kept = 2
 
     def initialize_simulation(self):
         """
@@ -45,114 +77,329 @@ class Simulation:
         """
         # Initialize terrain with multiple presets
         presets = [
-            Config(preset="desert"),
-            Config(preset="forest"),
-            Config(preset="mountains"),
-            Config(preset="plains"),
-            Config(preset="arctic"),
+            frozen_config("desert", self.config.config_file),
+            frozen_config("forest", self.config.config_file),
+            frozen_config("mountains", self.config.config_file),
+            frozen_config("plains", self.config.config_file),
+            frozen_config("arctic", self.config.config_file),
         ]
-        self.terrain = Terrain(self.config)
+        self.terrain = Terrain(self.config, rng=self.rngs["terrain"])
         self.terrain.initialize_hex_grid(presets)  # Initialize the hexagonal grid
         self.terrain.generate(presets)            # Generate terrain for all regions
         self.terrain.normalize()                  # Normalize height values
         self.terrain.apply_water()                # Apply water levels
+        self.history.open(self.terrain.grid)      # Start recording the history
+        for reducer in self.reducers:
+            reducer.open(self.terrain.grid)
+        self.initialize_systems()
 
-        # Initialize other systems
-        self.weather_system = WeatherSystem(self.config.__dict__)
-        self.season_manager = SeasonManager()
-        self.interactions_manager = InteractionsManager(self.config.__dict__)
-        self.event_manager = EventManager(self.config.__dict__)
-        self.visualization = Visualization(self.terrain)
+    def initialize_systems(self):
+        """
+        Initialize the weather, season, interaction, event and visualization systems for the current terrain.
+        """
+        self.weather_system = WeatherSystem(self.config.__dict__, kernels=self.kernels, rng=self.rngs["weather"])
+        self.season_manager = SeasonManager(kernels=self.kernels)
+        self.interactions_manager = InteractionsManager(self.config.__dict__, kernels=self.kernels)
+        self.event_manager = EventManager(self.config.__dict__, kernels=self.kernels, rng=self.rngs["events"])
+        self.daily_step = None
+        self.active_set = None
+        if self.config.fused_step and self.kernels is not None and isinstance(self.terrain.grid, HexGrid):
+            if self.config.active_set:
+                from active import ActiveSet
+                self.active_set = ActiveSet(self.terrain.grid)
+            self.daily_step = self.kernels.create_step(self.terrain.grid, self.active_set)
+        self._visualization = None  # Created on first use, so headless runs never import matplotlib
+
+    @property
+    def visualization(self):
+        """
+        The Visualization of the terrain, created (and matplotlib imported) on first access.
+        """
+        if self._visualization is None and self.terrain is not None:
+            from visualization import Visualization
+            self._visualization = Visualization(self.terrain, rng=self.rngs["visualization"])
+        return self._visualization
 
-    def run_simulation(self, days=100, visualize=True):
+    def run_simulation(self, days=100, visualize=True, render_dir=None, **render_options):
         """
         Run the simulation for a specified number of days.
         :param days: Number of days to simulate.
         :param visualize: Whether to visualize daily updates.
+        :param render_dir: If given, render each day to a PNG frame in this directory on a background
+                           worker instead of opening interactive plot windows.
+        :param render_options: Extra FrameRenderer options (max_pending, workers, use_processes, drop_frames, dpi).
         """
-        print(f"Starting simulation for {days} days.")
-        for _ in range(days):
-            self.update_day(visualize)
+        logger.info("Starting simulation for %d days.", days)
+        if render_dir is not None:
+            from render import FrameRenderer
+            self.renderer = FrameRenderer(render_dir, self.terrain.grid, self.config.grid_width, **render_options)
+        try:
+            for _ in range(days):
+                self.update_day(visualize)
+        finally:
+            if self.renderer is not None:
+                self.renderer.close()
+                self.renderer = None
 
     def update_day(self, visualize=True):
         """
         Perform the daily update cycle.
         :param visualize: Whether to visualize the changes after each day.
         """
-        print(f"Day {self.current_day + 1}: Starting updates.")
+        logger.info("Day %d: Starting updates.", self.current_day + 1)
+        instrumentation = self.instrumentation
+        instrumentation.start_day(self.current_day)
+        grid = self.terrain.grid
+        cells = len(grid)
 
-        # Generate weather and apply effects
+        # Generate weather
         weather = self.weather_system.generate_weather()
-        self.weather_system.apply_weather_effects(self.terrain.grid)
+        parallel_event = None
+
+        if self.domain is not None:
+            # Update the grid partitions in parallel; a global event is decided first so the
+            # workers can apply it right after the day's rules
+            with instrumentation.phase("parallel_step", cells):
+                if self.event_manager.mode != "local":
+                    parallel_event = self.event_manager.trigger_event()
+                season = self.season_manager.get_current_season()
+                self.domain.step(weather, season, self.config.__dict__, parallel_event, self.event_manager.rng)
+        elif self.daily_step is not None:
+            # Apply weather, seasonal effects and terrain interactions in one fused pass
+            with instrumentation.phase("daily_step", cells):
+                season = self.season_manager.get_current_season()
+                self.daily_step.run(grid, weather, season, self.config.__dict__)
+        else:
+            # Apply weather effects
+            with instrumentation.phase("weather", cells):
+                self.weather_system.apply_weather_effects(grid)
 
-        # Apply seasonal effects
-        self.season_manager.apply_seasonal_effects(self.terrain.grid, self.config.__dict__)
+            # Apply seasonal effects
+            with instrumentation.phase("seasons", cells):
+                self.season_manager.apply_seasonal_effects(grid, self.config.__dict__)
 
-        # Apply terrain interactions
-        self.interactions_manager.apply_interactions(self.terrain.grid)
+            # Apply terrain interactions
+            with instrumentation.phase("interactions", cells):
+                self.interactions_manager.apply_interactions(grid)
 
         # Trigger and apply events
-        event_type = self.event_manager.trigger_event()
-        if event_type:
-            print(f"Event triggered: {event_type}")
-            self.event_manager.apply_event(event_type, self.terrain.grid)
+        with instrumentation.phase("events") as phase:
+            if self.event_manager.mode == "local":
+                events = self.event_manager.trigger_events(grid)
+                for event in events:
+                    logger.info("Event triggered: %s at (%d, %d), %d cells", event.event_type, event.q, event.r, len(event.cells))
+                    self.event_manager.apply_event(event.event_type, grid, event.cells)
+                    if self.active_set is not None:
+                        self.active_set.wake(event.cells)
+                phase.cells = sum(len(event.cells) for event in events)
+                event_type = [event.to_record() for event in events] or None
+            elif self.domain is not None:
+                # Already applied by the workers, and timed with their step
+                event_type = parallel_event
+                if event_type:
+                    logger.info("Event triggered: %s", event_type)
+            else:
+                event_type = self.event_manager.trigger_event()
+                if event_type:
+                    logger.info("Event triggered: %s", event_type)
+                    self.event_manager.apply_event(event_type, grid)
+                    if self.active_set is not None:
+                        self.active_set.wake()
+                    phase.cells = cells
+
+        # Refresh the regional aggregates of the day's final state
+        if self.terrain.spatial is not None:
+            with instrumentation.phase("spatial_index", cells):
+                self.terrain.refresh_spatial_index()
 
         # Save the current state
-        self.save_simulation_state(weather, event_type)
+        with instrumentation.phase("save_state", cells):
+            self.save_simulation_state(weather, event_type)
+
+        # Update the streaming statistics
+        if self.reducers:
+            with instrumentation.phase("reducers", cells):
+                for reducer in self.reducers:
+                    reducer.update(self.current_day, grid, weather, event_type)
 
         # Visualize the updates
-        if visualize:
-            self.visualize_day(weather, event_type)
+        if self.renderer is not None:
+            with instrumentation.phase("render", cells):
+                self.renderer.submit(self.current_day, grid, weather, event_type)
+        elif visualize:
+            with instrumentation.phase("visualization", cells):
+                self.visualize_day(weather, event_type)
 
         # Advance the day
         self.season_manager.advance_day()
         self.current_day += 1
 
+        # Write the periodic checkpoint
+        if self.checkpoint_every and self.current_day % self.checkpoint_every == 0:
+            with instrumentation.phase("checkpoint", cells):
+                self.write_periodic_checkpoint()
+
+    def add_reducer(self, reducer):
+        """
+        Register a streaming statistic (see reducers.Reducer) updated at the end of every day.
+        Combine it with a NullHistoryWriter to run long simulations without per-cell snapshots.
+        :param reducer: The Reducer.
+        :return: The reducer.
+        """
+        if self.terrain is not None:
+            reducer.open(self.terrain.grid)
+        self.reducers.append(reducer)
+        return reducer
+
+    def reducer_states(self):
+        """
+        Get the mergeable, JSON-serializable states of the registered reducers (see reducers.merge_states).
+        """
+        return [reducer.state() for reducer in self.reducers]
+
+    def summary_tables(self):
+        """
+        Get the summary table of every registered reducer.
+        :return: Dictionary of reducer name to its list of rows.
+        """
+        return {reducer.name: reducer.rows() for reducer in self.reducers}
+
+    def export_statistics(self, directory="output"):
+        """
+        Write the summary table of every registered reducer to a CSV file in a directory.
+        :param directory: Output directory.
+        """
+        from reducers import write_tables
+
+        for path in write_tables(self.reducers, directory):
+            print(f"Statistics saved to {path}.")
+
+    def enable_instrumentation(self, track_memory=False, window=100, observers=None, chrome_trace=None, jsonl=None):
+        """
+        Record the wall time, touched cells and allocated memory of every phase of each day
+        (see instrumentation.Instrumentation). Call disable_instrumentation() to stop and close the traces.
+        :param track_memory: Record allocated bytes per phase with tracemalloc (slows the run down).
+        :param window: Number of most recent days kept by the rolling summary.
+        :param observers: Callables called with every phase record.
+        :param chrome_trace: Optional path of a Chrome trace file to write.
+        :param jsonl: Optional path of a JSON lines file receiving every record.
+        :return: The Instrumentation; its summary.table() reports the slowest phases.
+        """
+        from instrumentation import Instrumentation
+
+        self.disable_instrumentation()
+        self.instrumentation = Instrumentation(track_memory, window, observers, chrome_trace, jsonl)
+        return self.instrumentation
+
+    def disable_instrumentation(self):
+        """
+        Stop recording phase metrics and close the trace files of enable_instrumentation().
+        """
+        self.instrumentation.close()
+        self.instrumentation = NULL_INSTRUMENTATION
+
+    def enable_parallel(self, workers=None):
+        """
+        Update the grid with several worker processes, each owning a contiguous run of q rows
+        (see parallel.DomainDecomposition). Results are identical to a serial run.
+        Call disable_parallel() to stop the workers and release their shared memory.
+        The workers run the numpy rules, so only the numpy backend can be parallelized.
+        :param workers: Number of worker processes (default: one per CPU core).
+        """
+        from parallel import DomainDecomposition
+
+        if self.kernels is None or self.kernels.name != "numpy":
+            raise ValueError(f"Parallel updates use the numpy kernels; backend '{self.backend}' is not supported.")
+        self.disable_parallel()
+        self.domain = DomainDecomposition(self.terrain.grid, workers)
+
+    def disable_parallel(self):
+        """
+        Stop the worker processes of enable_parallel() and continue serially.
+        """
+        if self.domain is not None:
+            self.domain.close()
+            self.domain = None
+            if self.active_set is not None:
+                self.active_set.refresh()  # The workers updated every cell
+
+    def enable_checkpoints(self, directory, every=100, keep=2):
+        """
+        Automatically checkpoint the simulation every N days.
+        :param directory: Directory the checkpoints are written to.
+        :param every: Number of days between checkpoints.
+        :param keep: Number of most recent checkpoints to keep on disk.
+        """
+        self.checkpoint_dir = directory
+        self.checkpoint_every = every
+        self.checkpoints_kept = keep
+
+    def write_periodic_checkpoint(self):
+        """
+        Write the checkpoint for the current day and delete the ones beyond the retention limit.
+        """
+        self.save_checkpoint(os.path.join(self.checkpoint_dir, f"checkpoint_day_{self.current_day:06d}.npz"))
+        checkpoints = sorted(
+            name for name in os.listdir(self.checkpoint_dir)
+            if name.startswith("checkpoint_day_") and name.endswith(".npz")
+        )
+        for name in checkpoints[:-self.checkpoints_kept]:
+            os.remove(os.path.join(self.checkpoint_dir, name))
+
+    def save_checkpoint(self, path):
+        """
+        Save the complete simulation state (grid, seasons, random generators, history position) to a binary checkpoint.
+        :param path: Checkpoint file path.
+        """
+        checkpoint.save_checkpoint(self, path)
+
+    @classmethod
+    def load_checkpoint(cls, path, history=None):
+        """
+        Restore a simulation from a checkpoint; running it continues bit-identically to the original run.
+        :param path: Checkpoint file path.
+        :param history: HistoryWriter to resume (e.g. one pointing at the original history directory).
+        :return: The restored Simulation.
+        """
+        return checkpoint.load_checkpoint(path, history=history)
+
     def save_simulation_state(self, weather, event_type):
         """
         Save the current state of the simulation for later analysis.
         :param weather: Current weather conditions.
-        :param event_type: The event type triggered on this day (if any).
-        """
-        state = {
-            "day": self.current_day,
-            "weather": {
-                key: float(value) if isinstance(value, (np.floating, np.integer)) else value
-                for key, value in weather.items()
-            },
-            "event": event_type,
-            "terrain": {
-                f"({q},{r})": {
-                    "height": float(cell.height),
-                    "water_level": float(cell.water_level),
-                    "terrain_type": cell.terrain_type,
-                    "vegetation": float(cell.vegetation),
-                    "temperature": float(cell.temperature),
-                }
-                for (q, r), cell in self.terrain.grid.items()
-            },
-        }
-        self.simulation_history.append(state)
+        :param event_type: The event type triggered on this day (if any), or the list of event records in local mode.
+        """
+        self.history.write_frame(self.current_day, weather, event_type, self.terrain.grid)
 
     def visualize_day(self, weather, event_type):
         """
         Visualize the terrain, weather, and events for the current day.
         :param weather: Current weather conditions.
-        :param event_type: The event type triggered on this day (if any).
+        :param event_type: The event type triggered on this day (if any), or the list of event records in local mode.
         """
-        print("Visualizing updates...")
+        logger.info("Visualizing updates...")
         self.visualization.plot_grayscale()
         self.visualization.plot_colored()
-        self.visualization.plot_3d_surface()
+        self.visualization.plot_3d_surface(day=self.current_day)
         self.visualization.plot_weather_overlay(weather)
-        if event_type:
+        if isinstance(event_type, list):
+            for event in event_type:
+                self.visualization.plot_event_effects(event["type"])
+        elif event_type:
             self.visualization.plot_event_effects(event_type)
 
     def export_simulation_history(self, filename=None):
         """
         Export the simulation history to a JSON file for analysis.
+        Streaming history writers have already written every day to disk, so they are just closed.
         :param filename: Optional name of the file to save the history. If None, it generates a name with date and time.
         """
+        if not isinstance(self.history, MemoryHistoryWriter):
+            self.history.close()
+            if getattr(self.history, "path", None):
+                print(f"Simulation history streamed to {self.history.path}.")
+            return
+
         os.makedirs("output", exist_ok=True)  # Ensure the output directory exists
     
         if filename is None:
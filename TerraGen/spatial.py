@@ -0,0 +1,152 @@
+import numpy as np
+
+from terrain import HexGrid
+
+
+# Fields indexed by default; "cells" counts the cells of a region.
+SPATIAL_FIELDS = HexGrid.FIELDS + ("cells",)
+
+
+class SpatialIndex:
+    """
+    Prefix-sum tables over the axial layout of a HexGrid for constant-time regional aggregates.
+
+    The grid is embedded in a (2R+1) x (2R+1) array indexed by (q + R, r + R), with zeros outside
+    the hexagon. Two tables are kept per field:
+
+    - ``S[a, b]``: the summed-area table, the sum over x <= a, y <= b.
+    - ``T[a, c]``: the sum over x <= a, x + y <= c, i.e. a summed-area table of the sheared layout.
+
+    A parallelogram (a q range by an r range) is four lookups in S. A hex disk is its bounding
+    parallelogram minus the two corner triangles cut off by |dq + dr| <= radius, and each triangle
+    is a handful of lookups in S and T, so disks cost the same at any radius; a ring is a disk minus
+    the disk inside it. All queries accept arrays of centers and radii and are answered with
+    vectorized lookups, so thousands of queries cost about as much as a few.
+
+    Sums are differences of prefix sums and may differ from a direct summation by rounding. Call
+    refresh() after the grid changed (Simulation does it once per day for the terrain's index).
+    """
+
+    def __init__(self, grid, fields=SPATIAL_FIELDS):
+        """
+        :param grid: The HexGrid to index.
+        :param fields: Names of the grid fields to index ("cells" for cell counts).
+        """
+        self.grid = grid
+        self.fields = tuple(fields)
+        self.radius = grid.radius
+        self.size = 2 * grid.radius + 1
+        self._x = grid.q + grid.radius
+        self._y = grid.r + grid.radius
+        self.area = {}
+        self.sheared = {}
+        self.refresh()
+
+    def refresh(self):
+        """
+        Rebuild the prefix-sum tables from the current grid values.
+        """
+        n = self.size
+        dense = np.zeros((n, n))
+        sheared = np.zeros((n, 2 * n - 1))
+        for name in self.fields:
+            values = 1.0 if name == "cells" else getattr(self.grid, name)
+            dense[self._x, self._y] = values
+            sheared[self._x, self._x + self._y] = values
+
+            # Leading row and column of zeros, so index -1 (an empty range) reads 0
+            area = np.zeros((n + 1, n + 1))
+            np.cumsum(np.cumsum(dense, axis=0), axis=1, out=area[1:, 1:])
+            diagonal = np.zeros((n + 1, 2 * n))
+            np.cumsum(np.cumsum(sheared, axis=0), axis=1, out=diagonal[1:, 1:])
+            self.area[name] = area
+            self.sheared[name] = diagonal
+
+    def _area(self, name, a, b):
+        """
+        Sum over x <= a, y <= b.
+        """
+        n = self.size
+        return self.area[name][np.clip(a, -1, n - 1) + 1, np.clip(b, -1, n - 1) + 1]
+
+    def _diagonal(self, name, a, c):
+        """
+        Sum over x <= a, x + y <= c.
+        """
+        n = self.size
+        return self.sheared[name][np.clip(a, -1, n - 1) + 1, np.clip(c, -1, 2 * n - 2) + 1]
+
+    def _above(self, name, a, b, c):
+        """
+        Sum over x <= a, y <= b, x + y > c.
+        """
+        # Cells with x <= m and y <= b all have x + y <= c, so the ones with y > b are T(m, c) - S(m, b)
+        m = np.minimum(a, c - b - 1)
+        below = self._diagonal(name, a, c) - np.where(m >= -1, self._diagonal(name, m, c) - self._area(name, m, b), 0.0)
+        return self._area(name, a, b) - below
+
+    def _box(self, function, x0, x1, y0, y1, *extra):
+        return function(x1, y1, *extra) - function(x0 - 1, y1, *extra) - function(x1, y0 - 1, *extra) + function(x0 - 1, y0 - 1, *extra)
+
+    def parallelogram_sum(self, field, q_first, q_last, r_first, r_last):
+        """
+        Sum a field over the cells with q_first <= q <= q_last and r_first <= r <= r_last.
+        :param field: Indexed field name ("cells" counts the cells).
+        :return: The sum (an array if any argument is an array).
+        """
+        R = self.radius
+        x0, x1, y0, y1 = (np.asarray(value) + R for value in (q_first, q_last, r_first, r_last))
+        total = self._box(lambda a, b: self._area(field, a, b), x0, x1, y0, y1)
+        return np.where((x1 >= x0) & (y1 >= y0), total, 0.0)
+
+    def disk_sum(self, field, q, r, radius):
+        """
+        Sum a field over the cells within ``radius`` hexes of (q, r), clipped to the grid.
+        :param field: Indexed field name ("cells" counts the cells).
+        :param q: Axial q coordinate of the center (or array of them).
+        :param r: Axial r coordinate of the center (or array of them).
+        :param radius: Distance in hexes (or array of them); negative radii give empty disks.
+        :return: The sum (an array if any argument is an array).
+        """
+        R = self.radius
+        x = np.asarray(q) + R
+        y = np.asarray(r) + R
+        k = np.asarray(radius)
+        x0, x1, y0, y1 = x - k, x + k, y - k, y + k
+        box = self._box(lambda a, b: self._area(field, a, b), x0, x1, y0, y1)
+        # Corner beyond dq + dr > k, and corner beyond dq + dr < -k (everything in the box minus x + y >= s - k)
+        upper = self._box(lambda a, b, c: self._above(field, a, b, c), x0, x1, y0, y1, x + y + k)
+        lower = box - self._box(lambda a, b, c: self._above(field, a, b, c), x0, x1, y0, y1, x + y - k - 1)
+        return np.where(k >= 0, box - upper - lower, 0.0)
+
+    def ring_sum(self, field, q, r, radius):
+        """
+        Sum a field over the cells at exactly ``radius`` hexes from (q, r), clipped to the grid.
+        :param field: Indexed field name ("cells" counts the cells).
+        :return: The sum (an array if any argument is an array).
+        """
+        return self.disk_sum(field, q, r, radius) - self.disk_sum(field, q, r, np.asarray(radius) - 1)
+
+    def parallelogram_mean(self, field, q_first, q_last, r_first, r_last):
+        """
+        Mean of a field over a parallelogram (NaN where the region holds no cells).
+        """
+        return _mean(self.parallelogram_sum(field, q_first, q_last, r_first, r_last), self.parallelogram_sum("cells", q_first, q_last, r_first, r_last))
+
+    def disk_mean(self, field, q, r, radius):
+        """
+        Mean of a field within ``radius`` hexes of (q, r) (NaN where the region holds no cells).
+        """
+        return _mean(self.disk_sum(field, q, r, radius), self.disk_sum("cells", q, r, radius))
+
+    def ring_mean(self, field, q, r, radius):
+        """
+        Mean of a field at exactly ``radius`` hexes from (q, r) (NaN where the region holds no cells).
+        """
+        return _mean(self.ring_sum(field, q, r, radius), self.ring_sum("cells", q, r, radius))
+
+
+def _mean(total, count):
+    count = np.rint(count)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / np.maximum(count, 1), np.nan)
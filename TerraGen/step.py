@@ -0,0 +1,200 @@
+import numpy as np
+
+from terrain import TERRAIN_CODES
+
+
+class DailyStep:
+    """
+    Fused daily update of a HexGrid: weather, seasonal effects and terrain interactions in one pass
+    per field, with every intermediate held in scratch buffers allocated once per grid.
+
+    The rules are the ones of NumpyKernels and are applied in the same order with the same
+    floating-point operations, so a day computed here is bit-identical to the separate
+    apply_weather_effects, apply_seasonal_effects and apply_interactions calls. What changes is how
+    the grid is traversed:
+
+    - The water level is updated in one sequence of in-place ufuncs (rain, snow, wind, drought,
+      seasonal snow, erosion) instead of being re-read, re-masked and re-clamped by three systems.
+    - The height, ocean and desert masks are computed once per day and shared by every rule.
+    - Masked updates use ``where=`` instead of fancy indexing, so no temporaries are allocated.
+    - Vegetation spread sums the six neighbor columns into a small counter instead of
+      gathering an (N, 6) table.
+
+    The day is split into apply_cell_rules, which only touches each cell's own values, and
+    apply_neighbor_rules, which reads the vegetation source flags of the neighbors. Running the two
+    halves separately lets a grid be updated in parallel partitions (see parallel.py).
+
+    Events stay with EventManager, which only touches the cells an event affects.
+    """
+
+    def __init__(self, grid):
+        """
+        Allocate the scratch buffers for a grid.
+        :param grid: The HexGrid to update (its topology must not change until bind() is called).
+        """
+        self.capacity = 0
+        self.bind(grid)
+
+    def bind(self, grid):
+        """
+        Point the step at a grid, possibly with another topology, and rebuild its neighbor table.
+        The scratch buffers are only reallocated when the grid has more cells than any grid bound
+        before, so one step can update a sequence of grids (e.g. the bands of a tiled world) with
+        the memory of the largest one.
+        :param grid: The HexGrid to update from now on.
+        """
+        size = len(grid)
+        if size > self.capacity:
+            self._flags = np.empty((5, size), dtype=bool)
+            self._sources = np.empty(size + 1, dtype=bool)
+            self._counts = np.empty(size, dtype=np.int8)
+            self._columns = np.empty((grid.neighbor_index.shape[1], size), dtype=np.intp)
+            self.capacity = size
+        self.size = size
+        self.high, self.land, self.fertile, self.mask, self.gathered = self._flags[:, :size]
+        self.sources = self._sources[:size + 1]  # Last entry is the off-grid sentinel
+        self.sources[:] = False
+        self.counts = self._counts[:size]
+        self.neighbor_columns = self._columns[:, :size]
+        np.copyto(self.neighbor_columns, grid.neighbor_index.T)
+
+    def matches(self, grid):
+        """
+        Check whether the scratch buffers were allocated for the topology of the given grid.
+        """
+        return self.size == len(grid)
+
+    def run(self, grid, weather, season, config):
+        """
+        Apply the weather, seasonal and interaction rules of one day.
+        :param grid: The HexGrid to update.
+        :param weather: Weather dictionary produced by WeatherSystem.generate_weather.
+        :param season: Name of the current season.
+        :param config: A dictionary-like object containing the simulation parameters.
+        """
+        self.apply_cell_rules(grid, weather, season, config)
+        self.apply_neighbor_rules(grid, config)
+
+    def apply_cell_rules(self, grid, weather, season, config):
+        """
+        Apply the rules that only read and write a cell's own values (weather, seasonal effects and
+        erosion), then record which cells spread vegetation in self.sources.
+        :param grid: The HexGrid to update.
+        :param weather: Weather dictionary produced by WeatherSystem.generate_weather.
+        :param season: Name of the current season.
+        :param config: A dictionary-like object containing the simulation parameters.
+        """
+        height = grid.height
+        water = grid.water_level
+        vegetation = grid.vegetation
+        high, land, fertile, mask = self.high, self.land, self.fertile, self.mask
+        interaction_factors = config["interaction_factors"]
+        snow_accumulation = config["weather_impact"]["snow_accumulation"]
+        seasonal_effects = config["seasonal_effects"].get(season, {})
+
+        np.not_equal(grid.terrain_code, TERRAIN_CODES["ocean"], out=land)
+        np.not_equal(grid.terrain_code, TERRAIN_CODES["desert"], out=fertile)
+
+        # Weather
+        self._apply_weather(grid, weather, config)
+
+        # Seasons. Water is already within [0, 1] after the weather, so it is only clamped again when
+        # seasonal snow changes it; the desert decrease is clamped by the vegetation clip.
+        if "vegetation_growth_multiplier" in seasonal_effects:
+            vegetation *= seasonal_effects["vegetation_growth_multiplier"]
+        if "desertification_rate_multiplier" in seasonal_effects:
+            decrease = interaction_factors["desertification_rate"] * seasonal_effects["desertification_rate_multiplier"]
+            np.logical_not(fertile, out=mask)
+            np.subtract(vegetation, decrease, out=vegetation, where=mask)
+        np.clip(vegetation, 0.0, 1.0, out=vegetation)
+        if "snow_accumulation_multiplier" in seasonal_effects:
+            np.add(water, snow_accumulation * seasonal_effects["snow_accumulation_multiplier"], out=water, where=high)
+            np.clip(water, 0.0, 1.0, out=water)
+
+        # Erosion
+        erosion_rate = interaction_factors["erosion_rate"]
+        np.greater(water, 0, out=mask)
+        mask &= land
+        np.subtract(height, erosion_rate, out=height, where=mask)
+        np.maximum(height, 0.0, out=height, where=mask)
+        np.subtract(water, erosion_rate, out=water, where=mask)
+        np.maximum(water, 0.0, out=water, where=mask)
+
+        # Vegetation sources, read by the neighbor rules
+        sources = self.sources[:-1]
+        np.greater(water, 0.3, out=sources)
+        sources &= fertile
+
+    def _apply_weather(self, grid, weather, config):
+        """
+        Apply the day's weather to the water level of every cell and leave the high-ground mask
+        (height > 0.6) in self.high.
+        """
+        water = grid.water_level
+        high = self.high
+        np.greater(grid.height, 0.6, out=high)
+        if not weather["drought"] and weather["rain_intensity"] > 0.2:
+            water += weather["rain_intensity"] * config["weather_impact"]["rain_absorption"]
+        if weather["snow_intensity"] > 0.2:
+            np.add(water, weather["snow_intensity"] * config["weather_impact"]["snow_accumulation"], out=water, where=high)
+        water -= weather["wind_speed"] * 0.01
+        np.clip(water, 0.0, 1.0, out=water)
+        if weather["drought"]:
+            water *= 0.9
+
+    def apply_neighbor_rules(self, grid, config, sources=None, rows=None):
+        """
+        Apply the rules that read neighboring cells (vegetation spread) and the desertification that
+        follows them. Must run after apply_cell_rules has been applied to every cell and its neighbors.
+        :param grid: The HexGrid to update.
+        :param config: A dictionary-like object containing the simulation parameters.
+        :param sources: Optional vegetation source flags of every cell of the grid, when they were
+                        computed elsewhere (default: the flags of the last apply_cell_rules call).
+        :param rows: Optional slice of the cells that may be modified; the other cells are only read.
+        """
+        water = grid.water_level
+        vegetation = grid.vegetation
+        land, fertile, mask = self.land, self.fertile, self.mask
+        interaction_factors = config["interaction_factors"]
+        if sources is not None:
+            self.sources[:-1] = sources
+
+        np.not_equal(grid.terrain_code, TERRAIN_CODES["ocean"], out=land)
+        np.not_equal(grid.terrain_code, TERRAIN_CODES["desert"], out=fertile)
+        if rows is not None:
+            for outside in (slice(None, rows.start), slice(rows.stop, None)):
+                land[outside] = False
+                fertile[outside] = False
+
+        # Vegetation spread
+        self._spread_vegetation(vegetation, interaction_factors["vegetation_growth"])
+
+        # Desertification
+        np.less(water, 0.1, out=mask)
+        mask &= land
+        np.subtract(vegetation, interaction_factors["desertification_rate"], out=vegetation, where=mask)
+        np.maximum(vegetation, 0.0, out=vegetation, where=mask)
+        np.equal(vegetation, 0.0, out=self.gathered)
+        mask &= self.gathered
+        grid.terrain_code[mask] = TERRAIN_CODES["desert"]
+
+    def _spread_vegetation(self, vegetation, growth_rate):
+        """
+        Give every fertile cell one capped growth step per neighbor flagged in self.sources.
+        """
+        fertile, mask, gathered, counts = self.fertile, self.mask, self.gathered, self.counts
+
+        counts.fill(0)
+        for column in self.neighbor_columns:
+            np.take(self.sources, column, out=gathered)
+            counts += gathered
+
+        for step in range(1, len(self.neighbor_columns) + 1):
+            np.greater_equal(counts, step, out=mask)
+            mask &= fertile
+            np.less(vegetation, 1.0, out=gathered)
+            mask &= gathered
+            if not mask.any():
+                break
+            np.add(vegetation, growth_rate, out=vegetation, where=mask)
+            np.minimum(vegetation, 1.0, out=vegetation, where=mask)
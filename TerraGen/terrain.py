@@ -1,5 +1,55 @@
+from collections.abc import Mapping
+from functools import lru_cache
+
 import numpy as np
-from noise import pnoise2
+
+from noise_field import fractal_noise
+
+
+# Terrain types are stored in the grid as small integer codes; the code is the index in this tuple.
+TERRAIN_TYPES = ("default", "desert", "forest", "mountains", "plains", "arctic", "ocean")
+TERRAIN_CODES = {name: code for code, name in enumerate(TERRAIN_TYPES)}
+
+# Axial offsets of the six neighbors of a hex, in the order used by HexGrid.neighbor_index.
+HEX_DIRECTIONS = ((+1, 0), (-1, 0), (0, +1), (0, -1), (+1, -1), (-1, +1))
+
+# The same directions in the order they are walked around a ring.
+RING_DIRECTIONS = ((+1, 0), (+1, -1), (0, -1), (-1, 0), (-1, +1), (0, +1))
+
+
+@lru_cache(maxsize=64)
+def hex_disk_offsets(radius):
+    """
+    Get the axial offsets of every hex within a distance of the origin, in q-major order.
+    :param radius: Distance in hexes.
+    :return: Tuple of read-only (dq, dr) arrays.
+    """
+    dq_values = np.arange(-radius, radius + 1)
+    dr_min = np.maximum(-radius, -dq_values - radius)
+    lengths = np.minimum(radius, -dq_values + radius) - dr_min + 1
+    dq = np.repeat(dq_values, lengths)
+    dr = np.arange(len(dq)) - np.repeat(np.cumsum(lengths) - lengths - dr_min, lengths)
+    dq.flags.writeable = False
+    dr.flags.writeable = False
+    return dq, dr
+
+
+@lru_cache(maxsize=64)
+def hex_ring_offsets(radius):
+    """
+    Get the axial offsets of every hex at exactly a distance from the origin, walked around the ring.
+    :param radius: Distance in hexes.
+    :return: Tuple of read-only (dq, dr) arrays.
+    """
+    if radius == 0:
+        dq, dr = np.zeros(1, dtype=np.intp), np.zeros(1, dtype=np.intp)
+    else:
+        steps = np.repeat(np.array(RING_DIRECTIONS), radius, axis=0)
+        positions = np.array([-radius, radius]) + np.cumsum(steps, axis=0) - steps
+        dq, dr = positions[:, 0].copy(), positions[:, 1].copy()
+    dq.flags.writeable = False
+    dr.flags.writeable = False
+    return dq, dr
 
 
 class Cell:
@@ -23,10 +73,293 @@ class Cell:
         self.temperature = temperature
 
 
+class CellView(Cell):
+    """
+    A Cell-like view onto one entry of a HexGrid. Attribute reads and writes go straight to the
+    grid arrays, so code written against Cell objects keeps working unchanged.
+    """
+    __slots__ = ("_grid", "_index")
+
+    def __init__(self, grid, index):
+        """
+        Create a view of a single grid cell.
+        :param grid: The HexGrid holding the cell data.
+        :param index: Dense index of the cell in the grid arrays.
+        """
+        self._grid = grid
+        self._index = index
+
+    @property
+    def index(self):
+        return self._index
+
+    @property
+    def q(self):
+        return int(self._grid.q[self._index])
+
+    @property
+    def r(self):
+        return int(self._grid.r[self._index])
+
+    @property
+    def height(self):
+        return self._grid.height[self._index]
+
+    @height.setter
+    def height(self, value):
+        self._grid.height[self._index] = value
+
+    @property
+    def water_level(self):
+        return self._grid.water_level[self._index]
+
+    @water_level.setter
+    def water_level(self, value):
+        self._grid.water_level[self._index] = value
+
+    @property
+    def vegetation(self):
+        return self._grid.vegetation[self._index]
+
+    @vegetation.setter
+    def vegetation(self, value):
+        self._grid.vegetation[self._index] = value
+
+    @property
+    def temperature(self):
+        return self._grid.temperature[self._index]
+
+    @temperature.setter
+    def temperature(self, value):
+        self._grid.temperature[self._index] = value
+
+    @property
+    def terrain_type(self):
+        return TERRAIN_TYPES[self._grid.terrain_code[self._index]]
+
+    @terrain_type.setter
+    def terrain_type(self, value):
+        self._grid.terrain_code[self._index] = TERRAIN_CODES[value]
+
+    def __repr__(self):
+        return f"CellView(q={self.q}, r={self.r}, terrain_type={self.terrain_type!r})"
+
+
+class HexGrid(Mapping):
+    """
+    Struct-of-arrays storage for a hexagonal grid of the given radius.
+
+    Every per-cell field is a contiguous NumPy array and terrain types are stored as int8 codes
+    (see TERRAIN_TYPES). Cells are laid out q-major, r-minor, which is the same order the old
+    dict-of-Cell grid iterated in. The grid still behaves like a read-only mapping from (q, r)
+    to Cell-like views, so ``grid.items()``, ``grid.values()`` and ``(q, r) in grid`` keep working.
+    """
+    FIELDS = ("height", "water_level", "vegetation", "temperature")
+
+    def __init__(self, radius, dtype=np.float64, temperature=25.0, q_range=None):
+        """
+        Allocate the grid arrays.
+        :param radius: Hexagonal radius of the grid (cells with max(|q|, |r|, |q + r|) <= radius).
+        :param dtype: Floating point dtype of the field arrays (float64 or float32).
+        :param temperature: Initial temperature of every cell.
+        :param q_range: Optional (first, last) q rows, inclusive, to allocate only a band of the world.
+                        Neighbors outside the band are treated like off-grid neighbors.
+        """
+        self.radius = radius
+        self.q_min, self.q_max = (-radius, radius) if q_range is None else q_range
+        q_values = np.arange(self.q_min, self.q_max + 1)
+        r_min = np.maximum(-radius, -q_values - radius)
+        r_max = np.minimum(radius, -q_values + radius)
+        lengths = r_max - r_min + 1
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        size = int(offsets[-1])
+
+        self._r_min = r_min
+        self._r_max = r_max
+        self._row_offsets = offsets
+        self._r_min_list = r_min.tolist()
+        self._r_max_list = r_max.tolist()
+        self._row_offsets_list = offsets.tolist()
+
+        self.q = np.repeat(q_values, lengths).astype(np.int32)
+        self.r = (np.arange(size) - np.repeat(offsets[:-1] - r_min, lengths)).astype(np.int32)
+
+        self.height = np.zeros(size, dtype=dtype)
+        self.water_level = np.zeros(size, dtype=dtype)
+        self.vegetation = np.zeros(size, dtype=dtype)
+        self.temperature = np.full(size, temperature, dtype=dtype)
+        self.terrain_code = np.zeros(size, dtype=np.int8)
+        self._neighbor_index = None
+
+    @property
+    def size(self):
+        return len(self.q)
+
+    @property
+    def nbytes(self):
+        """
+        Total memory held by the per-cell arrays, in bytes.
+        """
+        arrays = [self.q, self.r, self.terrain_code] + [getattr(self, name) for name in self.FIELDS]
+        return sum(array.nbytes for array in arrays)
+
+    def index(self, q, r):
+        """
+        Get the dense index of a single cell.
+        :param q: Axial coordinate q.
+        :param r: Axial coordinate r.
+        :return: The index into the grid arrays, or -1 if (q, r) is off the grid.
+        """
+        row = q - self.q_min
+        if 0 <= row < len(self._r_min_list):
+            r_min = self._r_min_list[row]
+            if r_min <= r <= self._r_max_list[row]:
+                return self._row_offsets_list[row] + r - r_min
+        return -1
+
+    def index_of(self, q, r):
+        """
+        Vectorized version of index().
+        :param q: Array of axial q coordinates.
+        :param r: Array of axial r coordinates.
+        :return: Array of dense indices, with -1 for coordinates that are off the grid.
+        """
+        q = np.asarray(q)
+        r = np.asarray(r)
+        row = q - self.q_min
+        row_clipped = np.clip(row, 0, len(self._r_min) - 1)
+        r_min = self._r_min[row_clipped]
+        valid = (row == row_clipped) & (r >= r_min) & (r <= self._r_max[row_clipped])
+        return np.where(valid, self._row_offsets[row_clipped] + r - r_min, -1)
+
+    def row_span(self, q_first, q_last=None):
+        """
+        Get the dense index range of a run of q rows, which is contiguous in the q-major layout.
+        :param q_first: First q row.
+        :param q_last: Last q row, inclusive (default: q_first).
+        :return: A slice over the grid arrays.
+        """
+        q_last = q_first if q_last is None else q_last
+        return slice(self._row_offsets_list[q_first - self.q_min], self._row_offsets_list[q_last - self.q_min + 1])
+
+    @property
+    def neighbor_index(self):
+        """
+        Neighbor table of the grid, built once and cached since the topology never changes.
+        Row i holds the dense indices of the six neighbors of cell i in HEX_DIRECTIONS order.
+        Off-grid neighbors are set to len(grid), so arrays padded with one extra element can be
+        gathered with the table directly.
+        :return: An (N, 6) integer array.
+        """
+        if self._neighbor_index is None:
+            dq, dr = np.array(HEX_DIRECTIONS).T
+            neighbors = self.index_of(self.q[:, None] + dq, self.r[:, None] + dr)
+            neighbors[neighbors < 0] = len(self)
+            self._neighbor_index = neighbors.astype(np.intp)
+        return self._neighbor_index
+
+    def disk(self, q, r, radius):
+        """
+        Get the cells within a hex distance of a center, clipped to the grid.
+        :param q: Axial q coordinate of the center.
+        :param r: Axial r coordinate of the center.
+        :param radius: Distance in hexes.
+        :return: Sorted array of cell indices.
+        """
+        dq, dr = hex_disk_offsets(radius)
+        indices = self.index_of(q + dq, r + dr)
+        return indices[indices >= 0]
+
+    def ring(self, q, r, radius):
+        """
+        Get the cells at exactly a hex distance from a center, clipped to the grid.
+        :param q: Axial q coordinate of the center.
+        :param r: Axial r coordinate of the center.
+        :param radius: Distance in hexes.
+        :return: Sorted array of cell indices.
+        """
+        dq, dr = hex_ring_offsets(radius)
+        indices = self.index_of(q + dq, r + dr)
+        return np.sort(indices[indices >= 0])
+
+    def terrain_mask(self, *terrain_types):
+        """
+        Get a boolean mask of the cells whose terrain is one of the given types.
+        :param terrain_types: Terrain type names (e.g., "ocean", "desert").
+        :return: Boolean array over all cells.
+        """
+        codes = [TERRAIN_CODES[name] for name in terrain_types]
+        return np.isin(self.terrain_code, codes)
+
+    def set_cell(self, index, cell):
+        """
+        Copy the fields of a Cell object into the grid.
+        :param index: Dense index of the target cell.
+        :param cell: The Cell whose values should be stored.
+        """
+        for name in self.FIELDS:
+            getattr(self, name)[index] = getattr(cell, name)
+        self.terrain_code[index] = TERRAIN_CODES[cell.terrain_type]
+
+    def __getitem__(self, coords):
+        index = self.index(*coords)
+        if index < 0:
+            raise KeyError(coords)
+        return CellView(self, index)
+
+    def __setitem__(self, coords, cell):
+        index = self.index(*coords)
+        if index < 0:
+            raise KeyError(coords)
+        self.set_cell(index, cell)
+
+    def __contains__(self, coords):
+        try:
+            return self.index(*coords) >= 0
+        except TypeError:
+            return False
+
+    def __iter__(self):
+        return zip(self.q.tolist(), self.r.tolist())
+
+    def __len__(self):
+        return len(self.q)
+
+    def values(self):
+        return (CellView(self, index) for index in range(len(self.q)))
+
+    def items(self):
+        return (((q, r), CellView(self, index)) for index, (q, r) in enumerate(self))
+
+
 class Terrain:
-    def __init__(self, config):
+    def __init__(self, config, rng=None):
+        """
+        :param config: The Config of the world.
+        :param rng: numpy.random.Generator used for every random draw (default: a freshly seeded one).
+        """
         self.config = config
-        self.grid = {}  # Hexagonal grid stored as a dictionary
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.grid = {}  # Replaced by a HexGrid in initialize_hex_grid
+        self.spatial = None  # SpatialIndex of the grid, created by spatial_index()
+
+    def spatial_index(self):
+        """
+        Get the prefix-sum index of the grid for regional aggregate queries (see spatial.SpatialIndex).
+        It is built on first use; Simulation refreshes it once per day afterwards.
+        :return: The SpatialIndex of the current grid.
+        """
+        if self.spatial is None or self.spatial.grid is not self.grid:
+            from spatial import SpatialIndex
+            self.spatial = SpatialIndex(self.grid)
+        return self.spatial
+
+    def refresh_spatial_index(self):
+        """
+        Rebuild the spatial index from the current grid values, if one was requested.
+        """
+        if self.spatial is not None and self.spatial.grid is self.grid:
+            self.spatial.refresh()
 
     def initialize_hex_grid(self, presets):
         """
@@ -34,57 +367,60 @@ class Terrain:
         :param presets: A list of Config objects for different terrain types.
         """
         grid_radius = self.config.grid_width // 2
-        self.grid = {}
+        self.grid = HexGrid(grid_radius)
 
-        for q in range(-grid_radius, grid_radius + 1):
-            for r in range(-grid_radius, grid_radius + 1):
-                if abs(q + r) <= grid_radius:
-                    preset = presets[np.random.randint(0, len(presets))]
-                    self.grid[(q, r)] = Cell(q, r, terrain_type=preset.terrain_type)
+        preset_codes = np.array([TERRAIN_CODES[preset.terrain_type] for preset in presets], dtype=np.int8)
+        self.grid.terrain_code[:] = preset_codes[self.rng.integers(0, len(presets), size=len(self.grid))]
 
     def generate(self, presets, seed=None):
         """
         Generate a mixed heightmap using Perlin noise and refine terrain types based on rules.
+        The whole grid is filled in one batched noise evaluation and classified with array masks.
         :param presets: A list of Config objects for different terrain types.
-        :param seed: Random seed for noise generation (default: None for random).
+        :param seed: Random seed for noise generation and terrain rules (default: None to draw it from self.rng).
         """
         if seed is None:
-            seed = np.random.randint(0, 10000)
-
-        np.random.seed(seed)  # Set seed for reproducibility
-
-        for (q, r), cell in self.grid.items():
-            # Generate height using Perlin noise
-            cell.height = pnoise2(
-                (q + seed) / self.config.scale,
-                (r + seed) / self.config.scale,
-                octaves=self.config.octaves,
-                persistence=self.config.persistence,
-                lacunarity=self.config.lacunarity,
-            )
-
-            # Apply terrain rules based on height
-            if cell.height < self.config.water_level:
-                cell.terrain_type = "ocean"
-            elif cell.height > 0.6:
-                cell.terrain_type = "mountains"
-            elif 0.3 < cell.height <= 0.6:
-                cell.terrain_type = np.random.choice(["plains", "forest"], p=[0.5, 0.5])
-            else:
-                cell.terrain_type = np.random.choice(["desert", "plains"], p=[0.3, 0.7])
+            seed = int(self.rng.integers(0, 10000))
+            rng = self.rng
+        else:
+            rng = np.random.default_rng(seed)  # A fixed seed reproduces the same terrain
+
+        # Generate heights using fractal gradient noise
+        grid = self.grid
+        grid.height[:] = fractal_noise(
+            grid.q / self.config.scale,
+            grid.r / self.config.scale,
+            octaves=self.config.octaves,
+            persistence=self.config.persistence,
+            lacunarity=self.config.lacunarity,
+            seed=seed,
+        )
+
+        # Apply terrain rules based on height; mid and low bands pick their type with one draw per cell
+        height = grid.height
+        draws = rng.random(len(grid))
+        grid.terrain_code[:] = np.select(
+            [height < self.config.water_level, height > 0.6, height > 0.3],
+            [
+                TERRAIN_CODES["ocean"],
+                TERRAIN_CODES["mountains"],
+                np.where(draws < 0.5, TERRAIN_CODES["plains"], TERRAIN_CODES["forest"]),
+            ],
+            default=np.where(draws < 0.3, TERRAIN_CODES["desert"], TERRAIN_CODES["plains"]),
+        )
 
     def normalize(self):
         """
         Normalize the grid's height values to the range [0, 1].
         """
         if self.grid:
-            heights = [cell.height for cell in self.grid.values()]
-            min_val = min(heights)
-            max_val = max(heights)
+            heights = self.grid.height
+            min_val = heights.min()
+            max_val = heights.max()
 
-            for cell in self.grid.values():
-                if max_val > min_val:  # Avoid division by zero
-                    cell.height = (cell.height - min_val) / (max_val - min_val)
+            if max_val > min_val:  # Avoid division by zero
+                heights -= min_val
+                heights /= max_val - min_val
 
     def apply_water(self):
         """
@@ -92,24 +428,19 @@ class Terrain:
         Adjust water levels dynamically to prevent terrain flooding.
         """
         if self.grid:
-            for cell in self.grid.values():
-                if isinstance(cell, Cell):
-                    if cell.height < self.config.water_level:
-                        cell.water_level = max(cell.water_level, self.config.water_level)
-                    else:
-                        cell.water_level = max(cell.water_level - 0.01, 0.0)
-
-                    cell.water_level = min(cell.water_level, 0.2)  # Cap water level
+            water = self.grid.water_level
+            below = self.grid.height < self.config.water_level
+            water[:] = np.where(below, np.maximum(water, self.config.water_level), np.maximum(water - 0.01, 0.0))
+            np.minimum(water, 0.2, out=water)  # Cap water level
 
     def apply_vegetation_growth(self):
         """
         Simulate vegetation growth based on water levels and terrain type.
         """
         if self.grid:
-            for cell in self.grid.values():
-                if cell.water_level > 0.3:  # Example threshold for vegetation growth
-                    growth_rate = self.config.interaction_factors["vegetation_growth"]
-                    cell.vegetation = min(1.0, cell.vegetation + growth_rate)
+            growing = self.grid.water_level > 0.3  # Example threshold for vegetation growth
+            growth_rate = self.config.interaction_factors["vegetation_growth"]
+            self.grid.vegetation[growing] = np.minimum(1.0, self.grid.vegetation[growing] + growth_rate)
 
     def mix_terrains(self, configs, weights=None):
         """
@@ -120,6 +451,5 @@ class Terrain:
         if weights is None:
             weights = [1 / len(configs)] * len(configs)
 
-        for coord, cell in self.grid.items():
-            selected_config = np.random.choice(configs, p=weights)
-            cell.terrain_type = selected_config.terrain_type
+        config_codes = np.array([TERRAIN_CODES[config.terrain_type] for config in configs], dtype=np.int8)
+        self.grid.terrain_code[:] = config_codes[self.rng.choice(len(configs), size=len(self.grid), p=weights)]
@@ -0,0 +1,105 @@
+import contextlib
+import io
+import os
+import sys
+
+import numpy as np
+import pytest
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PACKAGE_DIR)
+
+from config import Config  # noqa: E402
+from interactions import InteractionsManager  # noqa: E402
+from simulation import Simulation  # noqa: E402
+from terrain import HexGrid, TERRAIN_CODES  # noqa: E402
+from weather import SeasonManager, WeatherSystem  # noqa: E402
+
+
+# Weather of a day for every branch of the weather rule.
+WEATHERS = {
+    "rain": {"rain_intensity": 0.45, "snow_intensity": 0.1, "wind_speed": 0.2, "drought": False},
+    "snow": {"rain_intensity": 0.1, "snow_intensity": 0.25, "wind_speed": 0.05, "drought": False},
+    "drought": {"rain_intensity": 0.45, "snow_intensity": 0.25, "wind_speed": 0.3, "drought": True},
+    "calm": {"rain_intensity": 0.0, "snow_intensity": 0.0, "wind_speed": 0.0, "drought": False},
+}
+
+SEASONS = ("spring", "summer", "autumn", "winter")
+
+
+@pytest.fixture(autouse=True)
+def package_dir(monkeypatch):
+    """
+    Run every test from the package directory, where the configuration presets live.
+    """
+    monkeypatch.chdir(PACKAGE_DIR)
+
+
+@pytest.fixture
+def config():
+    return Config("default").__dict__
+
+
+def random_grid(radius=12, seed=0):
+    """
+    Create a HexGrid with random fields and terrain types, including cells at exactly 0 and 1 so
+    that the clamps of every rule are exercised.
+    """
+    rng = np.random.default_rng(seed)
+    grid = HexGrid(radius)
+    for name in ("height", "water_level", "vegetation"):
+        values = rng.uniform(0.0, 1.0, size=len(grid))
+        values[rng.random(len(grid)) < 0.1] = 0.0
+        values[rng.random(len(grid)) < 0.05] = 1.0
+        setattr(grid, name, values)
+    grid.terrain_code[:] = rng.choice(list(TERRAIN_CODES.values()), size=len(grid))
+    return grid
+
+
+def copy_grid(grid):
+    """
+    Copy the fields and terrain codes of a HexGrid.
+    """
+    copy = HexGrid(grid.radius)
+    for name in grid.FIELDS:
+        setattr(copy, name, getattr(grid, name).copy())
+    copy.terrain_code[:] = grid.terrain_code
+    return copy
+
+
+def max_difference(expected, actual):
+    """
+    Get the largest absolute difference between two grids over all fields and terrain codes.
+    """
+    return max(
+        float(np.max(np.abs(getattr(expected, name).astype(np.float64) - getattr(actual, name))))
+        for name in expected.FIELDS + ("terrain_code",)
+    )
+
+
+def reference_day(grid, weather, season, config):
+    """
+    Apply one day of weather, seasons and interactions with the per-cell reference loops.
+    """
+    weather_system = WeatherSystem(config)
+    weather_system.current_weather = weather
+    weather_system.apply_weather_effects(grid)
+    season_manager = SeasonManager()
+    season_manager.current_season_index = season_manager.seasons.index(season)
+    season_manager.apply_seasonal_effects(grid, config)
+    InteractionsManager(config).apply_interactions(grid)
+
+
+def small_simulation(seed, history=None, grid_width=20, **config):
+    """
+    Create and initialize a seeded Simulation on a small grid, with its terrain generation output
+    silenced.
+    :param config: Configuration values to override before the terrain is generated.
+    """
+    simulation = Simulation(history=history, seed=seed)
+    simulation.config.grid_width = grid_width
+    for name, value in config.items():
+        setattr(simulation.config, name, value)
+    with contextlib.redirect_stdout(io.StringIO()):
+        simulation.initialize_simulation()
+    return simulation
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from active import ActiveDailyStep, ActiveSet
+from conftest import SEASONS, WEATHERS, copy_grid, max_difference, random_grid, small_simulation
+from events import EventManager
+from step import DailyStep
+from terrain import TERRAIN_CODES
+
+EVENT_TYPES = ("earthquake", "flood", "wildfire", "rapid_growth")
+
+
+def _barren_grid(seed):
+    """
+    A random grid where a third of the cells are deserts, most of them without vegetation.
+    """
+    grid = random_grid(seed=seed)
+    rng = np.random.default_rng(seed)
+    deserts = rng.random(len(grid)) < 0.3
+    grid.terrain_code[deserts] = TERRAIN_CODES["desert"]
+    grid.vegetation[deserts & (rng.random(len(grid)) < 0.8)] = 0.0
+    return grid
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_active_step_matches_daily_step(config, seed):
+    expected = _barren_grid(seed)
+    actual = copy_grid(expected)
+    active = ActiveSet(actual)
+    full_step = DailyStep(expected)
+    active_step = ActiveDailyStep(actual, active)
+    rng = np.random.default_rng(seed)
+    weathers = list(WEATHERS.values())
+    dormant_before = int(active.dormant.sum())
+    woken = 0
+
+    for day in range(40):
+        weather = weathers[rng.integers(len(weathers))]
+        season = SEASONS[(day // 10) % len(SEASONS)]
+        full_step.run(expected, weather, season, config)
+        active_step.run(actual, weather, season, config)
+
+        # Events, applied to both grids with the same random numbers
+        event_type = EVENT_TYPES[day % len(EVENT_TYPES)]
+        cells = np.sort(rng.choice(len(actual), size=40, replace=False))
+        for grid, event_rng in ((expected, np.random.default_rng(day)), (actual, np.random.default_rng(day))):
+            EventManager(config, rng=event_rng).apply_event(event_type, grid, cells)
+        active.wake(cells)
+
+        # An outside edit every few days: regrow some barren deserts and flood some land into ocean
+        if day % 5 == 4:
+            barren = np.flatnonzero(active.dormant)[:10]
+            woken += len(barren)
+            land = np.flatnonzero(active.is_land)[:3]
+            for grid in (expected, actual):
+                grid.vegetation[barren] = 0.5
+                grid.terrain_code[land] = TERRAIN_CODES["ocean"]
+            active.wake(np.union1d(barren, land))
+            assert not active.dormant[barren].any()
+
+        assert max_difference(expected, actual) == 0.0, day
+        np.testing.assert_array_equal(active.vegetation, np.flatnonzero(~active.dormant))
+
+    assert dormant_before > 0 and woken > 0
+    # The sets still describe the grid after all the incremental updates
+    reference = ActiveSet(actual)
+    np.testing.assert_array_equal(active.vegetation, reference.vegetation)
+    np.testing.assert_array_equal(active.land, reference.land)
+
+
+@pytest.mark.parametrize("event_mode", ["global", "local"])
+def test_active_simulation_matches_fused_simulation(event_mode):
+    options = {"event_mode": event_mode, "max_events_per_day": 5, "event_radius": [2, 8]}
+    expected = small_simulation(6, grid_width=30, active_set=False, **options)
+    actual = small_simulation(6, grid_width=30, active_set=True, **options)
+    assert isinstance(actual.daily_step, ActiveDailyStep)
+    expected.run_simulation(60, visualize=False)
+    actual.run_simulation(60, visualize=False)
+    assert max_difference(expected.terrain.grid, actual.terrain.grid) == 0.0
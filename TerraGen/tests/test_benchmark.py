@@ -0,0 +1,37 @@
+import pytest
+
+from benchmark import BENCHMARK_VERSION, compare_results, measure, run_benchmarks
+
+
+def _results(best, **metadata):
+    results = {"version": BENCHMARK_VERSION, "backend": None, "history": "binary"}
+    results.update(metadata)
+    results["results"] = [{"case": "step.daily_step", "preset": "default", "radius": 10, "best": best}]
+    return results
+
+
+def test_compare_results_flags_regressions():
+    comparisons = compare_results(_results(1.0), _results(1.2), threshold=0.1)
+    assert [comparison["regression"] for comparison in comparisons] == [True]
+    assert not compare_results(_results(1.0), _results(1.05), threshold=0.1)[0]["regression"]
+
+
+@pytest.mark.parametrize("key, value", [("version", 1), ("backend", "numba"), ("history", "memory")])
+def test_compare_results_rejects_different_runs(key, value):
+    with pytest.raises(ValueError, match=key):
+        compare_results(_results(1.0), _results(1.0, **{key: value}))
+
+
+def test_measure_reports_live_blocks():
+    kept = []
+    result = measure(lambda: kept.append(bytearray(1 << 20)), repeat=2)
+    assert set(result) == {"best", "mean", "peak_bytes", "live_blocks", "live_bytes"}
+    assert result["peak_bytes"] >= 1 << 20
+    assert result["live_blocks"] >= 1 and result["live_bytes"] >= 1 << 20
+
+
+@pytest.mark.parametrize("history, exported", [("memory", True), ("binary", False)])
+def test_export_case_only_runs_with_the_memory_history(history, exported):
+    cases = ["simulation.save_simulation_state", "simulation.export_simulation_history"]
+    results = run_benchmarks(radii=[5], cases=cases, repeat=1, history=history)
+    assert [result["case"] for result in results["results"]] == cases[:1 + exported]
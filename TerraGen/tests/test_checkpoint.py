@@ -0,0 +1,46 @@
+import filecmp
+import os
+
+import pytest
+
+from conftest import max_difference, small_simulation
+from history import BinaryHistoryWriter, KeyframeHistoryWriter
+from simulation import Simulation
+
+WRITERS = {
+    "binary": lambda path: BinaryHistoryWriter(path),
+    "keyframes": lambda path: KeyframeHistoryWriter(path, keyframe_interval=7, quantization_step=1e-4),
+}
+
+
+@pytest.mark.parametrize("writer", WRITERS)
+def test_resumed_simulation_matches_uninterrupted_run(tmp_path, writer):
+    uninterrupted = small_simulation(8, history=WRITERS[writer](str(tmp_path / "uninterrupted")))
+    uninterrupted.run_simulation(50, visualize=False)
+    uninterrupted.history.close()
+
+    # Checkpoint every 10 days and stop at day 45, after frames the checkpoint does not cover were written
+    interrupted = small_simulation(8, history=WRITERS[writer](str(tmp_path / "resumed")))
+    interrupted.enable_checkpoints(str(tmp_path / "checkpoints"), every=10, keep=2)
+    interrupted.run_simulation(45, visualize=False)
+    interrupted.history.close()
+    assert sorted(os.listdir(tmp_path / "checkpoints")) == ["checkpoint_day_000030.npz", "checkpoint_day_000040.npz"]
+
+    resumed = Simulation.load_checkpoint(
+        str(tmp_path / "checkpoints" / "checkpoint_day_000040.npz"), history=WRITERS[writer](str(tmp_path / "resumed"))
+    )
+    assert resumed.current_day == 40
+    resumed.run_simulation(10, visualize=False)
+    resumed.history.close()
+
+    assert resumed.current_day == uninterrupted.current_day == 50
+    assert max_difference(uninterrupted.terrain.grid, resumed.terrain.grid) == 0.0
+    assert resumed.season_manager.current_season_index == uninterrupted.season_manager.current_season_index
+    assert resumed.rng.bit_generator.state == uninterrupted.rng.bit_generator.state
+    for name, rng in uninterrupted.rngs.items():
+        assert resumed.rngs[name].bit_generator.state == rng.bit_generator.state, name
+
+    names = sorted(os.listdir(tmp_path / "uninterrupted"))
+    assert sorted(os.listdir(tmp_path / "resumed")) == names
+    match, mismatch, errors = filecmp.cmpfiles(tmp_path / "uninterrupted", tmp_path / "resumed", names, shallow=False)
+    assert mismatch == errors == []
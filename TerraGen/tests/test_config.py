@@ -0,0 +1,114 @@
+import json
+import os
+
+import pytest
+
+import config
+from config import Config, FrozenConfig, PresetRegistry, frozen_config, preset_registry, validate_preset
+
+PRESETS = {
+    "default": {"grid_width": 40, "interaction_factors": {"erosion_rate": 0.01}, "event_radius": [2, 8]},
+    "desert": {"grid_width": 30, "terrain_type": "desert", "seasonal_effects": {"summer": {"vegetation_growth_multiplier": 0.5}}},
+}
+
+
+def _write(path, presets, modified=None):
+    with open(path, "w") as f:
+        json.dump(presets, f)
+    if modified is not None:
+        os.utime(path, ns=(modified, modified))
+    return str(path)
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    """
+    Count the preset files parsed by PresetRegistry.
+    """
+    calls = []
+    load = json.load
+
+    def counting_load(file):
+        calls.append(file.name)
+        return load(file)
+
+    monkeypatch.setattr(config.json, "load", counting_load)
+    return calls
+
+
+def test_preset_file_is_parsed_once(tmp_path, parses):
+    path = _write(tmp_path / "presets.json", PRESETS)
+    configs = [Config(preset, path) for preset in ("default", "desert", "default", "missing")]
+    assert [settings.grid_width for settings in configs] == [40, 30, 40, 40]
+    assert frozen_config("desert", path) is frozen_config("desert", path)
+    assert preset_registry(path) is preset_registry(path)
+    assert parses == [path]
+
+
+def test_preset_file_is_read_again_when_it_changes(tmp_path, parses):
+    path = _write(tmp_path / "presets.json", PRESETS, modified=1_000_000_000_000_000_000)
+    registry = preset_registry(path)
+    frozen = frozen_config("default", path)
+    assert Config("default", path).grid_width == 40
+
+    changed = {**PRESETS, "default": {**PRESETS["default"], "grid_width": 64}}
+    _write(tmp_path / "presets.json", changed, modified=1_000_000_000_000_000_001)
+    assert Config("default", path).grid_width == 64
+    assert preset_registry(path) is not registry
+    assert frozen_config("default", path) is not frozen and frozen_config("default", path).grid_width == 64
+    # Configs made before the change keep their values
+    assert frozen.grid_width == 40
+    assert len(parses) == 2
+
+
+def test_frozen_config_rejects_mutation(tmp_path):
+    path = _write(tmp_path / "presets.json", PRESETS)
+    frozen = frozen_config("default", path)
+    assert isinstance(frozen, FrozenConfig)
+    with pytest.raises(AttributeError):
+        frozen.grid_width = 10
+    with pytest.raises(AttributeError):
+        frozen.new_setting = 1
+    with pytest.raises(AttributeError):
+        del frozen.grid_width
+    with pytest.raises(TypeError):
+        frozen.interaction_factors["erosion_rate"] = 1.0
+    assert frozen.event_radius == (2, 8)
+
+    # Mutable configs get private copies of the same values
+    settings = Config("default", path)
+    settings.interaction_factors["erosion_rate"] = 1.0
+    settings.event_radius.append(9)
+    assert frozen.interaction_factors["erosion_rate"] == 0.01
+    assert Config("default", path).interaction_factors["erosion_rate"] == 0.01
+    assert Config("default", path).event_radius == [2, 8]
+
+
+@pytest.mark.parametrize("values", [
+    [],
+    {"grid_width": "40"},
+    {"octaves": True},
+    {"terrain_type": 3},
+    {"interaction_factors": [0.1]},
+    {"weather_impact": {"rain_absorption": "high"}},
+    {"seasonal_effects": ["summer"]},
+    {"seasonal_effects": {"summer": {"vegetation_growth_multiplier": None}}},
+])
+def test_validate_preset_rejects_malformed_presets(tmp_path, values):
+    with pytest.raises(ValueError, match="broken"):
+        validate_preset("broken", values)
+    path = _write(tmp_path / "presets.json", {**PRESETS, "broken": values})
+    with pytest.raises(ValueError, match="broken"):
+        PresetRegistry(path)
+
+
+def test_validate_preset_accepts_the_shipped_presets():
+    registry = PresetRegistry("config_presets.json")
+    assert "default" in registry
+    for name in registry.names():
+        validate_preset(name, registry.values(name))
+
+
+def test_registry_rejects_a_file_without_presets(tmp_path):
+    with pytest.raises(ValueError, match="object of presets"):
+        PresetRegistry(_write(tmp_path / "presets.json", [PRESETS["default"]]))
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from conftest import max_difference, random_grid, small_simulation
+from events import Event, EventManager
+
+AXIAL_DIRECTIONS = ((1, 0), (1, -1), (0, -1), (-1, 0), (-1, 1), (0, 1))
+
+
+def _distances(grid, q, r):
+    dq = grid.q - q
+    dr = grid.r - r
+    return np.maximum(np.maximum(np.abs(dq), np.abs(dr)), np.abs(dq + dr))
+
+
+def _brute_force_wildfire(grid, q, r, radius):
+    """
+    Breadth-first spread through cells with vegetation above 0.2, one ring of neighbors per step.
+    """
+    cells = {(int(cq), int(cr)): index for index, (cq, cr) in enumerate(zip(grid.q, grid.r))}
+    center = cells.get((q, r))
+    if center is None or grid.vegetation[center] <= 0.2:
+        return []
+    burned = {(q, r)}
+    frontier = [(q, r)]
+    for _ in range(radius):
+        frontier = sorted({
+            (fq + dq, fr + dr)
+            for fq, fr in frontier
+            for dq, dr in AXIAL_DIRECTIONS
+            if (fq + dq, fr + dr) in cells and (fq + dq, fr + dr) not in burned
+            and grid.vegetation[cells[(fq + dq, fr + dr)]] > 0.2
+        })
+        burned.update(frontier)
+    return sorted(cells[cell] for cell in burned)
+
+
+@pytest.mark.parametrize("radius", [0, 1, 4, 15])
+def test_disk_and_ring_match_hex_distance(radius):
+    grid = random_grid()
+    # Centers inside the grid, on its edge and off it
+    for q, r in ((0, 0), (3, -5), (12, 0), (-10, 14), (20, 0)):
+        distances = _distances(grid, q, r)
+        np.testing.assert_array_equal(grid.disk(q, r, radius), np.flatnonzero(distances <= radius))
+        np.testing.assert_array_equal(grid.ring(q, r, radius), np.flatnonzero(distances == radius))
+        event = Event("flood", q, r, radius)
+        np.testing.assert_array_equal(EventManager({}).footprint(event, grid), grid.disk(q, r, radius))
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2, 3])
+def test_wildfire_footprint_matches_brute_force_spread(seed):
+    grid = random_grid(seed=seed)
+    manager = EventManager({})
+    rng = np.random.default_rng(seed)
+    for _ in range(20):
+        center = rng.integers(len(grid))
+        q, r = int(grid.q[center]), int(grid.r[center])
+        radius = int(rng.integers(0, 10))
+        # The same manager is reused, so its visited buffer must be reset after every fire
+        cells = manager.footprint(Event("wildfire", q, r, radius), grid)
+        np.testing.assert_array_equal(cells, _brute_force_wildfire(grid, q, r, radius))
+        assert np.all(_distances(grid, q, r)[cells] <= radius)
+
+
+def test_wildfire_does_not_ignite_without_vegetation():
+    grid = random_grid()
+    center = int(np.flatnonzero(grid.vegetation <= 0.2)[0])
+    event = Event("wildfire", int(grid.q[center]), int(grid.r[center]), 5)
+    assert len(EventManager({}).footprint(event, grid)) == 0
+    assert len(EventManager({}).footprint(Event("wildfire", 100, 0, 5), grid)) == 0
+
+
+def test_local_events_are_reproducible_from_the_seed():
+    options = {"event_mode": "local", "max_events_per_day": 6, "event_radius": [1, 6]}
+    runs = [small_simulation(seed, **options) for seed in (21, 21, 22)]
+    for simulation in runs:
+        simulation.run_simulation(30, visualize=False)
+    records = [[frame["event"] for frame in simulation.simulation_history] for simulation in runs]
+
+    assert any(records[0])
+    assert records[0] == records[1]
+    assert max_difference(runs[0].terrain.grid, runs[1].terrain.grid) == 0.0
+    assert records[0] != records[2]
@@ -0,0 +1,115 @@
+import json
+
+import numpy as np
+import pytest
+
+from conftest import copy_grid, random_grid, small_simulation
+from history import (
+    FRAME_FIELDS, BinaryHistoryWriter, HistoryReader, KeyframeHistoryReader, KeyframeHistoryWriter, MemoryHistoryWriter,
+    convert_json_history, open_history,
+)
+from simulation import CustomEncoder
+
+DAYS = 25
+
+
+def _run(history, seed=4):
+    simulation = small_simulation(seed, history=history)
+    simulation.run_simulation(DAYS, visualize=False)
+    simulation.history.close()
+    return simulation
+
+
+@pytest.fixture
+def binary_history(tmp_path):
+    _run(BinaryHistoryWriter(str(tmp_path / "binary")))
+    return HistoryReader(str(tmp_path / "binary"))
+
+
+@pytest.fixture
+def memory_frames():
+    return _run(MemoryHistoryWriter()).simulation_history
+
+
+def test_keyframe_history_round_trip_is_exact(tmp_path, binary_history):
+    _run(KeyframeHistoryWriter(str(tmp_path / "keyframes"), keyframe_interval=7))
+    reader = open_history(str(tmp_path / "keyframes"))
+    assert isinstance(reader, KeyframeHistoryReader)
+    assert len(reader) == len(binary_history) == DAYS
+    # Out of order, so both the cached and the keyframe paths are decoded
+    for position in (0, 6, 7, 13, 3, DAYS - 1):
+        frame = reader.frame(position)
+        for name in FRAME_FIELDS:
+            np.testing.assert_array_equal(frame[name], binary_history.day(name, position))
+
+
+def test_quantized_keyframe_history_is_within_half_a_step(tmp_path, binary_history):
+    step = 1e-4
+    _run(KeyframeHistoryWriter(str(tmp_path / "keyframes"), keyframe_interval=10, quantization_step=step))
+    reader = KeyframeHistoryReader(str(tmp_path / "keyframes"))
+    for position in range(DAYS):
+        frame = reader.frame(position)
+        for name in FRAME_FIELDS:
+            error = np.max(np.abs(frame[name] - binary_history.day(name, position)))
+            assert error <= (0 if name == "terrain_code" else step / 2 + 1e-12), (name, position)
+
+
+def test_quantized_keyframe_history_stores_large_changes_exactly(tmp_path):
+    grid = random_grid(radius=6)
+    writer = KeyframeHistoryWriter(str(tmp_path / "keyframes"), quantization_step=1e-6)
+    frames = []
+    for day in range(3):
+        if day == 1:
+            grid.vegetation[:5] = 1.0 - grid.vegetation[:5]  # More than 32767 steps for some cells
+        elif day == 2:
+            grid.height += 1e-3  # Every cell changes by a representable amount
+        writer.write_frame(day, {"drought": False}, None, grid)
+        frames.append(copy_grid(grid))
+    writer.close()
+
+    reader = KeyframeHistoryReader(str(tmp_path / "keyframes"))
+    assert reader.index[1]["fields"]["vegetation"][0] == "sparse_exact"
+    assert reader.index[2]["fields"]["height"][0] == "dense"
+    np.testing.assert_array_equal(reader.frame(1)["vegetation"], frames[1].vegetation)
+    assert np.max(np.abs(reader.frame(2)["height"] - frames[2].height)) <= 0.5e-6 + 1e-12
+    np.testing.assert_array_equal(reader.frame(2)["vegetation"], frames[2].vegetation)
+
+
+def test_history_reader_queries_match_memory_history(binary_history, memory_frames):
+    assert len(binary_history) == len(memory_frames) == DAYS
+    assert [day["event"] for day in binary_history.days] == [frame["event"] for frame in memory_frames]
+
+    q, r = int(binary_history.q[100]), int(binary_history.r[100])
+    assert binary_history.index_of(q, r) == 100
+    assert binary_history.index_of(1000, 0) == -1
+    np.testing.assert_array_equal(
+        binary_history.index_of(binary_history.q, binary_history.r), np.arange(binary_history.cells)
+    )
+
+    key = f"({q},{r})"
+    expected = [frame["terrain"][key]["vegetation"] for frame in memory_frames]
+    np.testing.assert_array_equal(binary_history.series("vegetation", q, r), expected)
+    np.testing.assert_array_equal(binary_history.series("vegetation", q, r, start=5, stop=9), expected[5:9])
+    with pytest.raises(KeyError):
+        binary_history.series("vegetation", 1000, 0)
+
+    cells = np.array([0, 100, binary_history.cells - 1])
+    window = binary_history.window("height", 3, 8, cells=cells)
+    assert window.shape == (5, 3)
+    for offset, frame in enumerate(memory_frames[3:8]):
+        for column, cell in enumerate(cells):
+            key = f"({binary_history.q[cell]},{binary_history.r[cell]})"
+            assert window[offset, column] == frame["terrain"][key]["height"]
+            assert binary_history.terrain_types_on(3 + offset)[cell] == frame["terrain"][key]["terrain_type"]
+
+
+def test_convert_json_history_matches_binary_history(tmp_path, binary_history, memory_frames):
+    json_path = tmp_path / "history.json"
+    with open(json_path, "w") as f:
+        json.dump(memory_frames, f, cls=CustomEncoder)
+
+    converted = convert_json_history(str(json_path), str(tmp_path / "converted"))
+    assert len(converted) == len(binary_history)
+    assert converted.days == binary_history.days
+    for name in FRAME_FIELDS:
+        np.testing.assert_array_equal(converted.field(name), binary_history.field(name))
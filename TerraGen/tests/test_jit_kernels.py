@@ -0,0 +1,83 @@
+import pytest
+
+from conftest import SEASONS, WEATHERS, copy_grid, max_difference, random_grid, reference_day
+from interactions import InteractionsManager
+from jit_kernels import NUMBA_AVAILABLE
+from kernels import TOLERANCE, NumpyKernels, compare_backends, get_kernels
+from weather import SeasonManager, WeatherSystem
+
+needs_numba = pytest.mark.skipif(not NUMBA_AVAILABLE, reason="Numba is not installed")
+
+
+@pytest.fixture
+def kernels():
+    from jit_kernels import NumbaKernels
+
+    return NumbaKernels()
+
+
+@needs_numba
+@pytest.mark.parametrize("weather", WEATHERS)
+def test_weather_rule_matches_reference(kernels, config, weather):
+    expected = random_grid()
+    actual = copy_grid(expected)
+    reference = WeatherSystem(config)
+    reference.current_weather = WEATHERS[weather]
+    reference.apply_weather_effects(expected)
+    kernels.apply_weather_effects(actual, WEATHERS[weather], config)
+    assert max_difference(expected, actual) <= TOLERANCE
+
+
+@needs_numba
+@pytest.mark.parametrize("season", SEASONS)
+def test_seasonal_rule_matches_reference(kernels, config, season):
+    expected = random_grid()
+    actual = copy_grid(expected)
+    reference = SeasonManager()
+    reference.current_season_index = reference.seasons.index(season)
+    reference.apply_seasonal_effects(expected, config)
+    kernels.apply_seasonal_effects(actual, season, config)
+    assert max_difference(expected, actual) <= TOLERANCE
+
+
+@needs_numba
+@pytest.mark.parametrize("rule", ["simulate_erosion", "spread_vegetation", "simulate_desertification"])
+def test_interaction_rules_match_reference(kernels, config, rule):
+    expected = random_grid()
+    actual = copy_grid(expected)
+    getattr(InteractionsManager(config), rule)(expected)
+    getattr(kernels, rule)(actual, config)
+    assert max_difference(expected, actual) <= TOLERANCE
+
+
+@needs_numba
+@pytest.mark.parametrize("season", SEASONS)
+@pytest.mark.parametrize("weather", WEATHERS)
+def test_jit_daily_step_matches_reference(kernels, config, weather, season):
+    expected = random_grid()
+    actual = copy_grid(expected)
+    step = kernels.create_step(actual)
+    for _ in range(3):
+        reference_day(expected, WEATHERS[weather], season, config)
+        step.run(actual, WEATHERS[weather], season, config)
+    assert max_difference(expected, actual) <= TOLERANCE
+
+
+@needs_numba
+def test_numba_simulation_matches_reference():
+    differences = compare_backends("numba", days=5)
+    assert max(differences.values()) <= TOLERANCE
+
+
+@pytest.mark.skipif(NUMBA_AVAILABLE, reason="Numba is installed")
+def test_compare_backends_refuses_missing_numba():
+    with pytest.raises(RuntimeError, match="numba"):
+        compare_backends("numba", days=1)
+
+
+@pytest.mark.skipif(NUMBA_AVAILABLE, reason="Numba is installed")
+def test_numba_backend_falls_back_with_a_warning(caplog):
+    with caplog.at_level("WARNING", logger="kernels"):
+        kernels = get_kernels("numba")
+    assert type(kernels) is NumpyKernels
+    assert "Numba is not installed" in caplog.text
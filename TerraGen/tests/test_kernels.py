@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from conftest import SEASONS, WEATHERS, copy_grid, max_difference, random_grid, reference_day
+from events import Event, EventManager
+from interactions import InteractionsManager
+from kernels import TOLERANCE, NumpyKernels, compare_backends
+from weather import SeasonManager, WeatherSystem
+
+EVENT_TYPES = ("earthquake", "flood", "wildfire", "rapid_growth")
+
+
+@pytest.mark.parametrize("weather", WEATHERS)
+def test_weather_kernel_matches_reference(config, weather):
+    expected = random_grid()
+    actual = copy_grid(expected)
+    for grid, kernels in ((expected, None), (actual, NumpyKernels())):
+        system = WeatherSystem(config, kernels=kernels)
+        system.current_weather = WEATHERS[weather]
+        system.apply_weather_effects(grid)
+    assert max_difference(expected, actual) <= TOLERANCE
+
+
+@pytest.mark.parametrize("season", SEASONS)
+def test_seasonal_kernel_matches_reference(config, season):
+    expected = random_grid()
+    actual = copy_grid(expected)
+    for grid, kernels in ((expected, None), (actual, NumpyKernels())):
+        manager = SeasonManager(kernels=kernels)
+        manager.current_season_index = manager.seasons.index(season)
+        manager.apply_seasonal_effects(grid, config)
+    assert max_difference(expected, actual) <= TOLERANCE
+
+
+@pytest.mark.parametrize("rule", ["simulate_erosion", "spread_vegetation", "simulate_desertification", "apply_interactions"])
+def test_interaction_kernels_match_reference(config, rule):
+    expected = random_grid()
+    actual = copy_grid(expected)
+    getattr(InteractionsManager(config), rule)(expected)
+    getattr(InteractionsManager(config, kernels=NumpyKernels()), rule)(actual)
+    assert max_difference(expected, actual) <= TOLERANCE
+
+
+@pytest.mark.parametrize("season", SEASONS)
+@pytest.mark.parametrize("weather", WEATHERS)
+def test_daily_step_matches_reference(config, weather, season):
+    expected = random_grid()
+    actual = copy_grid(expected)
+    step = NumpyKernels().create_step(actual)
+    for _ in range(3):
+        reference_day(expected, WEATHERS[weather], season, config)
+        step.run(actual, WEATHERS[weather], season, config)
+    assert max_difference(expected, actual) <= TOLERANCE
+
+
+def _apply_event(grid, config, kernels, event_type, cells, seed):
+    manager = EventManager(config, kernels=kernels, rng=np.random.default_rng(seed))
+    manager.apply_event(event_type, grid, cells)
+    return manager.rng
+
+
+@pytest.mark.parametrize("event_type", EVENT_TYPES)
+def test_global_event_kernels_match_reference(config, event_type):
+    expected = random_grid()
+    actual = copy_grid(expected)
+    reference_rng = _apply_event(expected, config, None, event_type, None, seed=5)
+    kernel_rng = _apply_event(actual, config, NumpyKernels(), event_type, None, seed=5)
+    assert max_difference(expected, actual) <= TOLERANCE
+    # Both consumed the random stream identically
+    assert reference_rng.random() == kernel_rng.random()
+
+
+@pytest.mark.parametrize("radius", [0, 3, 20])
+@pytest.mark.parametrize("event_type", EVENT_TYPES)
+def test_footprint_event_kernels_match_reference(config, event_type, radius):
+    expected = random_grid()
+    actual = copy_grid(expected)
+    center = int(np.flatnonzero(expected.vegetation > 0.2)[0])
+    event = Event(event_type, int(expected.q[center]), int(expected.r[center]), radius)
+    cells = EventManager(config).footprint(event, expected)
+    assert len(cells) > 0
+
+    reference_rng = _apply_event(expected, config, None, event_type, cells, seed=5)
+    kernel_rng = _apply_event(actual, config, NumpyKernels(), event_type, cells, seed=5)
+    assert max_difference(expected, actual) <= TOLERANCE
+    assert reference_rng.random() == kernel_rng.random()
+
+    untouched = np.setdiff1d(np.arange(len(actual)), cells)
+    original = random_grid()
+    for name in actual.FIELDS:
+        np.testing.assert_array_equal(getattr(actual, name)[untouched], getattr(original, name)[untouched])
+
+
+@pytest.mark.parametrize("preset", ["default", "desert"])
+def test_numpy_simulation_matches_reference(preset):
+    differences = compare_backends("numpy", days=10, seed=3, preset=preset)
+    assert max(differences.values()) <= TOLERANCE
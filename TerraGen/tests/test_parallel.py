@@ -0,0 +1,83 @@
+import gc
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from conftest import WEATHERS, copy_grid, max_difference, random_grid, small_simulation
+from events import EventManager
+from parallel import DomainDecomposition
+from step import DailyStep
+
+EVENT_TYPES = ("earthquake", "flood", "wildfire", "rapid_growth")
+
+
+def _unlinked(names):
+    for name in names:
+        try:
+            shared_memory.SharedMemory(name=name).close()
+        except FileNotFoundError:
+            continue
+        return False
+    return True
+
+
+@pytest.mark.parametrize("event_type", EVENT_TYPES + (None,))
+@pytest.mark.parametrize("workers", [1, 2, 3])
+def test_parallel_step_matches_serial_step(config, workers, event_type):
+    expected = random_grid()
+    actual = copy_grid(expected)
+    serial_step = DailyStep(expected)
+    serial_events = EventManager(config, rng=np.random.default_rng(9))
+    parallel_rng = np.random.default_rng(9)
+
+    with DomainDecomposition(actual, workers) as domain:
+        assert len(domain.partitions) == workers
+        for weather, season in ((WEATHERS["rain"], "spring"), (WEATHERS["drought"], "summer")):
+            serial_step.run(expected, weather, season, config)
+            if event_type:
+                serial_events.apply_event(event_type, expected)
+            domain.step(weather, season, config, event_type, parallel_rng)
+    assert max_difference(expected, actual) == 0.0
+    # The masked events drew one number per selected cell across all partitions, in grid order
+    assert serial_events.rng.random() == parallel_rng.random()
+
+
+def test_parallel_simulation_matches_serial_simulation():
+    serial = small_simulation(3)
+    parallel = small_simulation(3)
+    parallel.enable_parallel(workers=3)
+    try:
+        serial.run_simulation(40, visualize=False)
+        parallel.run_simulation(40, visualize=False)
+    finally:
+        parallel.disable_parallel()
+
+    events = {frame["event"] for frame in serial.simulation_history}
+    assert {"wildfire", "rapid_growth"} <= events
+    assert [frame["event"] for frame in parallel.simulation_history] == [frame["event"] for frame in serial.simulation_history]
+    assert max_difference(serial.terrain.grid, parallel.terrain.grid) == 0.0
+
+
+def test_close_unlinks_shared_memory():
+    grid = random_grid()
+    domain = DomainDecomposition(grid, workers=2)
+    names = [block.name for block in domain._blocks.values()]
+    assert not _unlinked(names)
+    domain.close()
+    assert _unlinked(names)
+    assert all(not process.is_alive() for process in domain._processes)
+    # The grid was copied back to private memory and is still usable
+    grid.height += 0.0
+    domain.close()  # Closing twice is harmless
+
+
+def test_finalizer_unlinks_shared_memory_of_dropped_decomposition():
+    grid = random_grid()
+    domain = DomainDecomposition(grid, workers=2)
+    names = [block.name for block in domain._blocks.values()]
+    processes = list(domain._processes)
+    del domain
+    gc.collect()
+    assert _unlinked(names)
+    assert all(not process.is_alive() for process in processes)
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from conftest import small_simulation
+from pyramid import RasterPyramid
+
+
+def _pyramid(height=100, width=60, tile_size=16, path=None):
+    rng = np.random.default_rng(0)
+    return RasterPyramid.build(
+        rng.random((height, width)), rng.integers(0, 6, size=(height, width)), tile_size=tile_size, path=path
+    )
+
+
+def _read_shape(pyramid, level, window):
+    top, bottom, left, right = window
+    scale = 2 ** level
+    height, width = pyramid.levels[level]["height"].shape
+    return min(-(-bottom // scale), height) - top // scale, min(-(-right // scale), width) - left // scale
+
+
+def _windows(pyramid, rng, count):
+    height, width = pyramid.shape
+    for _ in range(count):
+        top, bottom = np.sort(rng.integers(0, height + 1, size=2))
+        left, right = np.sort(rng.integers(0, width + 1, size=2))
+        yield int(top), int(bottom) + 1, int(left), int(right) + 1
+
+
+def test_level_for_picks_the_finest_level_within_the_size():
+    pyramid = _pyramid()
+    assert [level["height"].shape for level in pyramid.levels] == [(100, 60), (50, 30), (25, 15), (13, 8), (7, 4)]
+    full = (0, 100, 0, 60)
+    assert pyramid.level_for(100) == 0
+    assert pyramid.level_for(99) == 1
+    assert pyramid.level_for(25) == 2
+    assert pyramid.level_for(1) == len(pyramid.levels) - 1
+
+    rng = np.random.default_rng(1)
+    for window in [full] + list(_windows(pyramid, rng, 100)):
+        for size in (1, 4, 7, 13, 20, 50, 128):
+            level = pyramid.level_for(size, window)
+            fits = [max(_read_shape(pyramid, candidate, window)) <= size for candidate in range(len(pyramid.levels))]
+            assert level == (fits.index(True) if any(fits) else len(pyramid.levels) - 1), (window, size)
+
+
+@pytest.mark.parametrize("stored", [False, True])
+def test_windowed_reads_are_clamped_to_max_size(tmp_path, stored):
+    pyramid = _pyramid(path=str(tmp_path / "pyramid") if stored else None)
+    if stored:
+        pyramid = RasterPyramid.open(str(tmp_path / "pyramid"))
+    rng = np.random.default_rng(2)
+    for window in _windows(pyramid, rng, 100):
+        size = int(rng.integers(4, 80))
+        top, bottom, left, right = window
+        for field in ("height", "terrain_code"):
+            raster, level = pyramid.read(field, size, window)
+            assert raster.shape == _read_shape(pyramid, level, window)
+            if level < len(pyramid.levels) - 1:
+                assert max(raster.shape) <= size
+            # The read is the slice of the level covering the window
+            scale = 2 ** level
+            expected = pyramid.levels[level][field].to_array()[top // scale:-(-bottom // scale), left // scale:-(-right // scale)]
+            np.testing.assert_array_equal(raster, expected)
+
+
+def test_visualization_reuses_the_pyramid_of_a_day(monkeypatch):
+    pytest.importorskip("matplotlib")
+    import visualization
+
+    simulation = small_simulation(7)
+    view = simulation.visualization
+    builds = []
+    original = RasterPyramid.build
+
+    def counting_build(*args, **kwargs):
+        builds.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(RasterPyramid, "build", counting_build)
+    monkeypatch.setattr(visualization.plt, "show", lambda: visualization.plt.close("all"))
+
+    first = view.pyramid(day=0)
+    assert view.pyramid(day=0) is first
+    view.plot_3d_surface(day=0)
+    view.plot_3d_surface(max_size=16, window=(0, 10, 0, 10), day=0)
+    assert len(builds) == 1
+
+    simulation.run_simulation(1, visualize=False)
+    second = view.pyramid(day=1)
+    assert second is not first and len(builds) == 2
+    np.testing.assert_array_equal(second.levels[0]["height"].to_array(), view.get_heightmap())
+    assert view.pyramid() is not second and len(builds) == 3
+    assert view.pyramid(tile_size=32, day=1) is not second
@@ -0,0 +1,82 @@
+import json
+
+import numpy as np
+import pytest
+
+from conftest import small_simulation
+from reducers import (
+    DesertConversions, FieldDistribution, TerrainHistogram, default_reducers, merge_states, reducer_from_state,
+)
+from terrain import TERRAIN_CODES, TERRAIN_TYPES
+
+DAYS = 30
+
+
+def _run(seed, reducers):
+    simulation = small_simulation(seed)
+    for reducer in reducers:
+        simulation.add_reducer(reducer)
+    deserts = int(np.count_nonzero(simulation.terrain.grid.terrain_code == TERRAIN_CODES["desert"]))
+    simulation.run_simulation(DAYS, visualize=False)
+    return simulation, deserts
+
+
+def test_state_round_trip_preserves_every_reducer():
+    simulation, _ = _run(1, default_reducers(every=3))
+    for reducer in simulation.reducers:
+        state = json.loads(json.dumps(reducer.state()))
+        restored = reducer_from_state(state)
+        assert type(restored) is type(reducer)
+        assert restored.state() == reducer.state()
+        assert restored.rows() == reducer.rows()
+
+
+def test_restored_desert_conversions_continue_counting():
+    simulation, deserts = _run(2, [DesertConversions()])
+    reducer = simulation.reducers[0]
+    restored = reducer_from_state(json.loads(json.dumps(reducer.state())))
+    simulation.reducers = [restored]
+    simulation.run_simulation(10, visualize=False)
+    final = int(np.count_nonzero(simulation.terrain.grid.terrain_code == TERRAIN_CODES["desert"]))
+    assert restored.rows()[-1]["total"] == final - deserts
+
+
+def test_merged_states_add_up_the_runs():
+    runs = [_run(seed, default_reducers())[0] for seed in (3, 4)]
+    merged = merge_states([simulation.reducer_states() for simulation in runs])
+    histogram, vegetation, _, conversions = merged
+
+    for row, first, second in zip(histogram.rows(), *(simulation.reducers[0].rows() for simulation in runs)):
+        assert row["members"] == 2
+        for name in TERRAIN_TYPES:
+            assert row[name] == pytest.approx((first[name] + second[name]) / 2)
+
+    for day in range(DAYS):
+        np.testing.assert_array_equal(vegetation.days[day], runs[0].reducers[1].days[day] + runs[1].reducers[1].days[day])
+        assert conversions.days[day] == runs[0].reducers[3].days[day] + runs[1].reducers[3].days[day]
+    # A merged reducer does not describe one grid, so it does not keep counting conversions
+    assert conversions.previous is None and conversions.pending == 0
+
+
+def test_merge_rejects_other_settings():
+    with pytest.raises(ValueError):
+        FieldDistribution("vegetation").merge(FieldDistribution("water_level"))
+    with pytest.raises(ValueError):
+        TerrainHistogram(window=5).merge(TerrainHistogram())
+    with pytest.raises(ValueError):
+        DesertConversions().merge(TerrainHistogram())
+
+
+def test_window_keeps_the_most_recent_days():
+    simulation, _ = _run(5, [FieldDistribution("height"), FieldDistribution("height", window=4), TerrainHistogram(every=5, window=2)])
+    complete, windowed, histogram = simulation.reducers
+    assert sorted(windowed.days) == list(range(DAYS - 4, DAYS))
+    assert windowed.rows() == [row for row in complete.rows() if row["day"] >= DAYS - 4]
+    assert sorted(histogram.days) == [20, 25]
+
+    # A complete state loaded with a window is trimmed, and merges keep the window
+    restored = FieldDistribution.from_state({**complete.state(), "settings": windowed.settings()})
+    assert restored.state() == windowed.state()
+    merged = restored.merge(windowed)
+    assert sorted(merged.days) == list(range(DAYS - 4, DAYS))
+    assert all(merged.members[day] == 2 for day in merged.days)
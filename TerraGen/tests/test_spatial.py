@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from conftest import random_grid, small_simulation
+from spatial import SpatialIndex
+
+TOLERANCE = 1e-9
+
+
+def _distances(grid, q, r):
+    dq = grid.q - q
+    dr = grid.r - r
+    return np.maximum(np.maximum(np.abs(dq), np.abs(dr)), np.abs(dq + dr))
+
+
+def _random_queries(grid, rng, count):
+    """
+    Random centers in and around the grid, with radii from empty to larger than the grid.
+    """
+    reach = grid.radius + 4
+    q = rng.integers(-reach, reach + 1, size=count)
+    r = rng.integers(-reach, reach + 1, size=count)
+    radius = rng.integers(-1, 2 * grid.radius + 2, size=count)
+    return q, r, radius
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_disk_and_ring_sums_match_brute_force(seed):
+    grid = random_grid(seed=seed)
+    index = SpatialIndex(grid)
+    queries = _random_queries(grid, np.random.default_rng(seed), 200)
+    for field in ("height", "vegetation", "cells"):
+        values = np.ones(len(grid)) if field == "cells" else getattr(grid, field)
+        disks = index.disk_sum(field, *queries)
+        rings = index.ring_sum(field, *queries)
+        for position, (q, r, radius) in enumerate(zip(*queries)):
+            distances = _distances(grid, q, r)
+            assert abs(disks[position] - values[distances <= radius].sum()) <= TOLERANCE
+            assert abs(rings[position] - values[distances == radius].sum()) <= TOLERANCE
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_parallelogram_sums_match_brute_force(seed):
+    grid = random_grid(seed=seed)
+    index = SpatialIndex(grid)
+    reach = grid.radius + 3
+    bounds = np.random.default_rng(seed).integers(-reach, reach + 1, size=(4, 200))
+    sums = index.parallelogram_sum("water_level", *bounds)
+    counts = index.parallelogram_sum("cells", *bounds)
+    for position, (q_first, q_last, r_first, r_last) in enumerate(bounds.T):
+        inside = (grid.q >= q_first) & (grid.q <= q_last) & (grid.r >= r_first) & (grid.r <= r_last)
+        assert abs(sums[position] - grid.water_level[inside].sum()) <= TOLERANCE
+        assert counts[position] == inside.sum()
+
+
+def test_batched_queries_match_single_queries():
+    grid = random_grid()
+    index = SpatialIndex(grid)
+    q, r, radius = _random_queries(grid, np.random.default_rng(5), 100)
+    sums = index.disk_sum("vegetation", q, r, radius)
+    means = index.ring_mean("height", q, r, radius)
+    assert sums.shape == means.shape == (100,)
+    for position in range(len(q)):
+        assert sums[position] == index.disk_sum("vegetation", q[position], r[position], radius[position])
+        single = index.ring_mean("height", q[position], r[position], radius[position])
+        assert np.isnan(single) if np.isnan(means[position]) else means[position] == single
+    empty = index.disk_sum("cells", q, r, radius) == 0
+    assert empty.any() and np.isnan(index.disk_mean("height", q, r, radius)[empty]).all()
+
+
+def test_refresh_spatial_index_follows_simulation_updates():
+    simulation = small_simulation(5)
+    index = simulation.terrain.spatial_index()
+    assert simulation.terrain.spatial_index() is index
+    grid = simulation.terrain.grid
+    before = index.disk_sum("vegetation", 0, 0, 4)
+
+    simulation.run_simulation(5, visualize=False)
+    inside = _distances(grid, 0, 0) <= 4
+    assert abs(index.disk_sum("vegetation", 0, 0, 4) - grid.vegetation[inside].sum()) <= TOLERANCE
+    assert index.disk_sum("vegetation", 0, 0, 4) != before
+
+    # Edits outside the daily update are picked up by an explicit refresh
+    grid.height[:] = 0.5
+    simulation.terrain.refresh_spatial_index()
+    assert abs(index.disk_sum("height", 2, -1, 3) - 0.5 * np.count_nonzero(_distances(grid, 2, -1) <= 3)) <= TOLERANCE
@@ -0,0 +1,37 @@
+import pytest
+
+from conftest import max_difference, small_simulation
+from events import EventManager
+from tiles import TiledSimulation, TiledWorld
+
+
+def _simulation(seed, event_mode):
+    return small_simulation(seed, grid_width=40, event_mode=event_mode, max_events_per_day=10, event_radius=[3, 12])
+
+
+@pytest.mark.parametrize("event_mode", ["global", "local"])
+def test_tiled_simulation_matches_in_memory_run(tmp_path, event_mode):
+    simulation = _simulation(seed=11, event_mode=event_mode)
+    # 41 q rows in tiles of 7, so the last tile is partial
+    world = TiledWorld.from_grid(simulation.terrain.grid, str(tmp_path / "world"), tile_rows=7)
+    assert (2 * world.radius + 1) % world.tile_rows != 0
+
+    tiled = TiledSimulation(world, seed=11)
+    for name in ("event_mode", "max_events_per_day", "event_radius"):
+        setattr(tiled.config, name, getattr(simulation.config, name))
+    tiled.event_manager = EventManager(tiled.config.__dict__, kernels=tiled.kernels, rng=tiled.rngs["events"])
+
+    simulation.run_simulation(30, visualize=False)
+    records = tiled.run_simulation(30)
+
+    assert max_difference(simulation.terrain.grid, world.to_grid()) == 0.0
+    assert any(record["event"] for record in records)
+
+
+def test_tiled_simulation_reuses_one_step_engine(tmp_path):
+    simulation = _simulation(seed=2, event_mode="global")
+    world = TiledWorld.from_grid(simulation.terrain.grid, str(tmp_path / "world"), tile_rows=7)
+    tiled = TiledSimulation(world, seed=2)
+    tiled.run_simulation(2)
+    largest = max(len(world.load(first - 1, last + 1)) for first, last in world.tiles())
+    assert tiled.step.capacity == largest
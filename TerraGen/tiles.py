@@ -0,0 +1,371 @@
+import json
+import logging
+import os
+
+import numpy as np
+
+from config import Config
+from events import EventManager
+from interactions import InteractionsManager
+from kernels import get_kernels
+from noise_field import fractal_noise
+from terrain import HexGrid, TERRAIN_CODES, TERRAIN_TYPES
+from weather import SeasonManager, WeatherSystem
+
+
+TILED_WORLD_FORMAT = "terragen-tiled-world"
+
+# Per-cell arrays stored for every cell of a tiled world, one memory-mapped file each.
+WORLD_FIELDS = HexGrid.FIELDS + ("terrain_code",)
+
+logger = logging.getLogger(__name__)
+
+
+class TiledWorld:
+    """
+    A hexagonal world stored on disk and paged into memory one tile at a time.
+
+    Cells use the same q-major dense layout as HexGrid, so every field is one flat memory-mapped
+    file and a run of q rows is a contiguous byte range of each file. The world is split into
+    tiles of ``tile_rows`` consecutive q rows; load() copies a run of rows (usually a tile plus one
+    halo row on each side) into an in-memory HexGrid band and store() writes rows back. Only the
+    loaded bands are resident, so the world can be far larger than RAM.
+
+    Files in the world directory: header.json (radius, tile size and dtypes) and <field>.bin for
+    every field in WORLD_FIELDS.
+    """
+
+    def __init__(self, path, mode="r+"):
+        """
+        Open an existing world written by TiledWorld.create.
+        :param path: World directory.
+        :param mode: Memory-map mode, "r+" to simulate or "r" to only read.
+        """
+        self.path = path
+        with open(os.path.join(path, "header.json")) as f:
+            self.header = json.load(f)
+        if self.header.get("format") != TILED_WORLD_FORMAT:
+            raise ValueError(f"'{path}' is not a TerraGen tiled world.")
+
+        self.radius = self.header["radius"]
+        self.tile_rows = self.header["tile_rows"]
+        self.dtype = np.dtype(self.header["dtype"])
+        q_values = np.arange(-self.radius, self.radius + 1)
+        self._r_min = np.maximum(-self.radius, -q_values - self.radius)
+        lengths = np.minimum(self.radius, -q_values + self.radius) - self._r_min + 1
+        self._row_offsets = np.concatenate(([0], np.cumsum(lengths, dtype=np.int64)))
+        self.size = int(self._row_offsets[-1])
+        self.fields = {
+            name: np.memmap(self._field_path(name), dtype=self._field_dtype(name), mode=mode, shape=(self.size,))
+            for name in WORLD_FIELDS
+        }
+
+    @classmethod
+    def create(cls, path, radius, tile_rows=64, dtype=np.float32, temperature=25.0):
+        """
+        Create an empty world on disk. Fields start at zero and temperature at its initial value.
+        :param path: World directory (created if needed).
+        :param radius: Hexagonal radius of the world.
+        :param tile_rows: Number of q rows per tile.
+        :param dtype: Floating point dtype of the field files.
+        :param temperature: Initial temperature of every cell.
+        :return: The open TiledWorld.
+        """
+        os.makedirs(path, exist_ok=True)
+        header = {
+            "format": TILED_WORLD_FORMAT,
+            "version": 1,
+            "radius": radius,
+            "tile_rows": tile_rows,
+            "dtype": np.dtype(dtype).str,
+            "terrain_types": list(TERRAIN_TYPES),
+        }
+        with open(os.path.join(path, "header.json"), "w") as f:
+            json.dump(header, f)
+
+        cells = 3 * radius * (radius + 1) + 1
+        for name in WORLD_FIELDS:
+            with open(os.path.join(path, f"{name}.bin"), "wb") as f:
+                f.truncate(cells * np.dtype(np.int8 if name == "terrain_code" else dtype).itemsize)
+
+        world = cls(path)
+        for first, last in world.tiles():
+            world.fields["temperature"][world.span(first, last)] = temperature
+        world.flush()
+        return world
+
+    @classmethod
+    def from_grid(cls, grid, path, tile_rows=64):
+        """
+        Write an in-memory HexGrid to disk as a tiled world.
+        :param grid: The HexGrid to store.
+        :param path: World directory.
+        :param tile_rows: Number of q rows per tile.
+        :return: The open TiledWorld.
+        """
+        world = cls.create(path, grid.radius, tile_rows=tile_rows, dtype=grid.height.dtype)
+        world.store(grid)
+        world.flush()
+        return world
+
+    def _field_path(self, name):
+        return os.path.join(self.path, f"{name}.bin")
+
+    def _field_dtype(self, name):
+        return np.int8 if name == "terrain_code" else self.dtype
+
+    def __len__(self):
+        return self.size
+
+    def tiles(self):
+        """
+        Get the q row ranges of the tiles, in streaming (ascending q) order.
+        :return: List of (first, last) q rows, inclusive.
+        """
+        return [
+            (first, min(first + self.tile_rows - 1, self.radius))
+            for first in range(-self.radius, self.radius + 1, self.tile_rows)
+        ]
+
+    def span(self, q_first, q_last):
+        """
+        Get the dense index range of a run of q rows.
+        :return: A slice over the field files.
+        """
+        return slice(int(self._row_offsets[q_first + self.radius]), int(self._row_offsets[q_last + self.radius + 1]))
+
+    def coordinates(self, index):
+        """
+        Get the axial coordinates of a dense cell index.
+        :param index: Dense index into the field files.
+        :return: Tuple of (q, r).
+        """
+        row = int(np.searchsorted(self._row_offsets, index, side="right")) - 1
+        return row - self.radius, int(self._r_min[row] + index - self._row_offsets[row])
+
+    def load(self, q_first, q_last):
+        """
+        Copy a run of q rows into memory. Rows outside the world are clipped.
+        :param q_first: First q row.
+        :param q_last: Last q row, inclusive.
+        :return: A HexGrid band holding copies of the rows.
+        """
+        q_first = max(q_first, -self.radius)
+        q_last = min(q_last, self.radius)
+        band = HexGrid(self.radius, dtype=self.dtype, q_range=(q_first, q_last))
+        span = self.span(q_first, q_last)
+        for name in WORLD_FIELDS:
+            getattr(band, name)[:] = self.fields[name][span]
+        return band
+
+    def store(self, band, q_first=None, q_last=None):
+        """
+        Write rows of a band (or a whole grid) back to disk.
+        :param band: A HexGrid or band returned by load().
+        :param q_first: First q row to write (default: the first row of the band).
+        :param q_last: Last q row to write, inclusive (default: the last row of the band).
+        """
+        q_first = band.q_min if q_first is None else q_first
+        q_last = band.q_max if q_last is None else q_last
+        source = band.row_span(q_first, q_last)
+        target = self.span(q_first, q_last)
+        for name in WORLD_FIELDS:
+            self.fields[name][target] = getattr(band, name)[source]
+
+    def flush(self):
+        """
+        Write dirty pages of every field file to disk.
+        """
+        for field in self.fields.values():
+            if field.mode != "r":
+                field.flush()
+
+    def to_grid(self):
+        """
+        Load the whole world into one in-memory HexGrid (only sensible for small worlds).
+        """
+        return self.load(-self.radius, self.radius)
+
+
+def generate_world(path, config, radius=None, tile_rows=64, seed=None, dtype=np.float32):
+    """
+    Generate a tiled world with the terrain rules of Terrain.generate, normalize and apply_water,
+    one tile at a time. Heights come from the same fractal noise field as in-memory terrain, so a
+    world and an in-memory grid generated with the same noise seed have the same heights (up to the
+    precision of the field dtype).
+    :param path: World directory.
+    :param config: The Config of the world.
+    :param radius: Hexagonal radius of the world (default: config.grid_width // 2).
+    :param tile_rows: Number of q rows per tile.
+    :param seed: Seed of the generation random stream.
+    :param dtype: Floating point dtype of the field files.
+    :return: The open TiledWorld.
+    """
+    radius = config.grid_width // 2 if radius is None else radius
+    world = TiledWorld.create(path, radius, tile_rows=tile_rows, dtype=dtype)
+    rng = np.random.default_rng(seed)
+    noise_seed = int(rng.integers(0, 10000))
+    height = world.fields["height"]
+    min_val, max_val = np.inf, -np.inf
+
+    # First pass: raw heights and terrain classification, which use the unnormalized heights
+    for first, last in world.tiles():
+        band = HexGrid(radius, dtype=dtype, q_range=(first, last))
+        raw = fractal_noise(
+            band.q / config.scale,
+            band.r / config.scale,
+            octaves=config.octaves,
+            persistence=config.persistence,
+            lacunarity=config.lacunarity,
+            seed=noise_seed,
+        )
+        draws = rng.random(len(band))
+        span = world.span(first, last)
+        height[span] = raw
+        world.fields["terrain_code"][span] = np.select(
+            [raw < config.water_level, raw > 0.6, raw > 0.3],
+            [
+                TERRAIN_CODES["ocean"],
+                TERRAIN_CODES["mountains"],
+                np.where(draws < 0.5, TERRAIN_CODES["plains"], TERRAIN_CODES["forest"]),
+            ],
+            default=np.where(draws < 0.3, TERRAIN_CODES["desert"], TERRAIN_CODES["plains"]),
+        )
+        min_val = min(min_val, raw.min())
+        max_val = max(max_val, raw.max())
+
+    # Second pass: normalize heights and set the initial water levels
+    for first, last in world.tiles():
+        span = world.span(first, last)
+        heights = np.array(height[span], dtype=np.float64)
+        if max_val > min_val:
+            heights -= min_val
+            heights /= max_val - min_val
+        height[span] = heights
+        below = heights < config.water_level
+        world.fields["water_level"][span] = np.where(below, min(config.water_level, 0.2), 0.0)
+
+    world.flush()
+    return world
+
+
+class TiledSimulation:
+    """
+    Runs the daily update cycle of Simulation over a TiledWorld, streaming tiles in ascending q
+    order so only one tile and its halo rows are resident at a time.
+
+    Each tile is loaded with one halo row on each side. The per-cell rules are applied to the
+    halo rows too, so the neighbor-dependent rules (vegetation spread) see exactly the values the
+    owning tile computes, and only the tile's own rows are written back. The row below the tile
+    has already been updated by the previous tile, so its pre-day values are carried over from
+    the previous tile instead of being read from disk.
+
+    Weather, seasons and event decisions are made once per day for the whole world, and events
+    consume their random numbers in the same cell order as an in-memory run. A TiledSimulation
+    seeded like a Simulation on the same world therefore produces the same grid.
+
+    One fused step engine is shared by all bands: it is rebound to each band as it is loaded
+    (see step.DailyStep.bind), so its scratch buffers are sized for the largest band and only the
+    current band's neighbor table is resident.
+    """
+
+    def __init__(self, world, config_preset="default", backend=None, seed=None):
+        """
+        :param world: The TiledWorld to simulate (opened in "r+" mode).
+        :param config_preset: The name of the preset to use for the configuration.
+        :param backend: Kernel backend for the daily updates. Defaults to config.backend.
+        :param seed: Seed (int or np.random.SeedSequence) of the run; see Simulation.
+        """
+        from simulation import Simulation
+
+        self.world = world
+        self.config = Config(preset=config_preset)
+        self.backend = backend or self.config.backend
+        self.kernels = get_kernels(self.backend)
+        self.seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.rng = np.random.Generator(np.random.PCG64(self.seed_sequence))
+        self.rngs = {
+            name: np.random.Generator(np.random.PCG64(child))
+            for name, child in zip(Simulation.RNG_STREAMS, self.seed_sequence.spawn(len(Simulation.RNG_STREAMS)))
+        }
+        self.weather_system = WeatherSystem(self.config.__dict__, kernels=self.kernels, rng=self.rngs["weather"])
+        self.season_manager = SeasonManager(kernels=self.kernels)
+        self.interactions_manager = InteractionsManager(self.config.__dict__, kernels=self.kernels)
+        self.event_manager = EventManager(self.config.__dict__, kernels=self.kernels, rng=self.rngs["events"])
+        self.step = None  # Fused step engine, rebound to every band
+        self.current_day = 0
+
+    def run_simulation(self, days=100):
+        """
+        Run the simulation for a specified number of days.
+        :param days: Number of days to simulate.
+        :return: List of the daily records (day, weather, event) returned by update_day.
+        """
+        logger.info("Starting tiled simulation for %d days.", days)
+        return [self.update_day() for _ in range(days)]
+
+    def update_day(self):
+        """
+        Perform the daily update cycle over every tile.
+        :return: Dictionary with the day, its weather and its event type (or list of event records).
+        """
+        logger.info("Day %d: Starting updates.", self.current_day + 1)
+        weather = self.weather_system.generate_weather()
+        season = self.season_manager.get_current_season()
+
+        events = None
+        if self.event_manager.mode == "local":
+            events = self.event_manager.draw_events(self.world.size, self.world.coordinates)
+            event_type = None
+        else:
+            event_type = self.event_manager.trigger_event()
+            if event_type:
+                logger.info("Event triggered: %s", event_type)
+
+        carry = None
+        for first, last in self.world.tiles():
+            band = self.world.load(first - 1, last + 1)
+            if carry is not None:
+                rows = band.row_span(first - 1)
+                for name, values in carry.items():
+                    getattr(band, name)[rows] = values
+            rows = band.row_span(last)
+            carry = {name: getattr(band, name)[rows].copy() for name in HexGrid.FIELDS + ("terrain_code",)}
+
+            self._apply_rules(band, weather, season)
+            if event_type:
+                interior = band.row_span(first, last)
+                self.event_manager.apply_event(event_type, band, np.arange(interior.start, interior.stop))
+            self.world.store(band, first, last)
+
+        if events is not None:
+            # Like EventManager.trigger_events, find every footprint before any event is applied
+            for event in events:
+                event.cells = self.event_manager.footprint(event, self.world.load(event.q - event.radius, event.q + event.radius))
+            for event in events:
+                window = self.world.load(event.q - event.radius, event.q + event.radius)
+                logger.info("Event triggered: %s at (%d, %d), %d cells", event.event_type, event.q, event.r, len(event.cells))
+                self.event_manager.apply_event(event.event_type, window, event.cells)
+                self.world.store(window)
+            event_type = [event.to_record() for event in events] or None
+
+        self.world.flush()
+        record = {"day": self.current_day, "weather": weather, "event": event_type}
+        self.season_manager.advance_day()
+        self.current_day += 1
+        return record
+
+    def _apply_rules(self, band, weather, season):
+        """
+        Apply the weather, seasonal and interaction rules of the day to a band.
+        """
+        if self.config.fused_step and self.kernels is not None:
+            if self.step is None:
+                self.step = self.kernels.create_step(band)
+            else:
+                self.step.bind(band)
+            self.step.run(band, weather, season, self.config.__dict__)
+            return
+        self.weather_system.apply_weather_effects(band)
+        self.season_manager.apply_seasonal_effects(band, self.config.__dict__)
+        self.interactions_manager.apply_interactions(band)
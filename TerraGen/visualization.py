@@ -1,34 +1,94 @@
 import matplotlib.pyplot as plt
 import numpy as np
-from matplotlib.patches import RegularPolygon
 from mpl_toolkits.mplot3d import Axes3D
 from matplotlib.colors import LightSource
 
+from projection import HexProjection
+from terrain import HexGrid, TERRAIN_CODES, TERRAIN_TYPES
+
+
+TERRAIN_COLORS = {
+    "desert": "#E3C16F",
+    "forest": "#228B22",
+    "mountains": "#8B8B83",
+    "plains": "#ADDF84",
+    "arctic": "#B3E5FC",
+    "ocean": "#1E88E5",
+}
+
+TERRAIN_RGB = {
+    "desert": [227/255, 193/255, 111/255],
+    "forest": [34/255, 139/255, 34/255],
+    "mountains": [139/255, 139/255, 131/255],
+    "plains": [173/255, 223/255, 132/255],
+    "arctic": [179/255, 229/255, 252/255],
+    "ocean": [30/255, 136/255, 229/255],
+}
+
+
+def terrain_rgb_table():
+    """
+    Build a lookup table from terrain codes (see terrain.TERRAIN_TYPES) to RGB colors.
+    :return: Array of shape (len(TERRAIN_TYPES), 3).
+    """
+    return np.array([TERRAIN_RGB.get(name, [1.0, 1.0, 1.0]) for name in TERRAIN_TYPES])
+
 
 class Visualization:
-    def __init__(self, terrain):
+    def __init__(self, terrain, resolution=None, rng=None):
+        """
+        :param terrain: The Terrain to visualize.
+        :param resolution: Raster width in pixels for hex-aware resampling. None keeps the legacy
+                           grid_width x grid_width raster where several hexes can share a pixel.
+        :param rng: numpy.random.Generator for the overlay textures (default: a freshly seeded one).
+        """
         self.terrain = terrain
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.resolution = resolution
+        self._projection = None
+        self._pyramid = None  # Pyramid of the last day requested with pyramid(day=...)
+        self._pyramid_key = None
+        self._pyramid_grid = None
+
+    @property
+    def projection(self):
+        """
+        The HexProjection of the current grid, rebuilt only when the grid topology changes.
+        """
+        grid = self.terrain.grid
+        if self._projection is None or not self._projection.matches(grid):
+            self._projection = HexProjection(grid, self.terrain.config.grid_width, self.resolution)
+        return self._projection
+
+    def rasterize(self, values, fill=0.0):
+        """
+        Project a per-cell field (in grid order) onto the plotting raster.
+        :param values: Array of shape (N,) or (N, channels).
+        :param fill: Value of pixels that no hex maps to.
+        :return: 2D (or 3D for channels) numpy array.
+        """
+        return self.projection.rasterize(values, fill)
 
     def plot_hex_grid(self):
         """
         Plot the hexagonal grid with colored terrain regions.
+        The whole grid is drawn as one PolyCollection colored through the terrain lookup table
+        (see hexrender.HexRenderer) rather than one patch per cell.
         """
+        from hexrender import HexRenderer
+
         if self.terrain.grid:
+            grid = self.terrain.grid
             fig, ax = plt.subplots(figsize=(12, 10))
-            for (q, r), cell in self.terrain.grid.items():
-                x, y = self.hex_to_cartesian(q, r)
-                color = self.get_color_for_terrain(cell.terrain_type)
-
-                # Draw hexagonal cells
-                hexagon = RegularPolygon(
-                    (x, y),
-                    numVertices=6,
-                    radius=0.5,
-                    orientation=np.radians(30),
-                    facecolor=color,
-                    edgecolor='black',
-                )
-                ax.add_patch(hexagon)
+            renderer = HexRenderer.for_grid(grid, size=0.5, edgecolor="black") if isinstance(grid, HexGrid) else None
+            if renderer is None:
+                # Legacy dictionary grids
+                coords = np.array(list(grid.keys()))
+                codes = np.array([TERRAIN_CODES.get(cell.terrain_type, 0) for cell in grid.values()])
+                renderer = HexRenderer(coords[:, 0], coords[:, 1], size=0.5, edgecolor="black")
+            else:
+                codes = grid.terrain_code
+            renderer.draw(ax, codes)
 
             ax.set_xlim(-self.terrain.config.grid_width, self.terrain.config.grid_width)
             ax.set_ylim(-self.terrain.config.grid_width, self.terrain.config.grid_width)
@@ -45,15 +105,7 @@ class Visualization:
         :param terrain_type: Type of terrain (e.g., desert, forest).
         :return: Color for the terrain.
         """
-        color_map = {
-            "desert": "#E3C16F",
-            "forest": "#228B22",
-            "mountains": "#8B8B83",
-            "plains": "#ADDF84",
-            "arctic": "#B3E5FC",
-            "ocean": "#1E88E5",
-        }
-        return color_map.get(terrain_type, "#FFFFFF")
+        return TERRAIN_COLORS.get(terrain_type, "#FFFFFF")
 
     def plot_grayscale(self):
         """
@@ -75,11 +127,7 @@ class Visualization:
         Create a complex 2D colored visualization with regional distinctions.
         """
         if self.terrain.grid:
-            heightmap = self.get_heightmap()
-            gradient_map = np.zeros((*heightmap.shape, 3))
-            for (q, r), cell in self.terrain.grid.items():
-                x, y = self.hex_to_cartesian(q, r)
-                gradient_map[int(y) % gradient_map.shape[0]][int(x) % gradient_map.shape[1]] = self.get_rgb_for_terrain(cell.terrain_type)
+            gradient_map = self.rasterize(terrain_rgb_table()[self.terrain.grid.terrain_code])
 
             plt.figure(figsize=(12, 10), dpi=150)
             plt.imshow(gradient_map, interpolation='nearest', aspect='equal')
@@ -95,24 +143,47 @@ class Visualization:
         :param terrain_type: Type of terrain (e.g., desert, forest).
         :return: RGB tuple for the terrain.
         """
-        color_map = {
-            "desert": [227/255, 193/255, 111/255],
-            "forest": [34/255, 139/255, 34/255],
-            "mountains": [139/255, 139/255, 131/255],
-            "plains": [173/255, 223/255, 132/255],
-            "arctic": [179/255, 229/255, 252/255],
-            "ocean": [30/255, 136/255, 229/255],
-        }
-        return color_map.get(terrain_type, [1.0, 1.0, 1.0])
+        return TERRAIN_RGB.get(terrain_type, [1.0, 1.0, 1.0])
 
-    def plot_3d_surface(self):
+    def pyramid(self, tile_size=256, path=None, day=None):
+        """
+        Build the level-of-detail pyramid of the current heightmap and terrain raster.
+        :param tile_size: Tile width and height in pixels.
+        :param path: Optional directory to store the levels in, memory-mapped.
+        :param day: Optional day the grid values belong to. The pyramid of a day is built once and
+                    returned again while the day (and grid, tile size and path) stays the same;
+                    without a day it is always rebuilt.
+        :return: A pyramid.RasterPyramid.
+        """
+        from pyramid import RasterPyramid
+
+        grid = self.terrain.grid
+        key = (day, tile_size, path)
+        if day is not None and self._pyramid is not None and self._pyramid_key == key and self._pyramid_grid is grid:
+            return self._pyramid
+        pyramid = RasterPyramid.build(self.get_heightmap(), self.rasterize(grid.terrain_code), tile_size, path=path)
+        if day is not None:
+            self._pyramid, self._pyramid_key, self._pyramid_grid = pyramid, key, grid
+        return pyramid
+
+    def plot_3d_surface(self, max_size=128, window=None, pyramid=None, day=None):
         """
         Render a complex 3D surface with lighting and shadows.
+        The heightmap is read from a level-of-detail pyramid at the finest level that has at most
+        max_size samples along the longer side, so the cost depends on max_size, not on the grid size.
+        :param max_size: Maximum number of surface samples along the longer side.
+        :param window: Optional (top, bottom, left, right) region of the full-resolution heightmap to zoom into.
+        :param pyramid: Optional prebuilt RasterPyramid (default: the pyramid of the current grid).
+        :param day: Optional day of the grid values, so repeated views of one day share its pyramid (see pyramid()).
         """
         if self.terrain.grid:
-            heightmap = self.get_heightmap()
-            x = np.linspace(0, heightmap.shape[1], heightmap.shape[1])
-            y = np.linspace(0, heightmap.shape[0], heightmap.shape[0])
+            pyramid = pyramid or self.pyramid(day=day)
+            heightmap, level = pyramid.read("height", max_size, window)
+            top, _, left, _ = window or (0, 0, 0, 0)
+            scale = 2 ** level
+            # The read starts at the level pixel holding (top, left), i.e. at a multiple of scale
+            x = (left // scale + np.arange(heightmap.shape[1])) * scale
+            y = (top // scale + np.arange(heightmap.shape[0])) * scale
             x, y = np.meshgrid(x, y)
 
             fig = plt.figure(figsize=(14, 10), dpi=150)
@@ -134,12 +205,7 @@ class Visualization:
         Extract the heightmap from the grid.
         :return: 2D numpy array of heights.
         """
-        grid_width = self.terrain.config.grid_width
-        heightmap = np.zeros((grid_width, grid_width))
-        for (q, r), cell in self.terrain.grid.items():
-            x, y = self.hex_to_cartesian(q, r)
-            heightmap[int(y) % grid_width][int(x) % grid_width] = cell.height
-        return heightmap
+        return self.rasterize(self.terrain.grid.height)
 
     def hex_to_cartesian(self, q, r):
         """
@@ -164,11 +230,11 @@ class Visualization:
 
             # Add weather overlays
             if weather.get("rain_intensity", 0) > 0.5:
-                plt.imshow(np.random.random(heightmap.shape), cmap="Blues", alpha=0.3)
+                plt.imshow(self.rng.random(heightmap.shape), cmap="Blues", alpha=0.3)
                 plt.title("Rain Overlay", fontsize=16)
 
             if weather.get("snow_intensity", 0) > 0.5:
-                plt.imshow(np.random.random(heightmap.shape), cmap="cool", alpha=0.3)
+                plt.imshow(self.rng.random(heightmap.shape), cmap="cool", alpha=0.3)
                 plt.title("Snow Overlay", fontsize=16)
 
             plt.xlabel("X-axis")
@@ -188,11 +254,11 @@ class Visualization:
             plt.title(f"Event Effect: {event_type.capitalize()}", fontsize=16)
 
             if event_type == "earthquake":
-                plt.imshow(np.random.random(heightmap.shape), cmap="Reds", alpha=0.3)
+                plt.imshow(self.rng.random(heightmap.shape), cmap="Reds", alpha=0.3)
             elif event_type == "flood":
-                plt.imshow(np.random.random(heightmap.shape), cmap="Blues", alpha=0.3)
+                plt.imshow(self.rng.random(heightmap.shape), cmap="Blues", alpha=0.3)
             elif event_type == "wildfire":
-                plt.imshow(np.random.random(heightmap.shape), cmap="Oranges", alpha=0.3)
+                plt.imshow(self.rng.random(heightmap.shape), cmap="Oranges", alpha=0.3)
 
             plt.xlabel("X-axis")
             plt.ylabel("Y-axis")
@@ -1,14 +1,18 @@
 import numpy as np
-from terrain import Cell
+from terrain import Cell, HexGrid
 
 
 class WeatherSystem:
-    def __init__(self, config):
+    def __init__(self, config, kernels=None, rng=None):
         """
         Initialize the WeatherSystem.
         :param config: A dictionary-like object containing weather parameters.
+        :param kernels: Optional whole-grid kernels (see kernels.get_kernels) used for HexGrid grids.
+        :param rng: numpy.random.Generator used for every random draw (default: a freshly seeded one).
         """
         self.config = config
+        self.kernels = kernels
+        self.rng = rng if rng is not None else np.random.default_rng()
         self.current_weather = None
 
     def generate_weather(self):
@@ -17,10 +21,10 @@ class WeatherSystem:
         :return: A dictionary representing the day's weather.
         """
         weather = {
-            "rain_intensity": np.random.uniform(0, 0.5),  # Reduced max rain intensity
-            "snow_intensity": np.random.uniform(0, 0.3),  # Reduced max snow intensity
-            "wind_speed": np.random.uniform(0, 0.3),      # Mild wind
-            "drought": np.random.choice([True, False], p=[0.1, 0.9])  # 10% chance of drought
+            "rain_intensity": self.rng.uniform(0, 0.5),  # Reduced max rain intensity
+            "snow_intensity": self.rng.uniform(0, 0.3),  # Reduced max snow intensity
+            "wind_speed": self.rng.uniform(0, 0.3),      # Mild wind
+            "drought": self.rng.choice([True, False], p=[0.1, 0.9])  # 10% chance of drought
         }
         self.current_weather = weather
         return weather
@@ -33,6 +37,10 @@ class WeatherSystem:
         if not self.current_weather:
             raise ValueError("Weather has not been generated yet. Call generate_weather first.")
 
+        if self.kernels is not None and isinstance(grid, HexGrid):
+            self.kernels.apply_weather_effects(grid, self.current_weather, self.config)
+            return
+
         rain_intensity = self.current_weather["rain_intensity"]
         snow_intensity = self.current_weather["snow_intensity"]
         wind_speed = self.current_weather["wind_speed"]
@@ -61,11 +69,13 @@ class WeatherSystem:
 
 
 class SeasonManager:
-    def __init__(self, days_per_season=90):
+    def __init__(self, days_per_season=90, kernels=None):
         """
         Initialize the SeasonManager.
         :param days_per_season: Number of days per season.
+        :param kernels: Optional whole-grid kernels (see kernels.get_kernels) used for HexGrid grids.
         """
+        self.kernels = kernels
         self.seasons = ["spring", "summer", "autumn", "winter"]
         self.current_season_index = 0
         self.days_per_season = days_per_season
@@ -93,6 +103,10 @@ class SeasonManager:
         :param config: A dictionary-like object containing seasonal effect parameters.
         """
         current_season = self.get_current_season()
+        if self.kernels is not None and isinstance(grid, HexGrid):
+            self.kernels.apply_seasonal_effects(grid, current_season, config)
+            return
+
         seasonal_effects = config["seasonal_effects"].get(current_season, {})
 
         for cell in grid.values():